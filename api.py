@@ -0,0 +1,128 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+
+class StateAPI:
+    """Read-only JSON view of a running arena, served from its memory.
+
+        GET /              -> index: cycle count, state version, endpoints
+        GET /leaderboard   -> P&L per strategy at the latest marks
+        GET /positions     -> open positions with entry price and mark
+        GET /marks         -> latest price per symbol
+        GET /decisions     -> recent strategy decisions, newest first
+        GET /cycles        -> recent cycle timings, newest first
+        GET /memory        -> latest memory report (when MEMORY_REPORT_EVERY_CYCLES is set)
+
+    Bodies are built at most once per arena state version and carry an
+    ETag, so pollers sending If-None-Match get a 304 without any work.
+    Nothing here touches disk, the broker or market data.
+    """
+
+    ENDPOINTS = ("leaderboard", "positions", "marks", "decisions", "cycles", "memory")
+
+    def __init__(self, arena, host: str = config.API_HOST, port: int = config.API_PORT):
+        self.arena = arena
+        self.host = host
+        self.port = port
+        self._cache: dict[str, tuple[int, bytes, str]] = {}  # endpoint -> (version, body, etag)
+        self._server = None
+
+    def start(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                api._handle(self)
+
+            def log_message(self, format, *args):
+                pass  # Pollers would flood the arena's console
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="state-api", daemon=True).start()
+        print(f"🔌 State API on http://{self.host}:{self.port}/")
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def response(self, endpoint: str) -> tuple[bytes, str]:
+        """The endpoint's JSON body and ETag, rebuilt only when the arena changed."""
+        version = self.arena.state_version
+        cached = self._cache.get(endpoint)
+        if cached and cached[0] == version:
+            return cached[1], cached[2]
+        with self.arena.state_lock:
+            version = self.arena.state_version
+            body = json.dumps(getattr(self, f"_{endpoint}")()).encode()
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        self._cache[endpoint] = (version, body, etag)
+        return body, etag
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        endpoint = request.path.split("?", 1)[0].strip("/") or "index"
+        if endpoint not in self.ENDPOINTS and endpoint != "index":
+            request.send_response(404)
+            request.send_header("Content-Type", "application/json")
+            request.end_headers()
+            request.wfile.write(json.dumps({"error": f"unknown endpoint /{endpoint}"}).encode())
+            return
+
+        body, etag = self.response(endpoint)
+        if request.headers.get("If-None-Match") == etag:
+            request.send_response(304)
+            request.send_header("ETag", etag)
+            request.end_headers()
+            return
+        request.send_response(200)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        request.send_header("ETag", etag)
+        request.send_header("Cache-Control", "no-cache")  # Always revalidate; 304s are cheap
+        request.end_headers()
+        request.wfile.write(body)
+
+    # --- Payloads (called with arena.state_lock held) ---------------------
+
+    def _index(self) -> dict:
+        return {
+            "cycle": self.arena.cycle_count,
+            "version": self.arena.state_version,
+            "endpoints": [f"/{name}" for name in self.ENDPOINTS],
+        }
+
+    def _leaderboard(self) -> list[dict]:
+        return self.arena.tracker.get_leaderboard(self.arena.marks)
+
+    def _positions(self) -> dict:
+        tracker = self.arena.tracker
+        return {
+            strategy: {
+                symbol: {
+                    "shares": shares,
+                    "entry_price": tracker.entry_prices.get(strategy, {}).get(symbol, 0.0),
+                    "mark": self.arena.marks.get(symbol),
+                }
+                for symbol, shares in positions.items() if shares
+            }
+            for strategy, positions in tracker.positions.items()
+        }
+
+    def _marks(self) -> dict:
+        return {"cycle": self.arena.cycle_count, "marks": dict(self.arena.marks)}
+
+    def _decisions(self) -> list[dict]:
+        return list(reversed(self.arena.decisions))
+
+    def _cycles(self) -> list[dict]:
+        return list(reversed(self.arena.cycle_timings))
+
+    def _memory(self) -> dict:
+        return self.arena.memory_report or {}
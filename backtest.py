@@ -0,0 +1,204 @@
+"""Replay stored historical bars through the arena strategies.
+
+    python backtest.py                         # config.STRATEGIES on history/SPY_15m.csv
+    python backtest.py --download SPY AAPL     # refresh the stored bars first
+    python backtest.py --symbols SPY AAPL --llm-replay llm_decisions.jsonl
+"""
+import argparse
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from strategies import STRATEGY_TYPES, ReplayLlamaStrategy, build_strategies, subscriptions
+from strategies.base import Action, BaseStrategy, MarketData
+from broker import OrderRequest
+from netting import execute_netted
+from sim_broker import SimulatedBroker, FillModel
+from tracker import Tracker
+from data import download_bars, load_bars, rolling_rsi, rolling_sma
+import config
+
+
+@dataclass
+class SymbolSeries:
+    """Bars for one symbol with every indicator precomputed."""
+    symbol: str
+    times: np.ndarray  # Epoch seconds
+    closes: np.ndarray
+    rsi_14: list[Optional[float]]
+    sma_10: list[Optional[float]]
+    sma_50: list[Optional[float]]
+    smas: dict[int, list[Optional[float]]]  # Other SMA periods the strategies use
+
+
+def _to_optional(values: np.ndarray) -> list[Optional[float]]:
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+
+def prepare_series(symbol: str, times: np.ndarray, closes: np.ndarray, sma_periods: set[int] = frozenset()) -> SymbolSeries:
+    """Vectorize the indicators once up front instead of per bar."""
+    return SymbolSeries(
+        symbol=symbol,
+        times=times,
+        closes=closes,
+        rsi_14=_to_optional(rolling_rsi(closes, 14)),
+        sma_10=_to_optional(rolling_sma(closes, 10)),
+        sma_50=_to_optional(rolling_sma(closes, 50)),
+        smas={p: _to_optional(rolling_sma(closes, p)) for p in sorted(set(sma_periods) - {10, 50})}
+    )
+
+
+def sma_periods(strategies: list[BaseStrategy]) -> set[int]:
+    """Every SMA period the strategies read."""
+    return {p for s in strategies for p in getattr(s, "sma_periods", ())}
+
+
+def bars_path(symbol: str) -> Path:
+    return Path(config.BACKTEST_DATA_DIR) / f"{symbol}_15m.csv"
+
+
+class Backtester:
+    """Drives strategies bar by bar with simulated fills and `Tracker` accounting."""
+
+    def __init__(
+        self,
+        subscriptions: dict[str, list[BaseStrategy]],
+        series: dict[str, SymbolSeries],
+        broker: Optional[SimulatedBroker] = None,
+        tracker: Optional[Tracker] = None
+    ):
+        self.subscriptions = subscriptions
+        self.series = series
+        self.broker = broker or SimulatedBroker(FillModel(), verbose=False)
+        self.broker.connected = True
+        self.tracker = tracker or Tracker("backtest_data.json", persist=False)
+        self._strategies_by_name = {s.name: s for subs in subscriptions.values() for s in subs}
+        self._bar_timestamp = ""
+
+    def run(self) -> dict:
+        """Replay every bar of every subscribed symbol in time order."""
+        symbols = [s for s in self.subscriptions if s in self.series]
+        if not symbols:
+            return {"bars": 0, "seconds": 0.0}
+
+        # Merge all symbols' bars into one time-ordered event stream
+        times = np.concatenate([self.series[s].times for s in symbols])
+        owners = np.concatenate([np.full(len(self.series[s].times), i) for i, s in enumerate(symbols)])
+        offsets = np.concatenate([np.arange(len(self.series[s].times)) for s in symbols])
+        order = np.argsort(times, kind="stable")
+
+        started = time.perf_counter()
+        for owner, index in zip(owners[order].tolist(), offsets[order].tolist()):
+            self._step(self.series[symbols[owner]], index)
+        elapsed = time.perf_counter() - started
+
+        final_prices = {s: float(self.series[s].closes[-1]) for s in symbols}
+        return {
+            "bars": len(times),
+            "seconds": elapsed,
+            "leaderboard": self.tracker.get_leaderboard(final_prices),
+        }
+
+    def _step(self, series: SymbolSeries, i: int):
+        price = float(series.closes[i])
+        self._bar_timestamp = datetime.fromtimestamp(series.times[i], tz=timezone.utc).isoformat()
+        market_data = MarketData(
+            symbol=series.symbol,
+            current_price=price,
+            prices_1d=[],
+            prices_5d=[],
+            news_headlines=[],
+            timestamp=self._bar_timestamp,
+            rsi_14=series.rsi_14[i],
+            sma_10=series.sma_10[i],
+            sma_50=series.sma_50[i],
+            smas={p: values[i] for p, values in series.smas.items() if values[i] is not None} or None
+        )
+        self.broker.update_price(series.symbol, price)
+
+        orders = []
+        for strategy in self.subscriptions[series.symbol]:
+            decision = strategy.decide_batch({series.symbol: market_data})[series.symbol]
+            if decision.action != Action.HOLD and decision.quantity:
+                orders.append(OrderRequest(
+                    symbol=series.symbol,
+                    action=decision.action,
+                    quantity=decision.quantity,
+                    strategy_name=strategy.name,
+                    reference_price=price
+                ))
+
+        if orders:
+            execute_netted(self.broker, orders, on_fill=self._record_fill, verbose=False)
+
+    def _record_fill(self, fill: dict):
+        action = Action(fill["action"])
+        self.tracker.record_trade(
+            strategy=fill["strategy"],
+            symbol=fill["symbol"],
+            action=action,
+            quantity=fill["quantity"],
+            price=fill["price"],
+            timestamp=self._bar_timestamp
+        )
+        strategy = self._strategies_by_name.get(fill["strategy"])
+        if strategy:
+            strategy.on_fill(fill["symbol"], action, fill["quantity"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest arena strategies on stored bars")
+    parser.add_argument("--symbols", nargs="+", default=[config.BENCHMARK_SYMBOL],
+                        help="symbols to replay (bars read from BACKTEST_DATA_DIR)")
+    parser.add_argument("--download", action="store_true",
+                        help="fetch the latest bars from Yahoo Finance before running")
+    parser.add_argument("--llm-replay", metavar="LOG",
+                        help="also run Llama on its configured symbols using recorded responses")
+    parser.add_argument("--output", help="save the resulting trades/P&L to this JSON file")
+    args = parser.parse_args()
+
+    # The configured strategies; Llama only with recorded responses to replay
+    types = dict(STRATEGY_TYPES)
+    specs = config.STRATEGIES
+    if args.llm_replay:
+        types["llama"] = lambda **kwargs: ReplayLlamaStrategy(args.llm_replay, **kwargs)
+    else:
+        specs = [s for s in specs if (s if isinstance(s, str) else s["type"]) != "llama"]
+    strategies = build_strategies(specs, types)
+
+    series = {}
+    for symbol in args.symbols:
+        path = bars_path(symbol)
+        if args.download:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            print(f"⬇️  {symbol}: {download_bars(symbol, str(path))} bars stored in {path}")
+        if not path.exists():
+            print(f"⚠️ No stored bars for {symbol} at {path} (run with --download)")
+            continue
+        series[symbol] = prepare_series(symbol, *load_bars(str(path)), sma_periods(strategies))
+
+    routes = {
+        symbol: subscribed
+        for symbol, subscribed in subscriptions(strategies).items()
+        if symbol in series
+    }
+
+    tracker = Tracker(args.output or "backtest_data.json", persist=False)
+    result = Backtester(routes, series, tracker=tracker).run()
+    if args.output:
+        tracker.save()
+
+    bars_per_sec = result["bars"] / result["seconds"] if result["seconds"] else 0
+    print(f"\n📼 Replayed {result['bars']:,} bars in {result['seconds']:.2f}s ({bars_per_sec:,.0f} bars/s)")
+    print(f"{'Rank':<6}{'Strategy':<20}{'Total P&L':>12}{'Trades':>8}")
+    print("-" * 46)
+    for i, entry in enumerate(result.get("leaderboard", []), 1):
+        print(f"{i:<6}{entry['strategy']:<20}{'$' + format(entry['total_pnl'], '+,.2f'):>12}{entry['trades']:>8}")
+
+
+if __name__ == "__main__":
+    main()
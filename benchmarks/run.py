@@ -0,0 +1,255 @@
+"""Offline benchmarks for the arena's hot paths.
+
+    python -m benchmarks.run                          # run all, compare with benchmarks/baseline.json
+    python -m benchmarks.run --filter tracker --quick
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --save-baseline          # accept the current numbers
+
+Market data, the LLM and the broker are stubbed (see benchmarks/stubs.py),
+so results only reflect the arena's own code. Every timing run is paired
+with a run of a fixed calibration loop right after it, and the baseline is
+compared on those ratios, so it holds across machines and drifting load.
+Exits non-zero when a benchmark is slower than the baseline by more than
+--tolerance. Re-record the baseline in the same change as anything that
+makes a benchmarked path slower or faster on purpose.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import tempfile
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from benchmarks.stubs import StubLLMClient, StubMarketData, filled_tracker, offline_arena, synthetic_prices
+from data import build_market_data, calculate_rsi, calculate_sma
+from strategies.base import Action
+from tracker import Tracker
+
+
+BASELINE_FILE = Path(__file__).with_name("baseline.json")
+
+WINDOWS = [14, 50, 200]
+TRADE_COUNTS = [10_000, 100_000, 1_000_000]
+UNIVERSE_SIZES = [20, 100, 500]
+QUICK_TRADE_COUNTS = TRADE_COUNTS[:2]
+QUICK_UNIVERSE_SIZES = UNIVERSE_SIZES[:2]
+
+
+def _label(n: int) -> str:
+    return f"{n // 1_000_000}M" if n >= 1_000_000 and n % 1_000_000 == 0 else f"{n // 1000}k" if n >= 1000 else str(n)
+
+
+def _calibration_work():
+    """Fixed mix of interpreter work (arithmetic, allocation, sorting) to time the machine with."""
+    total = 0
+    for i in range(20_000):
+        total += i * i % 7
+    return sorted(str(i) for i in range(2_000)), total
+
+
+CALIBRATION_CALLS = 20  # ~40ms of calibration per timing run
+
+
+def measure(func: Callable[[], object], repeat: int = 5, number: Optional[int] = None) -> dict:
+    """Seconds per call: the best and median of `repeat` timing runs of `number` calls each.
+
+    "relative" is the best run divided by the best calibration run, with a
+    calibration run timed right after each run: both minimums come from
+    the same stretch of time, so they are the least disturbed by other load.
+    """
+    calibration = timeit.Timer(_calibration_work)
+    with contextlib.redirect_stdout(io.StringIO()):
+        timer = timeit.Timer(func)
+        if number is None:
+            number, _ = timer.autorange()
+        runs, calibrations = [], []
+        for _ in range(repeat):
+            runs.append(timer.timeit(number) / number)
+            calibrations.append(calibration.timeit(CALIBRATION_CALLS) / CALIBRATION_CALLS)
+    return {
+        "median": statistics.median(runs),
+        "min": min(runs),
+        "relative": min(runs) / min(calibrations),
+        "calls": number,
+        "repeat": repeat,
+    }
+
+
+# --- Cases ---------------------------------------------------------------
+
+def bench_indicators() -> dict:
+    prices = synthetic_prices(500)
+    results = {}
+    for window in WINDOWS:
+        results[f"indicators.rsi[{window}]"] = measure(lambda: calculate_rsi(prices, window))
+        results[f"indicators.sma[{window}]"] = measure(lambda: calculate_sma(prices, window))
+    return results
+
+
+def bench_llm() -> dict:
+    from strategies.llm import LlamaStrategy
+    llama = LlamaStrategy()
+    llama.client = StubLLMClient()
+    llama.positions["S000"] = 50
+    market_data = build_market_data(StubMarketData()("S000"))
+    response = StubLLMClient().create().choices[0].message.content
+    return {
+        "llm.build_prompt": measure(lambda: llama._build_prompt(market_data)),
+        "llm.parse_response": measure(lambda: llama._parse_response(response, market_data)),
+    }
+
+
+def bench_tracker(trade_counts: list[int]) -> dict:
+    results = {}
+    prices = {f"S{i:03d}": 100.0 for i in range(20)}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in trade_counts:
+            label = _label(n)
+            tracker = filled_tracker(n)
+            heavy = n >= 1_000_000
+
+            results[f"tracker.get_leaderboard[{label}]"] = measure(
+                lambda: tracker.get_leaderboard(prices), repeat=3 if heavy else 5
+            )
+            tracker.data_file = Path(tmp) / f"arena_{label}.json"
+            results[f"tracker.save[{label}]"] = measure(tracker.save, repeat=3, number=1)
+            results[f"tracker.load[{label}]"] = measure(lambda: Tracker(str(tracker.data_file)), repeat=3, number=1)
+
+            # Last, and a fixed number of calls: every call grows the trade list
+            strategies = list(tracker.positions)
+            calls = iter(range(10**9))
+
+            def record():
+                i = next(calls)
+                action = Action.BUY if i % 2 == 0 else Action.SELL
+                tracker.record_trade(strategies[i % len(strategies)], "S000", action, 1, 100.0)
+
+            results[f"tracker.record_trade[{label}]"] = measure(record, number=200)
+    return results
+
+
+def bench_cycle(universe_sizes: list[int]) -> dict:
+    results = {}
+    cwd = os.getcwd()
+    for size in universe_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    arena = offline_arena(size)
+                    arena.run_cycle()  # Warm up indicators and contracts
+                results[f"cycle.run_cycle[{size}]"] = measure(arena.run_cycle, repeat=3, number=1)
+            finally:
+                os.chdir(cwd)
+    return results
+
+
+# --- Reporting -----------------------------------------------------------
+
+def _change(result: dict, base: Optional[dict]) -> Optional[float]:
+    """Slowdown vs the baseline, on calibration-relative times (0.1 = 10% slower)."""
+    if not base or not base.get("relative"):
+        return None
+    return result["relative"] / base["relative"] - 1
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Names of benchmarks whose calibrated time regressed by more than `tolerance`."""
+    return [name for name, result in results.items() if (_change(result, baseline.get(name)) or 0) > tolerance]
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.2f}us"
+
+
+def print_report(results: dict, baseline: dict, regressions: list[str]):
+    print(f"\n{'Benchmark':<36}{'Median':>12}{'Baseline':>12}{'Change':>10}")
+    print("(change compares times relative to the calibration loop, so it holds across machines)")
+    print("-" * 70)
+    for name, result in results.items():
+        base = baseline.get(name)
+        base_str = _format_seconds(base["median"]) if base else "-"
+        change = _change(result, base)
+        change = f"{change:+.0%}" if change is not None else "-"
+        flag = "  ⚠️" if name in regressions else ""
+        print(f"{name:<36}{_format_seconds(result['median']):>12}{base_str:>12}{change:>10}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline arena benchmarks")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="skip the 1M-trade and 500-symbol sizes")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with these results")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown vs baseline (0.3 = 30%%)")
+    args = parser.parse_args()
+
+    trade_counts = QUICK_TRADE_COUNTS if args.quick else TRADE_COUNTS
+    universe_sizes = QUICK_UNIVERSE_SIZES if args.quick else UNIVERSE_SIZES
+    groups = {
+        "indicators": bench_indicators,
+        "llm": bench_llm,
+        "tracker": lambda: bench_tracker(trade_counts),
+        "cycle": lambda: bench_cycle(universe_sizes),
+    }
+
+    results = {}
+    for group, run in groups.items():
+        if args.filter and not any(args.filter in name for name in _names(group, trade_counts, universe_sizes)):
+            continue
+        print(f"⏱️ {group}...")
+        results.update(run())
+    if args.filter:
+        results = {name: r for name, r in results.items() if args.filter in name}
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text())["results"] if baseline_path.exists() else {}
+    regressions = compare(results, baseline, args.tolerance)
+    print_report(results, baseline, regressions)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        merged = {**baseline, **results}
+        baseline_path.write_text(json.dumps({**report, "results": merged}, indent=2))
+        print(f"\n💾 Baseline saved to {baseline_path}")
+    elif regressions:
+        print(f"\n⚠️ {len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}")
+        raise SystemExit(1)
+
+
+def _names(group: str, trade_counts: list[int], universe_sizes: list[int]) -> list[str]:
+    """Benchmark names a group produces, so --filter can skip whole groups."""
+    if group == "indicators":
+        return [f"indicators.{kind}[{w}]" for w in WINDOWS for kind in ("rsi", "sma")]
+    if group == "llm":
+        return ["llm.build_prompt", "llm.parse_response"]
+    if group == "tracker":
+        return [f"tracker.{op}[{_label(n)}]" for n in trade_counts
+                for op in ("record_trade", "get_leaderboard", "save", "load")]
+    return [f"cycle.run_cycle[{size}]" for size in universe_sizes]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Offline stand-ins for the market data, LLM and broker layers."""
+import random
+import time
+import zlib
+from itertools import cycle
+from typing import Optional
+
+from data import RawMarketData
+from strategies.base import Action
+from tracker import Tracker
+import config
+
+
+BAR_SECONDS = 15 * 60
+START_TIME = 1_700_000_000.0
+
+
+def synthetic_prices(n: int, seed: int = 0, start: float = 100.0) -> list[float]:
+    """Deterministic random walk."""
+    rng = random.Random(seed)
+    prices, price = [], start
+    for _ in range(n):
+        price = max(1.0, price * (1 + rng.gauss(0, 0.002)))
+        prices.append(price)
+    return prices
+
+
+def universe(size: int) -> list[str]:
+    """Synthetic ticker symbols S000, S001, ..."""
+    return [f"S{i:03d}" for i in range(size)]
+
+
+class StubMarketData:
+    """Replaces `fetch_market_data`: each call advances the symbol by one bar."""
+
+    def __init__(self, bars: int = 130, seed: int = 0):
+        self.bars = bars
+        self.seed = seed
+        self._series: dict[str, list[float]] = {}
+        self._calls: dict[str, int] = {}
+
+    def __call__(self, symbol: str, since: Optional[float] = None) -> RawMarketData:
+        series = self._series.get(symbol)
+        if series is None:
+            series = self._series[symbol] = synthetic_prices(self.bars * 4, self.seed + zlib.crc32(symbol.encode()))
+        end = min(self.bars + self._calls.get(symbol, 0), len(series))
+        self._calls[symbol] = self._calls.get(symbol, 0) + 1
+        prices = series[end - self.bars:end]
+        times = [START_TIME + BAR_SECONDS * i for i in range(end - self.bars, end)]
+        return RawMarketData(
+            symbol=symbol,
+            current_price=prices[-1],
+            prices_1d=prices[-26:],
+            prices_5d=prices,
+            bar_times_5d=times,
+            news_headlines=[f"{symbol} headline {i}" for i in range(3)],
+            timestamp="2024-01-02T10:00:00"
+        )
+
+
+LLM_RESPONSES = [
+    '{"action": "BUY", "confidence": 0.7, "reasoning": "Momentum is positive and RSI is neutral."}',
+    '{"action": "HOLD", "confidence": 0.5, "reasoning": "No clear signal; waiting for confirmation."}',
+    'Sure! {"action": "SELL", "confidence": 0.6, "reasoning": "Trend has turned bearish."}',
+    '{"action": "HOLD", "confidence": 0.4, "reasoning": "Mixed news flow."}',
+]
+
+
+class StubLLMClient:
+    """Drop-in for `OpenAI` with `chat.completions.create` cycling canned responses."""
+
+    def __init__(self, responses: list[str] = LLM_RESPONSES, latency_seconds: float = 0.0):
+        self._responses = cycle(responses)
+        self.latency_seconds = latency_seconds
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        message = type("Message", (), {"content": next(self._responses)})
+        choice = type("Choice", (), {"message": message})
+        return type("Completion", (), {"choices": [choice], "usage": None})
+
+
+def filled_tracker(n_trades: int, n_strategies: int = 4, n_symbols: int = 20, seed: int = 0) -> Tracker:
+    """In-memory tracker holding `n_trades` realistic round-trip trades."""
+    rng = random.Random(seed)
+    tracker = Tracker("bench_tracker.json", persist=False)
+    strategies = [f"Strategy-{i}" for i in range(n_strategies)]
+    symbols = universe(n_symbols)
+    for i in range(n_trades):
+        strategy = strategies[i % n_strategies]
+        symbol = symbols[rng.randrange(n_symbols)]
+        held = tracker.positions.get(strategy, {}).get(symbol, 0)
+        action = Action.SELL if held > 0 and rng.random() < 0.5 else Action.BUY
+        quantity = held if action == Action.SELL else rng.randint(1, 100)
+        tracker.record_trade(strategy, symbol, action, quantity, 100 + rng.uniform(-5, 5),
+                             timestamp="2024-01-02T10:00:00")
+    return tracker
+
+
+def offline_arena(universe_size: int, llm_latency_seconds: float = 0.0):
+    """A `TradingArena` on stubbed data, LLM and simulated broker, trading `universe_size` symbols.
+
+    Run from a scratch directory: the arena writes its usual data files.
+    """
+    symbols = universe(universe_size)
+    config.BROKER_MODE = "sim"
+    config.LLM_DECISION_LOG = ""
+    config.STRATEGIES = [
+        {"type": "llama", "symbols": symbols},
+        {"type": "buy_hold", "symbols": symbols[:1]},
+        {"type": "mean_reversion", "symbols": symbols},
+        {"type": "trend_following", "symbols": symbols},
+    ]
+
+    import data
+    import engine
+    import main
+    fetch = StubMarketData()
+    data.fetch_market_data = engine.fetch_market_data = fetch
+    main.get_market_data = lambda symbol: data.build_market_data(fetch(symbol))
+
+    arena = main.TradingArena()
+    for strategy in arena.strategies:
+        if hasattr(strategy, "client"):
+            strategy.client = StubLLMClient(latency_seconds=llm_latency_seconds)
+    arena.broker.connect()
+    return arena
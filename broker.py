@@ -1,17 +1,43 @@
-from ib_insync import IB, Stock, MarketOrder
-from typing import Optional
+import asyncio
 import time
+from dataclasses import dataclass, field
+from ib_insync import IB, Contract, Stock, MarketOrder
+from typing import Callable, Optional
 
 from strategies.base import Action
+from memory import BoundedDict
+from metrics import ExecutionMetrics, FILLED, PARTIAL, TIMEOUT, CANCELLED, REJECTED
+from tracing import traced
 import config
 
 
+@dataclass
+class OrderRequest:
+    """A single order a strategy wants executed this cycle."""
+    symbol: str
+    action: Action
+    quantity: int
+    strategy_name: str
+    reference_price: float = 0.0  # Price the strategy saw when it decided
+    decided_at: float = field(default_factory=time.time)
+    # Netted orders only: broker-filled shares -> [(strategy order, shares allocated to it)]
+    allocate: Optional[Callable[[int], list[tuple["OrderRequest", int]]]] = None
+
+
+FillCallback = Callable[[dict], None]
+
+
 class Broker:
     """IBKR paper trading broker connection for equities."""
     
-    def __init__(self):
+    def __init__(self, metrics: Optional[ExecutionMetrics] = None):
         self.ib = IB()
+        self.metrics = metrics
         self.connected = False
+        self.contracts: dict[str, Contract] = BoundedDict(config.CONTRACT_CACHE_SIZE)  # symbol -> qualified contract
+        self._symbols_by_con_id: dict[int, str] = BoundedDict(config.CONTRACT_CACHE_SIZE)  # conId -> symbol, for position events
+        self.positions: dict[str, int] = {}  # symbol -> shares, maintained from positionEvent
+        self.account_values: dict[tuple[str, str], float] = {}  # (tag, currency) -> value
     
     def connect(self) -> bool:
         """Connect to TWS/IB Gateway."""
@@ -23,6 +49,8 @@ class Broker:
             )
             self.connected = True
             print(f"✅ Connected to IBKR on port {config.IBKR_PORT}")
+            self.qualify_contracts(config.LLM_UNIVERSE + [config.BENCHMARK_SYMBOL])
+            self._subscribe_state()
             return True
         except Exception as e:
             print(f"❌ Failed to connect to IBKR: {e}")
@@ -32,10 +60,68 @@ class Broker:
     def disconnect(self):
         """Disconnect from IBKR."""
         if self.connected:
+            self.ib.positionEvent -= self._on_position
+            self.ib.accountValueEvent -= self._on_account_value
             self.ib.disconnect()
             self.connected = False
             print("Disconnected from IBKR")
     
+    def qualify_contracts(self, symbols: list[str]) -> int:
+        """Qualify contracts for all symbols in one batch and cache them. Returns count cached."""
+        if not self.connected:
+            return 0
+        return self.ib.run(self.qualify_contracts_async(symbols))
+    
+    async def qualify_contracts_async(self, symbols: list[str]) -> int:
+        """Async variant of `qualify_contracts` for use inside a running event loop."""
+        if not self.connected:
+            return 0
+        
+        pending = [s for s in dict.fromkeys(symbols) if s not in self.contracts]
+        if not pending:
+            return len(self.contracts)
+        
+        contracts = [Stock(s, "SMART", "USD") for s in pending]
+        try:
+            await self.ib.qualifyContractsAsync(*contracts)
+        except Exception as e:
+            print(f"⚠️ Failed to pre-qualify contracts: {e}")
+            return 0
+        
+        # Symbols that failed here are retried lazily on their first order
+        for symbol, contract in zip(pending, contracts):
+            if contract.conId:
+                self._cache_contract(symbol, contract)
+        
+        print(f"📇 Qualified {len(self.contracts)} contracts")
+        return len(self.contracts)
+    
+    async def _get_contract(self, symbol: str) -> Optional[Contract]:
+        """Return the cached qualified contract, qualifying it on a cache miss."""
+        contract = self.contracts.get(symbol)
+        if contract:
+            return contract
+        
+        # Create stock contract (US stocks on SMART routing)
+        contract = Stock(symbol, "SMART", "USD")
+        try:
+            await self.ib.qualifyContractsAsync(contract)
+        except Exception as e:
+            print(f"    Failed to qualify contract for {symbol}: {e}")
+            return None
+        
+        if not contract.conId:
+            print(f"    Failed to qualify contract for {symbol}")
+            return None
+        
+        self._cache_contract(symbol, contract)
+        return contract
+    
+    def _cache_contract(self, symbol: str, contract: Contract):
+        self.contracts[symbol] = contract
+        self._symbols_by_con_id[contract.conId] = symbol
+    
+    @traced("Broker.execute_trade")
     def execute_trade(
         self,
         symbol: str,
@@ -48,87 +134,205 @@ class Broker:
         if action == Action.HOLD:
             return None
         
+        fills = self.execute_trades([OrderRequest(symbol, action, quantity, strategy_name)])
+        return fills[0]
+    
+    def execute_trades(
+        self,
+        orders: list[OrderRequest],
+        on_fill: Optional[FillCallback] = None,
+        timeout: float = config.ORDER_TIMEOUT_SECONDS
+    ) -> list[Optional[dict]]:
+        """Submit a batch of orders and block until each is filled, cancelled or timed out."""
         if not self.connected:
-            print(f"    [DRY RUN] Would {action.value} {quantity} {symbol}")
-            # Return simulated fill for dry run mode
-            return {
-                "symbol": symbol,
-                "action": action.value,
-                "quantity": quantity,
-                "price": 0.0,  # Will be filled by tracker
-                "strategy": strategy_name
-            }
+            return [self._dry_run_fill(order, on_fill) for order in orders]
         
-        # Create stock contract (US stocks on SMART routing)
-        contract = Stock(symbol, "SMART", "USD")
+        return self.ib.run(self.execute_trades_async(orders, on_fill, timeout))
+    
+    async def execute_trades_async(
+        self,
+        orders: list[OrderRequest],
+        on_fill: Optional[FillCallback] = None,
+        timeout: float = config.ORDER_TIMEOUT_SECONDS
+    ) -> list[Optional[dict]]:
+        """Submit all orders at once and deliver each fill to `on_fill` as it arrives.
         
-        # Qualify the contract to get full details
-        try:
-            self.ib.qualifyContracts(contract)
-        except Exception as e:
-            print(f"    Failed to qualify contract for {symbol}: {e}")
+        Returns one entry per order (the fill, or None if it was not filled),
+        in the same order as `orders`. The batch completes in roughly the time
+        of the slowest fill rather than the sum of all of them.
+        """
+        if not self.connected:
+            return [self._dry_run_fill(order, on_fill) for order in orders]
+        
+        return list(await asyncio.gather(
+            *(self._place_and_wait(order, on_fill, timeout) for order in orders)
+        ))
+    
+    def _dry_run_fill(self, order: OrderRequest, on_fill: Optional[FillCallback]) -> Optional[dict]:
+        """Simulated fill used when there is no broker connection."""
+        if order.action == Action.HOLD or order.quantity <= 0:
+            return None
+        
+        print(f"    [DRY RUN] Would {order.action.value} {order.quantity} {order.symbol}")
+        fill = {
+            "symbol": order.symbol,
+            "action": order.action.value,
+            "quantity": order.quantity,
+            "price": order.reference_price,  # Price the strategy decided on
+            "strategy": order.strategy_name
+        }
+        now = time.time()
+        self._record(order, FILLED, order.quantity, order.reference_price, now, now, now)
+        if on_fill:
+            on_fill(fill)
+        return fill
+    
+    @traced("Broker.place_and_wait")
+    async def _place_and_wait(
+        self,
+        request: OrderRequest,
+        on_fill: Optional[FillCallback],
+        timeout: float
+    ) -> Optional[dict]:
+        """Place one market order and wait for its terminal status event."""
+        if request.action == Action.HOLD or request.quantity <= 0:
+            return None
+        
+        symbol = request.symbol
+        strategy_name = request.strategy_name
+        
+        contract = await self._get_contract(symbol)
+        if contract is None:
+            self._record(request, REJECTED)
             return None
         
         # Determine order direction
-        order_action = "BUY" if action == Action.BUY else "SELL"
+        order_action = "BUY" if request.action == Action.BUY else "SELL"
         
         # Create market order with strategy tag
         order = MarketOrder(
             action=order_action,
-            totalQuantity=quantity,
+            totalQuantity=request.quantity,
             orderRef=f"LLM-ARENA-{strategy_name}"
         )
         
+        submitted_at = time.time()
         try:
-            # Place order
             trade = self.ib.placeOrder(contract, order)
-            
-            # Wait for fill (with timeout)
-            timeout = 30
-            start = time.time()
-            while not trade.isDone() and time.time() - start < timeout:
-                self.ib.sleep(0.5)
-            
-            if trade.orderStatus.status == "Filled":
-                fill_price = trade.orderStatus.avgFillPrice
-                print(f"    ✅ [{strategy_name}] {order_action} {quantity} {symbol} @ ${fill_price:.2f}")
-                return {
-                    "symbol": symbol,
-                    "action": order_action,
-                    "quantity": quantity,
-                    "price": fill_price,
-                    "strategy": strategy_name,
-                    "order_id": trade.order.orderId
-                }
-            else:
-                print(f"    ⚠️ Order not filled: {trade.orderStatus.status}")
-                return None
-                
         except Exception as e:
             print(f"    ❌ Trade execution error: {e}")
+            self._record(request, REJECTED, submitted_at=submitted_at)
             return None
-    
-    def get_position(self, symbol: str) -> int:
-        """Get current position for a symbol."""
-        if not self.connected:
-            return 0
         
-        positions = self.ib.positions()
+        # Resolve on the order's terminal status instead of polling it
+        done = asyncio.get_event_loop().create_future()
+        acked_at = None
+        filled_at = None
+        timed_out = False
+        
+        def on_status(trade):
+            nonlocal acked_at, filled_at
+            now = time.time()
+            if acked_at is None and trade.orderStatus.status in ("PreSubmitted", "Submitted", "Filled"):
+                acked_at = now
+            if trade.orderStatus.status == "Filled":
+                filled_at = now
+            if trade.isDone() and not done.done():
+                done.set_result(None)
+        
+        def on_execution(trade, fill):
+            if trade.remaining() > 0:
+                print(f"    … [{strategy_name}] partial fill {fill.execution.shares:.0f} {symbol} "
+                      f"@ ${fill.execution.price:.2f}")
+        
+        trade.statusEvent += on_status
+        trade.fillEvent += on_execution
+        try:
+            if not trade.isDone():
+                await asyncio.wait_for(done, timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            print(f"    ⏱️ [{strategy_name}] {order_action} {request.quantity} {symbol} "
+                  f"not filled after {timeout:.0f}s - cancelling")
+            self.ib.cancelOrder(trade.order)
+        finally:
+            trade.statusEvent -= on_status
+            trade.fillEvent -= on_execution
+        
+        # Rejected orders may mean a stale contract; re-qualify on next use
+        if trade.orderStatus.status == "Inactive":
+            self.contracts.pop(symbol, None)
+        
+        # A cancelled order may still have been partially filled
+        filled = int(trade.orderStatus.filled)
+        fill_price = trade.orderStatus.avgFillPrice
+        if trade.orderStatus.status == "Filled":
+            status = FILLED
+        elif filled > 0:
+            status = PARTIAL
+        elif timed_out:
+            status = TIMEOUT
+        elif trade.orderStatus.status == "Inactive":
+            status = REJECTED
+        else:
+            status = CANCELLED
+        self._record(request, status, filled, fill_price, submitted_at, acked_at, filled_at or (time.time() if filled else None))
         
-        for pos in positions:
-            if pos.contract.symbol == symbol:
-                return int(pos.position)
+        if filled <= 0:
+            print(f"    ⚠️ Order not filled: {trade.orderStatus.status}")
+            return None
         
-        return 0
+        print(f"    ✅ [{strategy_name}] {order_action} {filled} {symbol} @ ${fill_price:.2f}")
+        fill = {
+            "symbol": symbol,
+            "action": order_action,
+            "quantity": filled,
+            "price": fill_price,
+            "strategy": strategy_name,
+            "order_id": trade.order.orderId
+        }
+        if on_fill:
+            on_fill(fill)
+        return fill
+    
+    def _record(self, request: OrderRequest, status: str, filled: int = 0, fill_price: float = 0.0,
+                submitted_at: Optional[float] = None, acked_at: Optional[float] = None,
+                filled_at: Optional[float] = None):
+        """Record execution timings for an order, if metrics are enabled."""
+        if self.metrics:
+            self.metrics.record(request, status, filled, fill_price, submitted_at, acked_at, filled_at)
+    
+    def _subscribe_state(self):
+        """Seed the position/account cache and keep it current from IB events."""
+        for pos in self.ib.positions():
+            self._on_position(pos)
+        for av in self.ib.accountValues():
+            self._on_account_value(av)
+        
+        self.ib.positionEvent += self._on_position
+        self.ib.accountValueEvent += self._on_account_value
+    
+    def _symbol_for(self, contract: Contract) -> str:
+        """Map an IB contract back to the symbol we trade it under (e.g. "BRK B" -> "BRK-B")."""
+        return self._symbols_by_con_id.get(contract.conId, contract.symbol)
+    
+    def _on_position(self, pos):
+        symbol = self._symbol_for(pos.contract)
+        if pos.position:
+            self.positions[symbol] = int(pos.position)
+        else:
+            self.positions.pop(symbol, None)
+    
+    def _on_account_value(self, av):
+        try:
+            self.account_values[(av.tag, av.currency)] = float(av.value)
+        except ValueError:
+            pass  # Non-numeric tags (account type etc.)
+    
+    def get_position(self, symbol: str) -> int:
+        """Get current position for a symbol."""
+        return self.positions.get(symbol, 0)
     
     def get_account_value(self) -> float:
         """Get total account value."""
-        if not self.connected:
-            return 0.0
-        
-        account_values = self.ib.accountValues()
-        for av in account_values:
-            if av.tag == "NetLiquidation" and av.currency == "USD":
-                return float(av.value)
-        
-        return 0.0
+        return self.account_values.get(("NetLiquidation", "USD"), 0.0)
@@ -0,0 +1,79 @@
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Optional
+
+from reconcile import reconcile
+import config
+
+
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(arena, path: str = config.CHECKPOINT_FILE, caches: Optional[dict] = None):
+    """Pickle the arena's in-memory state, replacing the previous checkpoint atomically.
+
+    `caches` is an `arena.snapshot_caches()` taken on the event loop; pass
+    it when saving from another thread while the loop is running.
+    """
+    caches = caches or arena.snapshot_caches()
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "saved_at": time.time(),
+        "cycle_count": arena.cycle_count,
+        "strategies": {s.name: s.get_state() for s in arena.strategies},
+        "engine": caches["engine"],
+        "contracts": caches["contracts"],
+        "marks": dict(arena.marks),
+    }
+    tmp = Path(f"{path}.tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)  # Never leaves a half-written checkpoint behind
+
+
+def load_checkpoint(path: str = config.CHECKPOINT_FILE) -> Optional[dict]:
+    """The saved state, or None if there is no usable checkpoint."""
+    try:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable checkpoint {path}: {e}")
+        return None
+    if state.get("version") != CHECKPOINT_VERSION:
+        print(f"⚠️ Ignoring checkpoint {path} from another version")
+        return None
+    return state
+
+
+def restore_checkpoint(arena, path: str = config.CHECKPOINT_FILE) -> bool:
+    """Resume from the last checkpoint, then reconcile positions against the tracker.
+
+    Strategy state (e.g. what Buy & Hold already bought, Trend Following's
+    last crossover), indicator windows, cached contracts and the latest
+    marks come back without refetching. The tracker stays authoritative for
+    positions, so fills recorded after the checkpoint are not lost.
+    """
+    state = load_checkpoint(path)
+    if state is None:
+        return False
+
+    for strategy in arena.strategies:
+        if strategy.name in state["strategies"]:
+            strategy.set_state(state["strategies"][strategy.name])
+    arena.engine.restore(state["engine"])
+    if hasattr(arena.broker, "_cache_contract"):
+        for symbol, contract in state["contracts"].items():
+            arena.broker._cache_contract(symbol, contract)
+    arena.marks.update(state["marks"])
+    arena.cycle_count = state["cycle_count"]
+
+    age_minutes = (time.time() - state["saved_at"]) / 60
+    print(f"♻️ Restored checkpoint from {age_minutes:.0f} min ago "
+          f"({len(state['strategies'])} strategies, {len(state['contracts'])} contracts)")
+
+    reconcile(arena.broker, arena.tracker, arena.strategies)
+    return True
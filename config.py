@@ -3,6 +3,11 @@
 # Droplet LLM API
 LLM_BASE_URL = "http://129.212.181.103:8000/v1"
 LLM_MODEL = "meta-llama/Llama-3.1-70B-Instruct"
+LLM_PROMPT_TOKEN_BUDGET = 200  # Per-symbol user message; rounded and trimmed to fit
+
+# Broker: "ibkr" for TWS/IB Gateway, "sim" for the local simulated broker.
+# The arena falls back to the simulator when IBKR is unreachable.
+BROKER_MODE = "ibkr"
 
 # IBKR Settings
 IBKR_HOST = "127.0.0.1"
@@ -22,9 +27,122 @@ LLM_UNIVERSE = [
 
 DECISION_INTERVAL_MINUTES = 15
 POSITION_SIZE_USD = 10000  # Dollar amount per trade
+ORDER_TIMEOUT_SECONDS = 30  # Cancel market orders not filled within this window
+RECONCILE_EVERY_CYCLES = 4  # Check broker/tracker/strategy positions for drift
+EXECUTION_METRICS_FILE = "execution_metrics.json"  # Per-order latency/slippage export
+
+# Simulated broker fill model
+SIM_STARTING_CASH = 1_000_000
+SIM_LATENCY_MS = 50
+SIM_SPREAD_BPS = 2.0  # Full bid/ask spread
+SIM_SLIPPAGE_BPS = 1.0  # Max extra adverse slippage per fill
+SIM_PARTIAL_FILL_PROB = 0.0
+SIM_REJECT_PROB = 0.0
+
+# Cycle pipeline
+PIPELINE_QUEUE_SIZE = 8  # Max items buffered between stages (backpressure)
+FETCH_CONCURRENCY = 8  # Parallel market data fetches
+CYCLE_OVERRUN_POLICY = "coalesce"  # "skip" or "coalesce" when a cycle outlasts the interval
+# Longest SMA a strategy may use: live data only has the ~130 15-min bars of
+# prices_5d (and the streaming window), so longer periods could never trade
+MAX_SMA_PERIOD = 120
+INDICATOR_LOOKBACK_BARS = 130  # Bars kept per symbol for RSI/SMA; covers MAX_SMA_PERIOD
+# Once a symbol's window is full (including one restored from a checkpoint),
+# fetch only the 15-min bars since its newest one, unless that is older than this
+INCREMENTAL_FETCH_MAX_AGE_DAYS = 4
+
+# Sharded mode: split the symbols across this many worker processes that
+# fetch and decide in parallel, while this process alone places orders and
+# records fills. 0 runs everything in one process.
+SHARD_WORKERS = 0
+SHARD_REPLY_TIMEOUT_SECONDS = 300  # A shard slower than this is restarted
+
+# Cycle tracing: the fraction of cycles whose nested spans (wall + CPU time)
+# are appended to TRACE_FILE as JSON lines. 0 turns span recording off;
+# cycles that outlast DECISION_INTERVAL_MINUTES are reported either way.
+TRACE_SAMPLE_RATE = 1.0
+TRACE_FILE = "cycle_traces.jsonl"
+
+# Warm restarts: strategy state, indicator windows and broker contracts are
+# pickled here every CHECKPOINT_EVERY_CYCLES cycles and restored on start.
+# Leave empty to disable.
+CHECKPOINT_FILE = "arena_checkpoint.pkl"
+CHECKPOINT_EVERY_CYCLES = 1
+
+# Per-cycle decision log for replay (python replay.py): the MarketData every
+# strategy saw, each decision (HOLDs included), LLM prompt hashes and raw
+# responses, and stage timings, one compressed frame per cycle. Single-process
+# engine only. Leave empty to disable.
+DECISION_LOG_FILE = "decision_log.bin"
+
+# Append every raw LLM response here (JSON lines) so backtests can replay them.
+# Leave empty to disable.
+LLM_DECISION_LOG = "llm_decisions.jsonl"
+
+# Streaming bars: "ib" subscribes to 5-second real-time bars over the broker
+# connection and runs bar-driven strategies (Mean Reversion, Trend Following)
+# the moment each DECISION_INTERVAL_MINUTES bar closes; the LLM stays on the
+# cycle schedule. Regular trading hours only. "fake" streams a local random
+# walk for testing, only with the simulated broker; its trades stay off the
+# arena's books. "" = off.
+# Not available with SHARD_WORKERS.
+STREAMING_BARS = ""
+
+# Backtesting: stored bar CSVs live here as <SYMBOL>_15m.csv
+BACKTEST_DATA_DIR = "history"
 
 # Strategy Settings
-STRATEGIES = ["llama", "buy_hold", "mean_reversion", "trend_following"]
+# Each entry is a registry type, or a dict with "type" plus an optional unique
+# "name", "symbols" to subscribe to, and constructor parameters. Without
+# "symbols", Llama trades the top of LLM_UNIVERSE and the baselines trade SPY.
+STRATEGIES = [
+    "llama",
+    "buy_hold",
+    "mean_reversion",
+    "trend_following",
+    # {"type": "mean_reversion", "name": "Mean Reversion 25/75", "oversold": 25, "overbought": 75},
+    # {"type": "trend_following", "name": "Trend 20/100 QQQ", "fast_period": 20, "slow_period": 100, "symbols": ["QQQ"]},
+]
+
+# Dashboard (ui.py): refetch prices for held symbols at most this often,
+# however many browser tabs are open
+UI_PRICE_REFRESH_SECONDS = 60
+
+# Live dashboard updates: the arena appends trades and marks to this journal
+# (JSON lines) and ui.py follows it, pushing changed panels to open tabs.
+# Leave empty to fall back to polling arena_data.json.
+EVENTS_JOURNAL = "arena_events.jsonl"
+EVENTS_JOURNAL_MAX_BYTES = 50_000_000  # Rotated to <journal>.1 past this size
+UI_JOURNAL_POLL_SECONDS = 0.25
+
+# SQLite index over the full trade history, written by the arena and browsed
+# (filtered, paginated) by the dashboard. Leave empty to disable.
+TRADE_INDEX_DB = "arena_trades.db"
+UI_HISTORY_PAGE_SIZE = 50
+
+# Read-only JSON API served from the running arena's memory (leaderboard,
+# positions, marks, recent decisions, cycle timings), with ETags for cheap
+# polling. Local only by default; set API_PORT = 0 to disable.
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+API_RECENT_DECISIONS = 200
+API_CYCLE_HISTORY = 100
+
+# Bounded memory for long runs: keep only the newest TRACKER_HOT_TRADES trades
+# in RAM and arena_data.json (older ones stay in the TRADE_INDEX_DB store,
+# which this requires). 0 keeps the whole history in memory.
+TRACKER_HOT_TRADES = 0
+CONTRACT_CACHE_SIZE = 5_000  # Qualified IB contracts kept, least recently used dropped
+INDICATOR_MAX_SYMBOLS = 5_000  # Symbols with rolling indicator windows
+STRATEGY_TRADE_HISTORY = 1_000  # Per-strategy trade records kept in memory
+
+# Memory report every N cycles (0 = off; tracemalloc slows allocation while on):
+# RSS, top allocators and growth since the last report, and per-subsystem
+# object counts, appended to MEMORY_REPORT_FILE and served at /memory.
+MEMORY_REPORT_EVERY_CYCLES = 0
+MEMORY_REPORT_FILE = "memory_report.jsonl"
+MEMORY_REPORT_TOP = 10
+MEMORY_ALERT_MB = 2_000  # Warn when RSS goes above this
 
 # News API (free tier)
 # Get a free key at https://newsapi.org/
@@ -35,3 +153,8 @@ MARKET_OPEN_HOUR = 9
 MARKET_OPEN_MINUTE = 30
 MARKET_CLOSE_HOUR = 16
 MARKET_CLOSE_MINUTE = 0
+
+# Cycle scheduling
+MARKET_HOURS_ONLY = True  # Sleep through nights, weekends and NYSE holidays
+SETTLE_DELAY_SECONDS = 20  # Wait after a bar closes so data providers publish it
+PREOPEN_WARMUP_MINUTES = 10  # Qualify contracts and prefetch data before the open
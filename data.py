@@ -1,12 +1,19 @@
+import csv
 import yfinance as yf
 import requests
-from datetime import datetime, timedelta
-from typing import Optional
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
 import numpy as np
 
 from strategies.base import MarketData
+from tracing import traced
 import config
 
+if TYPE_CHECKING:
+    from indicators import IndicatorEngine
+
 
 def calculate_rsi(prices: list[float], period: int = 14) -> Optional[float]:
     """Calculate RSI indicator."""
@@ -35,8 +42,54 @@ def calculate_sma(prices: list[float], period: int) -> Optional[float]:
     return float(np.mean(prices[-period:]))
 
 
-def get_market_data(symbol: str) -> MarketData:
-    """Fetch current market data for a stock symbol."""
+def rolling_rsi(prices: np.ndarray, period: int = 14) -> np.ndarray:
+    """RSI at every bar, matching `calculate_rsi` on the prices up to that bar (NaN before)."""
+    prices = np.asarray(prices, dtype=float)
+    result = np.full(len(prices), np.nan)
+    if len(prices) < period + 1:
+        return result
+    
+    deltas = np.diff(prices)
+    windows = np.lib.stride_tricks.sliding_window_view(deltas, period)
+    avg_gain = np.where(windows > 0, windows, 0).mean(axis=1)
+    avg_loss = np.where(windows < 0, -windows, 0).mean(axis=1)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    result[period:] = rsi
+    return result
+
+
+def rolling_sma(prices: np.ndarray, period: int) -> np.ndarray:
+    """SMA at every bar, matching `calculate_sma` on the prices up to that bar (NaN before)."""
+    prices = np.asarray(prices, dtype=float)
+    result = np.full(len(prices), np.nan)
+    if len(prices) < period:
+        return result
+    result[period - 1:] = np.lib.stride_tricks.sliding_window_view(prices, period).mean(axis=1)
+    return result
+
+
+@dataclass
+class RawMarketData:
+    """Prices and news for a symbol as fetched, before indicators are computed."""
+    symbol: str
+    current_price: float
+    prices_1d: list[float]
+    prices_5d: list[float]
+    bar_times_5d: list[float]  # Epoch seconds of each 15-min bar in prices_5d
+    news_headlines: list[str]
+    timestamp: str
+    incremental: bool = False  # prices_5d only holds bars since the cached window's newest
+
+
+@traced("data.fetch_market_data")
+def fetch_market_data(symbol: str, since: Optional[float] = None) -> RawMarketData:
+    """Fetch prices and news for a stock symbol (network-bound, no indicators).
+    
+    With `since` (the newest cached bar time, see `IndicatorEngine.resume_time`)
+    only the 15-min bars from then on are downloaded instead of five days.
+    """
     
     ticker = yf.Ticker(symbol)
     
@@ -55,11 +108,18 @@ def get_market_data(symbol: str) -> MarketData:
         prices_1d = []
     
     # Last 5 days prices (15-min intervals for intraday granularity)
+    max_age = timedelta(days=config.INCREMENTAL_FETCH_MAX_AGE_DAYS).total_seconds()
+    incremental = since is not None and datetime.now(timezone.utc).timestamp() - since < max_age
     try:
-        hist_5d = ticker.history(period="5d", interval="15m")
+        if incremental:
+            hist_5d = ticker.history(start=datetime.fromtimestamp(since, timezone.utc), interval="15m")
+        else:
+            hist_5d = ticker.history(period="5d", interval="15m")
         prices_5d = hist_5d["Close"].tolist() if not hist_5d.empty else []
+        bar_times_5d = [ts.timestamp() for ts in hist_5d.index] if not hist_5d.empty else []
     except:
         prices_5d = []
+        bar_times_5d = []
     
     # Fallback current price from history
     if current_price == 0 and prices_1d:
@@ -67,28 +127,59 @@ def get_market_data(symbol: str) -> MarketData:
     elif current_price == 0 and prices_5d:
         current_price = prices_5d[-1]
     
-    # Calculate technical indicators
-    all_prices = prices_5d if prices_5d else prices_1d
-    rsi_14 = calculate_rsi(all_prices, 14)
-    sma_10 = calculate_sma(all_prices, 10)
-    sma_50 = calculate_sma(all_prices, 50)
-    
     # Get news headlines
     news_headlines = get_news_headlines(symbol)
     
-    return MarketData(
+    return RawMarketData(
         symbol=symbol,
         current_price=current_price,
         prices_1d=prices_1d,
         prices_5d=prices_5d,
+        bar_times_5d=bar_times_5d,
         news_headlines=news_headlines,
         timestamp=datetime.now().isoformat(),
+        incremental=incremental
+    )
+
+
+def build_market_data(raw: RawMarketData, indicators: Optional["IndicatorEngine"] = None) -> MarketData:
+    """Attach technical indicators to fetched data.
+    
+    With an `IndicatorEngine` only bars it has not seen yet are ingested;
+    without one the indicators are computed from this snapshot's prices.
+    An incremental fetch gets its full prices_5d from the engine's window.
+    """
+    prices_5d = raw.prices_5d
+    if indicators is not None and (raw.bar_times_5d or raw.incremental):
+        indicators.update_bars(raw.symbol, list(zip(raw.bar_times_5d, raw.prices_5d)))
+        rsi_14, sma_10, sma_50 = indicators.get(raw.symbol)
+        if raw.incremental:
+            prices_5d = indicators.closes(raw.symbol)
+    else:
+        all_prices = raw.prices_5d if raw.prices_5d else raw.prices_1d
+        rsi_14 = calculate_rsi(all_prices, 14)
+        sma_10 = calculate_sma(all_prices, 10)
+        sma_50 = calculate_sma(all_prices, 50)
+    
+    return MarketData(
+        symbol=raw.symbol,
+        current_price=raw.current_price,
+        prices_1d=raw.prices_1d,
+        prices_5d=prices_5d,
+        news_headlines=raw.news_headlines,
+        timestamp=raw.timestamp,
         rsi_14=rsi_14,
         sma_10=sma_10,
         sma_50=sma_50
     )
 
 
+@traced("data.get_market_data")
+def get_market_data(symbol: str) -> MarketData:
+    """Fetch current market data for a stock symbol."""
+    return build_market_data(fetch_market_data(symbol))
+
+
 def get_news_headlines(symbol: str) -> list[str]:
     """Fetch recent news headlines for a stock."""
     
@@ -134,3 +225,36 @@ def get_multiple_market_data(symbols: list[str]) -> dict[str, MarketData]:
         except Exception as e:
             print(f"Error fetching {symbol}: {e}")
     return result
+
+
+def download_bars(symbol: str, path: str, period: str = "60d", interval: str = "15m") -> int:
+    """Download historical bars from Yahoo Finance and append new ones to a CSV file.
+    
+    Yahoo only serves ~60 days of 15-minute bars, so run this regularly to
+    build up a longer history. Returns the number of bars in the file.
+    """
+    hist = yf.Ticker(symbol).history(period=period, interval=interval)
+    bars = {}
+    if Path(path).exists():
+        times, closes = load_bars(path)
+        bars = dict(zip(times.tolist(), closes.tolist()))
+    for ts, close in zip(hist.index, hist["Close"].tolist()):
+        bars[ts.timestamp()] = close
+    
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "close"])
+        for ts in sorted(bars):
+            writer.writerow([datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(), bars[ts]])
+    return len(bars)
+
+
+def load_bars(path: str) -> tuple[np.ndarray, np.ndarray]:
+    """Load a bar CSV (timestamp, close) into arrays of epoch seconds and closes."""
+    times = []
+    closes = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            times.append(datetime.fromisoformat(row["timestamp"]).timestamp())
+            closes.append(float(row["close"]))
+    return np.array(times), np.array(closes)
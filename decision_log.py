@@ -0,0 +1,198 @@
+import hashlib
+import pickle
+import struct
+import threading
+import time
+import zlib
+from array import array
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator, Optional
+
+from strategies.base import Decision, MarketData
+import config
+
+
+DECISION_LOG_VERSION = 1
+_FRAME_HEADER = struct.Struct(">I")  # Compressed length of the frame that follows
+
+_current: ContextVar[Optional["CycleRecord"]] = ContextVar("decision_record", default=None)
+
+
+def prompt_hash(messages: list[dict]) -> str:
+    """Short, stable hash of an LLM request's messages."""
+    digest = hashlib.blake2b(digest_size=8)
+    for message in messages:
+        digest.update(message["role"].encode())
+        digest.update(b"\0")
+        digest.update(message["content"].encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CycleRecord:
+    """Everything one cycle decided on: inputs, strategy state, decisions, LLM exchanges, timings."""
+
+    def __init__(self, cycle: int, specs: list, state: dict[str, dict]):
+        self.cycle = cycle
+        self.started_at = time.time()
+        self.specs = specs
+        self.state = state  # strategy name -> get_state() at the start of the cycle
+        self.market: dict[str, MarketData] = {}
+        self.calls: list[tuple[str, list[str], float]] = []  # (strategy, symbols, seconds)
+        self.decisions: list[tuple[int, str, Decision]] = []  # (call index, symbol, decision)
+        self.llm: list[tuple[str, str, str, str]] = []  # (strategy, symbol, prompt hash, response)
+        self.timings: Optional[dict] = None
+        self._lock = threading.Lock()  # Strategies decide on several threads
+
+    def add_call(self, strategy: str, market_data: dict[str, MarketData], decisions: dict[str, Decision], seconds: float):
+        with self._lock:
+            self.market.update(market_data)
+            call = len(self.calls)
+            self.calls.append((strategy, list(market_data), seconds))
+            self.decisions.extend((call, symbol, decision) for symbol, decision in decisions.items())
+
+    def add_llm_exchange(self, strategy: str, symbol: str, messages: list[dict], response: str):
+        with self._lock:
+            self.llm.append((strategy, symbol, prompt_hash(messages), response))
+
+    def to_frame(self) -> dict:
+        """Columnar form: one list (or packed array) per field."""
+        market = list(self.market.values())
+        return {
+            "version": DECISION_LOG_VERSION,
+            "cycle": self.cycle,
+            "started_at": self.started_at,
+            "specs": self.specs,
+            "state": self.state,
+            "market": {
+                "symbol": [md.symbol for md in market],
+                "current_price": array("d", (md.current_price for md in market)),
+                "prices_1d": _pack([md.prices_1d for md in market]),
+                "prices_5d": _pack([md.prices_5d for md in market]),
+                "news_headlines": [md.news_headlines for md in market],
+                "timestamp": [md.timestamp for md in market],
+                "rsi_14": [md.rsi_14 for md in market],
+                "sma_10": [md.sma_10 for md in market],
+                "sma_50": [md.sma_50 for md in market],
+                "smas": [md.smas for md in market],
+            },
+            "calls": {
+                "strategy": [c[0] for c in self.calls],
+                "symbols": [c[1] for c in self.calls],
+                "seconds": array("d", (c[2] for c in self.calls)),
+            },
+            "decisions": {
+                "call": array("I", (d[0] for d in self.decisions)),
+                "symbol": [d[1] for d in self.decisions],
+                "action": [d[2].action.value for d in self.decisions],
+                "quantity": [d[2].quantity for d in self.decisions],
+                "confidence": array("d", (d[2].confidence for d in self.decisions)),
+                "reasoning": [d[2].reasoning for d in self.decisions],
+            },
+            "llm": {
+                "strategy": [e[0] for e in self.llm],
+                "symbol": [e[1] for e in self.llm],
+                "prompt_hash": [e[2] for e in self.llm],
+                "response": [e[3] for e in self.llm],
+            },
+            "timings": self.timings,
+        }
+
+
+class DecisionLog:
+    """Append-only log with one zlib-compressed frame per cycle.
+
+    Each frame is a 4-byte big-endian length followed by a compressed
+    pickle of `CycleRecord.to_frame()`. A frame cut short by a crash is
+    ignored on read, so the log never needs repair.
+    """
+
+    def __init__(self, path: str = config.DECISION_LOG_FILE, level: int = 6):
+        self.path = Path(path)
+        self.level = level
+
+    def begin(self, arena) -> CycleRecord:
+        return CycleRecord(
+            cycle=arena.cycle_count + 1,
+            specs=list(config.STRATEGIES),
+            state={s.name: s.get_state() for s in arena.strategies}
+        )
+
+    def append(self, record: CycleRecord):
+        frame = zlib.compress(pickle.dumps(record.to_frame(), protocol=pickle.HIGHEST_PROTOCOL), self.level)
+        with open(self.path, "ab") as f:
+            f.write(_FRAME_HEADER.pack(len(frame)) + frame)
+
+
+def read_frames(path: str) -> Iterator[dict]:
+    """Frames of a decision log, oldest first."""
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(_FRAME_HEADER.size)
+            if len(header) < _FRAME_HEADER.size:
+                return
+            (length,) = _FRAME_HEADER.unpack(header)
+            frame = f.read(length)
+            if len(frame) < length:
+                return  # Partially written last frame
+            yield pickle.loads(zlib.decompress(frame))
+
+
+def market_data_from_frame(frame: dict) -> dict[str, MarketData]:
+    """Rebuild the cycle's `MarketData` snapshots, keyed by symbol."""
+    columns = frame["market"]
+    prices_1d = _unpack(columns["prices_1d"])
+    prices_5d = _unpack(columns["prices_5d"])
+    return {
+        symbol: MarketData(
+            symbol=symbol,
+            current_price=columns["current_price"][i],
+            prices_1d=prices_1d[i],
+            prices_5d=prices_5d[i],
+            news_headlines=columns["news_headlines"][i],
+            timestamp=columns["timestamp"][i],
+            rsi_14=columns["rsi_14"][i],
+            sma_10=columns["sma_10"][i],
+            sma_50=columns["sma_50"][i],
+            smas=columns["smas"][i] if "smas" in columns else None
+        )
+        for i, symbol in enumerate(columns["symbol"])
+    }
+
+
+@contextmanager
+def recording(record: Optional[CycleRecord]):
+    """Make `record` collect decisions and LLM exchanges made within the block (and its threads)."""
+    token = _current.set(record)
+    try:
+        yield record
+    finally:
+        _current.reset(token)
+
+
+def record_decisions(strategy: str, market_data: dict[str, MarketData], decisions: dict[str, Decision], seconds: float):
+    record = _current.get()
+    if record is not None:
+        record.add_call(strategy, market_data, decisions, seconds)
+
+
+def record_llm_exchange(strategy: str, symbol: str, messages: list[dict], response: str):
+    record = _current.get()
+    if record is not None:
+        record.add_llm_exchange(strategy, symbol, messages, response)
+
+
+def _pack(series: list[list[float]]) -> tuple[array, array]:
+    """Ragged float lists as one flat array plus lengths."""
+    return array("d", (x for values in series for x in values)), array("I", (len(values) for values in series))
+
+
+def _unpack(packed: tuple[array, array]) -> list[list[float]]:
+    values, lengths = packed
+    out, start = [], 0
+    for length in lengths:
+        out.append(values[start:start + length].tolist())
+        start += length
+    return out
@@ -0,0 +1,327 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional
+
+from broker import OrderRequest
+from data import fetch_market_data, build_market_data
+from decision_log import recording
+from indicators import IndicatorEngine
+from market_calendar import MARKET_TZ, CycleScheduler, is_open, seconds_until
+from netting import execute_netted_async
+from tracing import CycleTrace, span
+from strategies.base import BaseStrategy, MarketData
+import config
+
+
+_DONE = object()  # End-of-stream marker passed between stages
+
+STAGES = ["fetch", "indicators", "decide", "execute", "record"]
+
+
+class StageTimer:
+    """Busy time and wall-clock span of each pipeline stage within a cycle."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.busy: dict[str, float] = {}
+        self.first: dict[str, float] = {}
+        self.last: dict[str, float] = {}
+
+    def add(self, stage: str, start: float):
+        end = time.perf_counter()
+        self.busy[stage] = self.busy.get(stage, 0.0) + end - start
+        self.first.setdefault(stage, start)
+        self.last[stage] = end
+
+    def summary(self) -> dict:
+        total = time.perf_counter() - self.started
+        return {
+            "total": total,
+            "stages": {
+                stage: {
+                    "busy": self.busy[stage],
+                    "span": self.last[stage] - self.first[stage],
+                }
+                for stage in STAGES if stage in self.busy
+            },
+        }
+
+
+class CycleEngine:
+    """Asyncio pipeline that runs one trading cycle as overlapping stages.
+
+    fetch -> indicators -> decide -> net & execute -> record
+
+    Stages are connected by bounded queues, so a slow stage applies
+    backpressure instead of letting work pile up. Each symbol moves to the
+    next stage as soon as it is ready: decisions for a symbol start when
+    its data arrives (symbols ready at the same time go to each subscriber
+    as one batch), and its orders are netted and sent as soon as all of
+    its subscribers have decided.
+    """
+
+    def __init__(
+        self,
+        arena,
+        queue_size: int = config.PIPELINE_QUEUE_SIZE,
+        fetch_concurrency: int = config.FETCH_CONCURRENCY,
+        overrun_policy: str = config.CYCLE_OVERRUN_POLICY
+    ):
+        if overrun_policy not in ("skip", "coalesce"):
+            raise ValueError(f"Unknown overrun policy: {overrun_policy}")
+        self.arena = arena
+        self.queue_size = queue_size
+        self.fetch_concurrency = fetch_concurrency
+        self.overrun_policy = overrun_policy
+        self.indicators = IndicatorEngine()
+        self.last_timings: Optional[dict] = None
+        self._current: Optional[asyncio.Future] = None
+        self._pending = False
+
+    # --- Scheduling -----------------------------------------------------
+
+    async def run_forever(
+        self,
+        scheduler: Optional[CycleScheduler] = None,
+        interval_seconds: float = config.DECISION_INTERVAL_MINUTES * 60
+    ):
+        """Run cycles forever, applying the overrun policy if one is still running.
+        
+        With a scheduler, cycles fire just after each bar close during market
+        hours (plus a pre-open warmup); otherwise every `interval_seconds`.
+        """
+        if scheduler is None:
+            while True:
+                self.tick()
+                await asyncio.sleep(interval_seconds)
+        
+        # Started mid-session: run right away rather than waiting for the next bar
+        if is_open(datetime.now(MARKET_TZ)):
+            self.tick()
+        
+        while True:
+            now = datetime.now(MARKET_TZ)
+            fire_at = scheduler.next_cycle(now)
+            warmup_at = scheduler.next_warmup(now)
+            
+            if warmup_at and warmup_at < fire_at:
+                print(f"💤 Market closed - warming up at {warmup_at:%a %Y-%m-%d %H:%M} ET")
+                await asyncio.sleep(seconds_until(warmup_at, now))
+                await self.warm_up()
+                continue
+            
+            await asyncio.sleep(max(0.0, seconds_until(fire_at, datetime.now(MARKET_TZ))))
+            self.tick()
+    
+    async def warm_up(self):
+        """Before the open: qualify contracts and bring indicator state up to date."""
+        print(f"\n🌅 Pre-open warmup for {len(self.arena.subscriptions)} symbols")
+        await self.arena.broker.qualify_contracts_async(list(self.arena.subscriptions))
+        
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+        
+        async def prefetch(symbol: str):
+            async with semaphore:
+                try:
+                    raw = await asyncio.to_thread(fetch_market_data, symbol, self.indicators.resume_time(symbol))
+                    build_market_data(raw, self.indicators)
+                except Exception as e:
+                    print(f"Error prefetching {symbol}: {e}")
+        
+        await asyncio.gather(*(prefetch(symbol) for symbol in self.arena.subscriptions))
+
+    def close(self):
+        """Release any resources held between cycles."""
+
+    def snapshot(self) -> dict:
+        """State worth keeping across restarts, for checkpoints."""
+        return {"indicators": self.indicators.get_state()}
+
+    def restore(self, state: dict):
+        """Restore a snapshot taken by `snapshot`."""
+        self.indicators.set_state(state.get("indicators", {}))
+
+    def tick(self):
+        """Start a cycle now, or skip/coalesce if the previous one has not finished."""
+        if self._current is not None and not self._current.done():
+            if self.overrun_policy == "coalesce":
+                if not self._pending:
+                    print("⚠️ Previous cycle still running - next cycle will start when it finishes")
+                self._pending = True
+            else:
+                print("⚠️ Previous cycle still running - skipping this cycle")
+            return
+        self._start_cycle()
+
+    def _start_cycle(self):
+        self._current = asyncio.ensure_future(self.run_cycle())
+        self._current.add_done_callback(self._cycle_finished)
+
+    def _cycle_finished(self, task: asyncio.Future):
+        if not task.cancelled() and task.exception():
+            print(f"❌ Cycle failed: {task.exception()}")
+        # Any number of missed ticks collapse into a single catch-up cycle
+        if self._pending:
+            self._pending = False
+            self._start_cycle()
+
+    # --- One cycle ------------------------------------------------------
+
+    async def run_cycle(self) -> dict:
+        """Run one decision cycle for all strategies through the staged pipeline."""
+        print(f"\n{'='*60}")
+        print(f"Trading Cycle: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"{'='*60}")
+
+        log = self.arena.decision_log
+        record = log.begin(self.arena) if log else None
+        with CycleTrace(), recording(record):
+            timer = StageTimer()
+            subscriptions = self.arena.subscriptions
+            raw_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+            data_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+            fill_q: asyncio.Queue = asyncio.Queue()  # Fills are few; never block the broker callback
+            marks: dict[str, float] = {}
+
+            execute_tasks: list[asyncio.Task] = []
+
+            async def fetch_stage():
+                semaphore = asyncio.Semaphore(self.fetch_concurrency)
+
+                async def fetch(symbol: str):
+                    async with semaphore:
+                        start = time.perf_counter()
+                        try:
+                            raw = await asyncio.to_thread(fetch_market_data, symbol, self.indicators.resume_time(symbol))
+                        except Exception as e:
+                            print(f"Error fetching {symbol}: {e}")
+                            return
+                        finally:
+                            timer.add("fetch", start)
+                    await raw_q.put(raw)
+
+                await asyncio.gather(*(fetch(symbol) for symbol in subscriptions))
+                await raw_q.put(_DONE)
+
+            async def indicator_stage():
+                # The simulated broker fills against these quotes rather than each order's own price
+                quote = getattr(self.arena.broker, "update_market_data", None)
+                while (raw := await raw_q.get()) is not _DONE:
+                    start = time.perf_counter()
+                    try:
+                        market_data = build_market_data(raw, self.indicators)
+                    except Exception as e:
+                        print(f"Error computing indicators for {raw.symbol}: {e}")
+                        continue
+                    finally:
+                        timer.add("indicators", start)
+                    marks[market_data.symbol] = market_data.current_price
+                    if quote:
+                        quote(market_data)
+                    await data_q.put(market_data)
+                await data_q.put(_DONE)
+
+            async def decide_stage():
+                # Symbols that arrive together are decided as one batch, so each
+                # strategy sees all of its ready symbols in a single call. At most
+                # `queue_size` batches decide at once; beyond that the stage stops
+                # pulling from data_q and backpressure reaches fetch
+                in_flight = asyncio.Semaphore(self.queue_size)
+                decide_tasks = []
+                finished = False
+                while not finished:
+                    batch = [await data_q.get()]
+                    while not data_q.empty():
+                        batch.append(data_q.get_nowait())
+                    if batch[-1] is _DONE:
+                        finished = True
+                        batch.pop()
+                    if not batch:
+                        continue
+                    await in_flight.acquire()
+                    task = asyncio.ensure_future(self._decide_batch(batch, timer, execute_tasks, fill_q))
+                    task.add_done_callback(lambda _: in_flight.release())
+                    decide_tasks.append(task)
+                await asyncio.gather(*decide_tasks)
+                await asyncio.gather(*execute_tasks)
+                await fill_q.put(_DONE)
+
+            async def record_stage():
+                while (fill := await fill_q.get()) is not _DONE:
+                    start = time.perf_counter()
+                    with span("record", strategy=fill["strategy"], symbol=fill["symbol"]):
+                        await asyncio.to_thread(self.arena.record_fill, fill)
+                    timer.add("record", start)
+
+            await asyncio.gather(fetch_stage(), indicator_stage(), decide_stage(), record_stage())
+
+            self.last_timings = timer.summary()
+            self._print_timings(self.last_timings)
+            with span("end_cycle"):
+                # Copied here on the loop, which streamed bars and orders keep changing them from
+                caches = self.arena.snapshot_caches() if self.arena.snapshot_due(self.arena.cycle_count + 1) else None
+                await asyncio.to_thread(self.arena.end_cycle, marks, caches)
+        if record:
+            record.timings = self.last_timings
+            try:
+                await asyncio.to_thread(log.append, record)
+            except Exception as e:
+                print(f"Error writing decision log: {e}")
+        return self.last_timings
+
+    async def _decide_batch(
+        self,
+        batch: list[MarketData],
+        timer: StageTimer,
+        execute_tasks: list[asyncio.Task],
+        fill_q: asyncio.Queue
+    ):
+        """Run each subscriber once on its symbols in the batch, then net and send the orders."""
+        by_strategy: dict[BaseStrategy, dict[str, MarketData]] = {}
+        for market_data in batch:
+            print(f"\n[{market_data.symbol}] ${market_data.current_price:.2f}")
+            if market_data.rsi_14:
+                print(f"RSI(14): {market_data.rsi_14:.1f}")
+            if market_data.sma_10 and market_data.sma_50:
+                print(f"SMA(10): ${market_data.sma_10:.2f}, SMA(50): ${market_data.sma_50:.2f}")
+            for strategy in self.arena.subscriptions.get(market_data.symbol, []):
+                if strategy.streams_bars and self.arena.bar_stream:
+                    continue  # Decides on streamed bar closes instead
+                by_strategy.setdefault(strategy, {})[market_data.symbol] = market_data
+
+        async def decide(strategy: BaseStrategy, market_data: dict[str, MarketData]) -> list[OrderRequest]:
+            start = time.perf_counter()
+            try:
+                with span("decide", strategy=strategy.name, symbols=len(market_data)):
+                    if strategy.blocking_decide:
+                        return await asyncio.to_thread(self.arena.run_strategy, strategy, market_data)
+                    return self.arena.run_strategy(strategy, market_data)
+            finally:
+                timer.add("decide", start)
+
+        calls = []
+        for strategy, market_data in by_strategy.items():
+            if strategy.blocking_decide:
+                # One thread per symbol so slow network calls overlap
+                calls.extend(decide(strategy, {symbol: md}) for symbol, md in market_data.items())
+            else:
+                calls.append(decide(strategy, market_data))
+
+        orders = [o for result in await asyncio.gather(*calls) for o in result]
+        if orders:
+            execute_tasks.append(asyncio.ensure_future(self._execute(orders, timer, fill_q)))
+
+    async def _execute(self, orders: list[OrderRequest], timer: StageTimer, fill_q: asyncio.Queue):
+        start = time.perf_counter()
+        try:
+            with span("execute", orders=len(orders)):
+                await execute_netted_async(self.arena.broker, orders, on_fill=fill_q.put_nowait)
+        except Exception as e:
+            print(f"Error executing orders: {e}")
+        finally:
+            timer.add("execute", start)
+
+    def _print_timings(self, timings: dict):
+        parts = ", ".join(f"{stage} {t['busy']:.2f}s" for stage, t in timings["stages"].items())
+        print(f"\n⏱️ Cycle finished in {timings['total']:.2f}s ({parts})")
@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import config
+
+
+class EventJournal:
+    """Append-only JSON-lines log of arena state changes, followed by the dashboard.
+
+    Each line is {"seq", "time", "kind", ...payload}. When the file grows
+    past `max_bytes` it is rotated to `<path>.1` and a fresh one started.
+    """
+
+    def __init__(self, path: str = config.EVENTS_JOURNAL, max_bytes: int = config.EVENTS_JOURNAL_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def publish(self, kind: str, **payload):
+        with self._lock:
+            self._seq += 1
+            line = json.dumps({"seq": self._seq, "time": time.time(), "kind": kind, **payload})
+            try:
+                if self.max_bytes and self.path.exists() and self.path.stat().st_size > self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+                with open(self.path, "a") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                print(f"Failed to publish {kind} event: {e}")
+
+
+class JournalTailer:
+    """Reads events appended to a journal since the last call (never blocks)."""
+
+    def __init__(self, path: str = config.EVENTS_JOURNAL, from_start: bool = False):
+        self.path = Path(path)
+        self.offset = 0
+        self._inode = None
+        if not from_start and self.path.exists():
+            stat = self.path.stat()
+            self.offset, self._inode = stat.st_size, stat.st_ino
+
+    def read(self) -> list[dict]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return []
+        if stat.st_ino != self._inode or stat.st_size < self.offset:
+            # Rotated or truncated: follow the new file from its start
+            self.offset, self._inode = 0, stat.st_ino
+        if stat.st_size == self.offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(stat.st_size - self.offset)
+        end = chunk.rfind(b"\n") + 1  # Leave a half-written last line for next time
+        self.offset += end
+
+        events = []
+        for line in chunk[:end].splitlines():
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+        return events
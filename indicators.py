@@ -0,0 +1,85 @@
+from collections import deque
+from typing import Optional
+
+from data import calculate_rsi, calculate_sma
+from memory import BoundedDict
+import config
+
+
+class SymbolBars:
+    """Rolling window of bar closes for one symbol."""
+
+    def __init__(self, lookback: int):
+        self.closes: deque[float] = deque(maxlen=lookback)
+        self.last_time: Optional[float] = None  # Start time of the newest bar
+
+    def add(self, bar_time: float, close: float) -> bool:
+        """Append a bar; a repeat of the newest bar (still forming) replaces its close."""
+        if self.last_time is not None and bar_time < self.last_time:
+            return False
+        if bar_time == self.last_time and self.closes:
+            self.closes[-1] = close
+            return False
+        self.closes.append(close)
+        self.last_time = bar_time
+        return True
+
+
+class IndicatorEngine:
+    """Incremental per-symbol indicator state.
+
+    Each cycle only bars newer than the last one seen are appended, so the
+    rolling windows survive between cycles instead of being rebuilt from
+    every fetched snapshot.
+    """
+
+    def __init__(self, lookback: int = config.INDICATOR_LOOKBACK_BARS):
+        self.lookback = lookback
+        self.bars: dict[str, SymbolBars] = BoundedDict(config.INDICATOR_MAX_SYMBOLS)
+
+    def update_bars(self, symbol: str, bars: list[tuple[float, float]]) -> int:
+        """Ingest (bar_time, close) pairs in time order. Returns the number of new bars."""
+        state = self.bars.get(symbol)
+        if state is None:
+            state = self.bars[symbol] = SymbolBars(self.lookback)
+
+        # Skip straight to the bars we have not seen yet
+        if state.last_time is not None:
+            bars = [b for b in bars if b[0] >= state.last_time]
+        return sum(state.add(t, c) for t, c in bars)
+
+    def add_bar(self, symbol: str, bar_time: float, close: float) -> bool:
+        """Ingest a single completed or updating bar (e.g. from a streaming feed)."""
+        return self.update_bars(symbol, [(bar_time, close)]) > 0
+
+    def resume_time(self, symbol: str) -> Optional[float]:
+        """Newest bar time when the symbol's window is full, so only later bars need fetching."""
+        state = self.bars.get(symbol)
+        if state is None or len(state.closes) < self.lookback:
+            return None
+        return state.last_time
+
+    def closes(self, symbol: str) -> list[float]:
+        """The symbol's rolling window of closes, oldest first."""
+        state = self.bars.get(symbol)
+        return list(state.closes) if state is not None else []
+
+    def get_state(self) -> dict[str, tuple[Optional[float], list[float]]]:
+        """Picklable snapshot: symbol -> (newest bar time, closes)."""
+        return {symbol: (state.last_time, list(state.closes)) for symbol, state in self.bars.items()}
+
+    def set_state(self, snapshot: dict[str, tuple[Optional[float], list[float]]]):
+        """Restore a snapshot taken by `get_state`."""
+        self.bars = BoundedDict(config.INDICATOR_MAX_SYMBOLS)
+        for symbol, (last_time, closes) in snapshot.items():
+            state = self.bars[symbol] = SymbolBars(self.lookback)
+            state.closes.extend(closes)
+            state.last_time = last_time
+
+    def get(self, symbol: str) -> tuple[Optional[float], Optional[float], Optional[float]]:
+        """Current (RSI(14), SMA(10), SMA(50)) for a symbol."""
+        state = self.bars.get(symbol)
+        if state is None:
+            return None, None, None
+        closes = list(state.closes)
+        return calculate_rsi(closes, 14), calculate_sma(closes, 10), calculate_sma(closes, 50)
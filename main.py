@@ -1,12 +1,30 @@
+import threading
 import time
+from collections import deque
+from dataclasses import asdict
 from datetime import datetime
-import schedule
+from typing import Optional
 
-from strategies import LlamaStrategy, BuyHoldStrategy, MeanReversionStrategy, TrendFollowingStrategy
-from strategies.base import Action
-from broker import Broker
+from ib_insync import util
+
+from strategies import build_strategies, subscriptions
+from strategies.base import Action, BaseStrategy, MarketData
+from broker import Broker, OrderRequest
+from engine import CycleEngine
+from sharding import ShardedEngine
+from streaming import BarStream, FakeBarFeed, IBBarFeed
+from market_calendar import CycleScheduler
+from sim_broker import SimulatedBroker
+from reconcile import net_positions, reconcile
+from events import EventJournal
+from decision_log import DecisionLog, record_decisions
+from api import StateAPI
+from trade_store import TradeStore
+from checkpoint import save_checkpoint, restore_checkpoint
+from metrics import ExecutionMetrics
+from memory import MemoryReporter
 from tracker import Tracker
-from data import get_market_data, get_multiple_market_data
+from data import get_market_data
 import config
 
 
@@ -14,103 +32,218 @@ class TradingArena:
     """Main trading arena that runs all strategies."""
     
     def __init__(self):
-        self.broker = Broker()
-        self.tracker = Tracker()
+        self.metrics = ExecutionMetrics()
+        if config.BROKER_MODE == "sim":
+            self.broker = SimulatedBroker(metrics=self.metrics)
+        else:
+            self.broker = Broker(metrics=self.metrics)
+        self.tracker = Tracker(hot_trades=config.TRACKER_HOT_TRADES if config.TRADE_INDEX_DB else 0)
+        self.events = EventJournal() if config.EVENTS_JOURNAL else None
+        self.trade_store = TradeStore() if config.TRADE_INDEX_DB else None
+        if self.trade_store:
+            added = self.trade_store.sync(self.tracker.trades, self.tracker.trade_offset)
+            if added:
+                print(f"🗂️ Indexed {added} trades into {config.TRADE_INDEX_DB}")
+            if self.tracker.trim(slack=0):
+                self.tracker.save()  # Everything trimmed is in the store
+        elif config.TRACKER_HOT_TRADES:
+            print("⚠️ TRACKER_HOT_TRADES needs TRADE_INDEX_DB to archive to; keeping every trade in memory")
+        
+        # Initialize strategies and route each symbol to its subscribers
+        self.strategies = build_strategies(config.STRATEGIES)
+        self._strategies_by_name = {s.name: s for s in self.strategies}
+        self.subscriptions = subscriptions(self.strategies)
+        
+        self.engine = ShardedEngine(self) if config.SHARD_WORKERS else CycleEngine(self)
+        self.marks: dict[str, float] = {}  # symbol -> latest price seen by a cycle
+        self.cycle_count = 0
         
-        # Initialize strategies
-        self.strategies = [
-            LlamaStrategy(),
-            BuyHoldStrategy(),
-            MeanReversionStrategy(),
-            TrendFollowingStrategy(),
-        ]
+        # Live state for the read-only API: guarded by state_lock, and
+        # state_version moves whenever any of it changes
+        self.state_lock = threading.RLock()
+        self.state_version = 0
+        self.decisions: deque[dict] = deque(maxlen=config.API_RECENT_DECISIONS)
+        self.cycle_timings: deque[dict] = deque(maxlen=config.API_CYCLE_HISTORY)
+        self.api = StateAPI(self) if config.API_PORT else None
+        self.decision_log = DecisionLog() if config.DECISION_LOG_FILE else None
+        self.bar_stream: Optional[BarStream] = None  # Set up in start(), once the broker is known
+        
+        self.memory = MemoryReporter() if config.MEMORY_REPORT_EVERY_CYCLES else None
+        self.memory_report: Optional[dict] = None
+        if self.memory:
+            self.memory.start()
         
         print(f"Initialized {len(self.strategies)} strategies:")
         for s in self.strategies:
-            print(f"  - {s.name}")
+            print(f"  - {s.name} ({', '.join(s.symbols)})")
     
     def run_cycle(self):
         """Run one decision cycle for all strategies."""
-        print(f"\n{'='*60}")
-        print(f"Trading Cycle: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"{'='*60}")
+        return util.run(self.engine.run_cycle())
+    
+    def end_cycle(self, marks: dict[str, float], caches: Optional[dict] = None):
+        """Bookkeeping once a cycle's fills are recorded.
         
-        # Get SPY data for baseline strategies
-        print(f"\n--- {config.BENCHMARK_SYMBOL} (Benchmark) ---")
-        try:
-            spy_data = get_market_data(config.BENCHMARK_SYMBOL)
-            print(f"Price: ${spy_data.current_price:.2f}")
-            if spy_data.rsi_14:
-                print(f"RSI(14): {spy_data.rsi_14:.1f}")
-            if spy_data.sma_10 and spy_data.sma_50:
-                print(f"SMA(10): ${spy_data.sma_10:.2f}, SMA(50): ${spy_data.sma_50:.2f}")
-        except Exception as e:
-            print(f"Error fetching SPY data: {e}")
-            spy_data = None
+        `caches` is a `snapshot_caches()` taken on the event loop, for the
+        checkpoint and memory report; without it one is taken here.
+        """
+        with self.state_lock:
+            self.cycle_count += 1
+            self.marks.update(marks)
+            if self.engine.last_timings:
+                self.cycle_timings.append({
+                    "cycle": self.cycle_count,
+                    "finished_at": datetime.now().isoformat(),
+                    **self.engine.last_timings
+                })
+            # Between cycles, not per fill: a fill is published with the position it left
+            self.tracker.trim()
+            self.state_version += 1  # Last, once everything it covers is updated
+        if self.events:
+            self.events.publish("marks", cycle=self.cycle_count, marks=marks)
         
-        # Run baseline strategies on SPY
-        if spy_data:
-            for strategy in self.strategies:
-                if strategy.name != "Llama-70B":  # Baseline strategies
-                    self._run_strategy(strategy, spy_data)
+        if self.metrics.records:
+            try:
+                self.metrics.export(config.EXECUTION_METRICS_FILE)
+            except Exception as e:
+                print(f"Error exporting execution metrics: {e}")
+        
+        # Periodically check for position drift
+        if self.cycle_count % config.RECONCILE_EVERY_CYCLES == 0:
+            reconcile(self.broker, self.tracker, self.strategies)
         
-        # Run Llama on individual stocks
-        print(f"\n--- Llama Stock Picks ---")
-        llama_strategy = next(s for s in self.strategies if s.name == "Llama-70B")
+        if caches is None and self.snapshot_due(self.cycle_count):
+            caches = self.snapshot_caches()
         
-        for symbol in config.LLM_UNIVERSE[:5]:  # Analyze top 5 stocks per cycle
+        if config.CHECKPOINT_FILE and self.cycle_count % config.CHECKPOINT_EVERY_CYCLES == 0:
+            self.save_checkpoint(caches)
+        
+        if self.memory and self.cycle_count % config.MEMORY_REPORT_EVERY_CYCLES == 0:
             try:
-                stock_data = get_market_data(symbol)
-                print(f"\n[{symbol}] ${stock_data.current_price:.2f}")
-                self._run_strategy(llama_strategy, stock_data)
+                report = self.memory.report(self, caches)
             except Exception as e:
-                print(f"Error with {symbol}: {e}")
+                print(f"Error writing memory report: {e}")
+            else:
+                with self.state_lock:
+                    self.memory_report = report
+                    self.state_version += 1
         
         # Print leaderboard
         self._print_leaderboard()
     
-    def _run_strategy(self, strategy, market_data):
-        """Run a single strategy on market data."""
+    def snapshot_due(self, cycle: int) -> bool:
+        """Whether the `end_cycle` of `cycle` saves a checkpoint or a memory report."""
+        return bool(config.CHECKPOINT_FILE and cycle % config.CHECKPOINT_EVERY_CYCLES == 0
+                    or self.memory and cycle % config.MEMORY_REPORT_EVERY_CYCLES == 0)
+    
+    def snapshot_caches(self) -> dict:
+        """Copies of the caches the event loop keeps changing: indicator windows and contracts.
+        
+        Take it on the loop; threads iterating the live LRU dicts can see
+        them reordered or resized mid-iteration by streamed bars and orders.
+        """
+        return {
+            "engine": self.engine.snapshot(),
+            "contracts": dict(getattr(self.broker, "contracts", {})),
+        }
+    
+    def save_checkpoint(self, caches: Optional[dict] = None):
         try:
-            decision = strategy.decide(market_data)
-            
+            save_checkpoint(self, caches=caches)
+        except Exception as e:
+            print(f"Error saving checkpoint: {e}")
+    
+    def run_strategy(self, strategy: BaseStrategy, market_data: dict[str, MarketData]) -> list[OrderRequest]:
+        """Run a strategy on a batch of symbols and return the orders it wants."""
+        start = time.perf_counter()
+        try:
+            decisions = strategy.decide_batch(market_data)
+        except Exception as e:
+            print(f"  [{strategy.name}] Error: {e}")
+            return []
+        record_decisions(strategy.name, market_data, decisions, time.perf_counter() - start)
+        
+        self.note_decisions(strategy.name, {
+            symbol: (d.action.value, d.quantity, d.confidence, d.reasoning) for symbol, d in decisions.items()
+        })
+        
+        orders = []
+        for symbol, decision in decisions.items():
             action_emoji = "🟢" if decision.action == Action.BUY else "🔴" if decision.action == Action.SELL else "⚪"
-            print(f"  [{strategy.name}] {action_emoji} {decision.action.value} "
+            print(f"  [{strategy.name}] {symbol} {action_emoji} {decision.action.value} "
                   f"(conf: {decision.confidence:.0%}) - {decision.reasoning[:60]}...")
             
-            # Execute trade if not HOLD
+            # Queue trade if not HOLD
             if decision.action != Action.HOLD and decision.quantity:
-                fill = self.broker.execute_trade(
-                    symbol=market_data.symbol,
+                orders.append(OrderRequest(
+                    symbol=symbol,
                     action=decision.action,
                     quantity=decision.quantity,
-                    strategy_name=strategy.name
+                    strategy_name=strategy.name,
+                    reference_price=market_data[symbol].current_price
+                ))
+        return orders
+    
+    def note_decisions(self, strategy_name: str, decisions: dict[str, tuple]):
+        """Keep decisions for the API: symbol -> (action, quantity, confidence, reasoning)."""
+        now = datetime.now().isoformat()
+        with self.state_lock:
+            for symbol, (action, quantity, confidence, reasoning) in decisions.items():
+                self.decisions.append({
+                    "time": now,
+                    "cycle": self.cycle_count + 1,
+                    "strategy": strategy_name,
+                    "symbol": symbol,
+                    "action": action,
+                    "quantity": quantity,
+                    "confidence": confidence,
+                    "reasoning": reasoning,
+                })
+            self.state_version += 1
+    
+    def record_fill(self, fill: dict):
+        """Record a broker fill against the strategy that placed it."""
+        strategy = self._strategies_by_name.get(fill["strategy"])
+        action = Action(fill["action"])
+        try:
+            with self.state_lock:
+                trade = self.tracker.record_trade(
+                    strategy=fill["strategy"],
+                    symbol=fill["symbol"],
+                    action=action,
+                    quantity=fill["quantity"],
+                    price=fill["price"]
                 )
-                
-                if fill:
-                    self.tracker.record_trade(
-                        strategy=strategy.name,
-                        symbol=market_data.symbol,
-                        action=decision.action,
-                        quantity=fill["quantity"],
-                        price=fill["price"]
-                    )
-                    # Update strategy's internal position tracking
-                    current = strategy.positions.get(market_data.symbol, 0)
-                    if decision.action == Action.BUY:
-                        strategy.positions[market_data.symbol] = current + fill["quantity"]
-                    else:
-                        strategy.positions[market_data.symbol] = current - fill["quantity"]
-        
+                index = self.tracker.total_trades - 1
+                if self.events:
+                    self._publish_trade(index, trade)  # In index order, with the position this trade left
+                self.state_version += 1
+            if self.trade_store:
+                self.trade_store.append(index, trade)
+            # Update strategy's internal position tracking
+            if strategy:
+                strategy.on_fill(fill["symbol"], action, fill["quantity"])
         except Exception as e:
-            print(f"  [{strategy.name}] Error: {e}")
+            print(f"  [{fill['strategy']}] Error recording fill: {e}")
+    
+    def _publish_trade(self, index: int, trade):
+        """Tell the dashboard about a fill, with the position it left behind. Call under `state_lock`."""
+        self.events.publish(
+            "trade",
+            index=index,
+            trade=asdict(trade),
+            position=self.tracker.positions[trade.strategy].get(trade.symbol, 0),
+            entry_price=self.tracker.entry_prices[trade.strategy].get(trade.symbol),
+            realized_pnl=self.tracker.realized_pnl[trade.strategy]
+        )
     
     def _print_leaderboard(self):
         """Print current leaderboard."""
-        # Get current prices for unrealized P&L
-        current_prices = {}
-        current_prices[config.BENCHMARK_SYMBOL] = get_market_data(config.BENCHMARK_SYMBOL).current_price
-        for symbol in config.LLM_UNIVERSE[:10]:
+        # Current prices for unrealized P&L: this cycle's marks, plus any
+        # held symbol that was not fetched this cycle
+        current_prices = dict(self.marks)
+        held = {sym for positions in self.tracker.positions.values() for sym, q in positions.items() if q}
+        for symbol in held - current_prices.keys():
             try:
                 current_prices[symbol] = get_market_data(symbol).current_price
             except:
@@ -129,6 +262,17 @@ class TradingArena:
             pnl_str = f"${pnl:+,.2f}"
             medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
             print(f"{medal:<6}{entry['strategy']:<20}{pnl_str:>12}{entry['trades']:>8}")
+        
+        execution = self.metrics.summary("strategy")
+        if execution:
+            print(f"\n{'Execution':<20}{'Orders':>8}{'Fill %':>8}{'Slip bps':>10}{'Ack→Fill ms':>13}")
+            print("-" * 59)
+            for name, stats in sorted(execution.items()):
+                slip = stats['avg_slippage_bps']
+                fill_ms = stats['avg_ack_to_fill_ms']
+                slip_str = f"{slip:+.1f}" if slip is not None else "-"
+                fill_str = f"{fill_ms:.0f}" if fill_ms is not None else "-"
+                print(f"{name:<20}{stats['orders']:>8}{stats['fill_rate']:>8.0%}{slip_str:>10}{fill_str:>13}")
     
     def start(self):
         """Start the trading arena."""
@@ -136,34 +280,77 @@ class TradingArena:
         print("🤖 LLM TRADING ARENA - EQUITIES EDITION")
         print("="*60)
         print(f"Benchmark: {config.BENCHMARK_SYMBOL}")
-        print(f"LLM Universe: {', '.join(config.LLM_UNIVERSE[:5])}...")
+        print(f"Symbols: {', '.join(self.subscriptions)}")
         print(f"Interval: {config.DECISION_INTERVAL_MINUTES} minutes")
         print(f"Position size: ${config.POSITION_SIZE_USD:,}")
         print("="*60 + "\n")
         
+        # Warm restart: strategy state, indicators and cached contracts
+        # (restored before connecting so they are not re-qualified)
+        if config.CHECKPOINT_FILE:
+            restore_checkpoint(self)
+        
         # Connect to broker
         if not self.broker.connect():
-            print("⚠️  WARNING: Running without broker connection (dry run mode)")
-            print("    Trades will be simulated but not executed")
+            print("⚠️  WARNING: Running without broker connection (simulated broker)")
+            print("    Trades will be filled locally against the latest prices")
+            self.broker = SimulatedBroker(metrics=self.metrics)
+            self.broker.connect()
+        if isinstance(self.broker, SimulatedBroker):
+            # A fresh simulator holds nothing; it should hold what the arena traded
+            self.broker.seed_positions(net_positions(self.tracker))
+        
+        # Restore strategy positions from the tracker's history
+        reconcile(self.broker, self.tracker, self.strategies)
         
-        # Run first cycle immediately
-        self.run_cycle()
+        if self.api:
+            self.api.start()
         
-        # Schedule subsequent cycles
-        schedule.every(config.DECISION_INTERVAL_MINUTES).minutes.do(self.run_cycle)
+        if config.STREAMING_BARS:
+            self.bar_stream = self._make_bar_stream(config.STREAMING_BARS)
         
-        print(f"\n⏰ Next cycle in {config.DECISION_INTERVAL_MINUTES} minutes...")
+        scheduler = CycleScheduler() if config.MARKET_HOURS_ONLY else None
+        when = "after each bar close during market hours" if scheduler else "around the clock"
+        print(f"\n⏰ Running a cycle every {config.DECISION_INTERVAL_MINUTES} minutes {when} "
+              f"(overrun policy: {config.CYCLE_OVERRUN_POLICY})")
         print("Press Ctrl+C to stop\n")
         
         try:
-            while True:
-                schedule.run_pending()
-                time.sleep(1)
+            util.run(self._run(scheduler))
         except KeyboardInterrupt:
             print("\n🛑 Stopping arena...")
+            if config.CHECKPOINT_FILE:
+                self.save_checkpoint()
+            if self.bar_stream:
+                self.bar_stream.stop()
+            self.engine.close()
+            if self.api:
+                self.api.stop()
             self.broker.disconnect()
             self._print_leaderboard()
             print("Arena stopped.")
+    
+    async def _run(self, scheduler: Optional[CycleScheduler]):
+        if self.bar_stream:
+            await self.bar_stream.start()
+        await self.engine.run_forever(scheduler)
+    
+    def _make_bar_stream(self, mode: str) -> Optional[BarStream]:
+        if config.SHARD_WORKERS:
+            print("⚠️ Streaming bars need the single-process engine; staying on the cycle schedule")
+            return None
+        if mode == "fake":
+            if not isinstance(self.broker, SimulatedBroker):
+                print("⚠️ Fake streamed bars only run against the simulated broker; staying on the cycle schedule")
+                return None
+            feed = FakeBarFeed(start_prices=self.marks, price_source=lambda s: get_market_data(s).current_price)
+            return BarStream(self, feed)
+        if mode == "ib":
+            if isinstance(self.broker, SimulatedBroker):
+                print("⚠️ Streaming bars need an IB connection; staying on the cycle schedule")
+                return None
+            return BarStream(self, IBBarFeed(self.broker))
+        raise ValueError(f"Unknown STREAMING_BARS mode: {mode}")
 
 
 def main():
@@ -0,0 +1,159 @@
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import config
+
+
+MARKET_TZ = ZoneInfo("America/New_York")
+EARLY_CLOSE = time(13, 0)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th given weekday of a month (n=-1 for the last one)."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays are observed Friday, Sunday holidays Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=None)
+def holidays(year: int) -> frozenset[date]:
+    """NYSE full-day holidays for a year."""
+    days = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    # New Year's Day on a Saturday is not observed on the prior Friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(days)
+
+
+@lru_cache(maxsize=None)
+def early_closes(year: int) -> frozenset[date]:
+    """NYSE 1:00pm closes: July 3rd, the day after Thanksgiving and Christmas Eve."""
+    candidates = {
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    }
+    return frozenset(d for d in candidates if is_trading_day(d))
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def session(day: date) -> Optional[tuple[datetime, datetime]]:
+    """Open and close (Eastern, tz-aware) for a day, or None if the market is closed."""
+    if not is_trading_day(day):
+        return None
+    open_time = time(config.MARKET_OPEN_HOUR, config.MARKET_OPEN_MINUTE)
+    close_time = time(config.MARKET_CLOSE_HOUR, config.MARKET_CLOSE_MINUTE)
+    if day in early_closes(day.year):
+        close_time = min(close_time, EARLY_CLOSE)
+    return (
+        datetime.combine(day, open_time, tzinfo=MARKET_TZ),
+        datetime.combine(day, close_time, tzinfo=MARKET_TZ),
+    )
+
+
+def next_session(now: datetime) -> tuple[datetime, datetime]:
+    """The session in progress at `now`, or the next one to open."""
+    day = now.astimezone(MARKET_TZ).date()
+    for _ in range(14):
+        hours = session(day)
+        if hours and hours[1] > now:
+            return hours
+        day += timedelta(days=1)
+    raise RuntimeError(f"No trading session within two weeks of {now}")
+
+
+def seconds_until(when: datetime, now: datetime) -> float:
+    """Real seconds from `now` to `when`, across DST changes.
+
+    Subtracting aware datetimes that share a tzinfo gives wall-clock time,
+    which is an hour off when a DST change falls in between.
+    """
+    return when.timestamp() - now.timestamp()
+
+
+def is_open(now: datetime) -> bool:
+    open_at, close_at = next_session(now)
+    return open_at <= now < close_at
+
+
+class CycleScheduler:
+    """Fires cycles just after each bar closes, and only while the market is open."""
+
+    def __init__(
+        self,
+        interval_minutes: int = config.DECISION_INTERVAL_MINUTES,
+        settle_seconds: float = config.SETTLE_DELAY_SECONDS,
+        warmup_minutes: float = config.PREOPEN_WARMUP_MINUTES
+    ):
+        self.interval = timedelta(minutes=interval_minutes)
+        self.settle = timedelta(seconds=settle_seconds)
+        self.warmup = timedelta(minutes=warmup_minutes)
+
+    def cycle_times(self, open_at: datetime, close_at: datetime) -> list[datetime]:
+        """Bar closes within a session (plus the settle delay); the closing bar itself is skipped."""
+        times = []
+        boundary = open_at + self.interval
+        while boundary < close_at:
+            times.append(boundary + self.settle)
+            boundary += self.interval
+        return times
+
+    def next_cycle(self, now: datetime) -> datetime:
+        """When the next cycle should run."""
+        search = now
+        for _ in range(14):
+            open_at, close_at = next_session(search)
+            for fire in self.cycle_times(open_at, close_at):
+                if fire > now:
+                    return fire
+            search = close_at
+        raise RuntimeError(f"No cycle time within two weeks of {now}")
+
+    def next_warmup(self, now: datetime) -> Optional[datetime]:
+        """Pre-open warmup time for the next session, if it has not passed yet."""
+        open_at, _ = next_session(now)
+        warmup_at = open_at - self.warmup
+        return warmup_at if warmup_at > now else None
@@ -0,0 +1,141 @@
+import json
+import os
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Optional
+
+import config
+
+
+class BoundedDict(OrderedDict):
+    """Dict capped at `max_size` entries, evicting the least recently used.
+
+    `get()` and assignment count as a use; plain indexing does not, so
+    copying or iterating never reorders it.
+    """
+
+    def __init__(self, max_size: int, *args, **kwargs):
+        self.max_size = max_size
+        super().__init__(*args, **kwargs)
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if self.max_size and len(self) > self.max_size:
+            self.popitem(last=False)
+
+    def __reduce__(self):
+        return (type(self), (self.max_size, list(self.items())))
+
+
+def rss_mb() -> Optional[float]:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if os.uname().sysname == "Darwin" else peak / 2**10
+    except (ImportError, OSError):
+        return None
+
+
+def subsystem_counts(arena, caches: Optional[dict] = None) -> dict:
+    """Sizes of everything the arena keeps in memory, per subsystem.
+
+    Indicator and contract sizes come from `caches` (an `arena.snapshot_caches()`).
+    """
+    caches = caches or arena.snapshot_caches()
+    tracker = arena.tracker
+    indicators = caches["engine"].get("indicators", {})
+    return {
+        "tracker": {
+            "hot_trades": len(tracker.trades),
+            "archived_trades": tracker.trade_offset,
+            "positions": sum(len(p) for p in tracker.positions.values()),
+        },
+        "strategies": {
+            s.name: {"positions": len(s.positions), "trades": len(s.trades)} for s in arena.strategies
+        },
+        "indicators": {
+            "symbols": len(indicators),
+            "bars": sum(len(closes) for _, closes in indicators.values()),
+        },
+        "broker": {"contracts": len(caches["contracts"])},
+        "metrics": {"records": len(arena.metrics.records)},
+        "api": {"decisions": len(arena.decisions), "cycles": len(arena.cycle_timings)},
+        "marks": len(arena.marks),
+    }
+
+
+class MemoryReporter:
+    """Periodic memory report: RSS, top tracemalloc allocators, and object counts per subsystem.
+
+    Each report is appended to `path` as one JSON line and printed as a
+    summary; RSS above `alert_mb` is flagged with a warning.
+    """
+
+    def __init__(
+        self,
+        path: str = config.MEMORY_REPORT_FILE,
+        top: int = config.MEMORY_REPORT_TOP,
+        alert_mb: float = config.MEMORY_ALERT_MB
+    ):
+        self.path = path
+        self.top = top
+        self.alert_mb = alert_mb
+        self._previous: Optional[tracemalloc.Snapshot] = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def report(self, arena, caches: Optional[dict] = None) -> dict:
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        traced_mb, peak_mb = (size / 2**20 for size in tracemalloc.get_traced_memory())
+        growth = snapshot.compare_to(self._previous, "lineno")[:self.top] if self._previous else []
+        self._previous = snapshot
+
+        report = {
+            "time": time.time(),
+            "cycle": arena.cycle_count,
+            "rss_mb": rss_mb(),
+            "traced_mb": traced_mb,
+            "traced_peak_mb": peak_mb,
+            "top": [_stat(s) for s in snapshot.statistics("lineno")[:self.top]],
+            "growth": [_stat(s) for s in growth],
+            "counts": subsystem_counts(arena, caches),
+        }
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(report) + "\n")
+
+        rss = report["rss_mb"]
+        rss_str = f"{rss:,.0f} MB" if rss is not None else "n/a"
+        print(f"🧠 Memory: RSS {rss_str}, traced {traced_mb:,.1f} MB (peak {peak_mb:,.1f} MB), "
+              f"{report['counts']['tracker']['hot_trades']:,} trades in memory")
+        if growth:
+            print(f"   Biggest growth: {growth[0].traceback} {growth[0].size_diff / 2**10:+,.0f} KiB")
+        if self.alert_mb and rss and rss > self.alert_mb:
+            print(f"⚠️ RSS {rss:,.0f} MB is above MEMORY_ALERT_MB ({self.alert_mb:,} MB)")
+        return report
+
+
+def _stat(stat) -> dict:
+    entry = {"where": str(stat.traceback), "size_kb": round(stat.size / 2**10, 1), "count": stat.count}
+    if hasattr(stat, "size_diff"):
+        entry["size_diff_kb"] = round(stat.size_diff / 2**10, 1)
+    return entry
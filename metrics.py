@@ -0,0 +1,129 @@
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, astuple, fields
+from pathlib import Path
+from typing import Optional
+
+from strategies.base import Action
+
+
+# Order outcomes
+FILLED = "filled"
+PARTIAL = "partial"
+TIMEOUT = "timeout"
+CANCELLED = "cancelled"
+REJECTED = "rejected"
+
+
+@dataclass(slots=True)
+class OrderMetrics:
+    timestamp: float
+    strategy: str
+    symbol: str
+    action: str
+    quantity: int
+    filled: int
+    status: str
+    decision_to_submit_ms: Optional[float] = None
+    submit_to_ack_ms: Optional[float] = None
+    ack_to_fill_ms: Optional[float] = None
+    slippage_bps: Optional[float] = None  # Positive = paid more / received less than the decision price
+
+
+def _ms(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return round((end - start) * 1000, 3)
+
+
+def slippage_bps(action: Action, reference_price: float, fill_price: float) -> Optional[float]:
+    """Signed slippage of a fill against the price the strategy saw, in basis points."""
+    if not reference_price or not fill_price:
+        return None
+    side = 1 if action == Action.BUY else -1
+    return round(side * (fill_price - reference_price) / reference_price * 10_000, 3)
+
+
+def _mean(values: list) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return round(sum(values) / len(values), 3) if values else None
+
+
+class ExecutionMetrics:
+    """Bounded store of per-order execution timings and slippage."""
+
+    def __init__(self, max_records: int = 50_000):
+        self.records: deque[OrderMetrics] = deque(maxlen=max_records)
+
+    def record(
+        self,
+        order,
+        status: str,
+        filled: int = 0,
+        fill_price: float = 0.0,
+        submitted_at: Optional[float] = None,
+        acked_at: Optional[float] = None,
+        filled_at: Optional[float] = None
+    ) -> list[OrderMetrics]:
+        """Record the outcome of one `OrderRequest`.
+
+        A netted order is recorded once per strategy order it combines, with
+        the shares allocated to that strategy, so per-strategy metrics keep
+        working when netting kicks in.
+        """
+        if order.allocate is not None:
+            entries = []
+            for leg, shares in order.allocate(filled):
+                leg_status = FILLED if shares >= leg.quantity else PARTIAL if shares else status
+                entries += self.record(leg, leg_status, shares, fill_price, submitted_at, acked_at, filled_at)
+            return entries
+
+        entry = OrderMetrics(
+            timestamp=time.time(),
+            strategy=order.strategy_name,
+            symbol=order.symbol,
+            action=order.action.value,
+            quantity=order.quantity,
+            filled=filled,
+            status=status,
+            decision_to_submit_ms=_ms(order.decided_at, submitted_at),
+            submit_to_ack_ms=_ms(submitted_at, acked_at),
+            ack_to_fill_ms=_ms(acked_at, filled_at),
+            slippage_bps=slippage_bps(order.action, order.reference_price, fill_price) if filled else None
+        )
+        self.records.append(entry)
+        return [entry]
+
+    def summary(self, by: str = "strategy") -> dict[str, dict]:
+        """Aggregate records by "strategy" or "symbol"."""
+        groups: dict[str, list[OrderMetrics]] = {}
+        for r in self.records:
+            groups.setdefault(getattr(r, by), []).append(r)
+
+        result = {}
+        for key, records in groups.items():
+            statuses: dict[str, int] = {}
+            for r in records:
+                statuses[r.status] = statuses.get(r.status, 0) + 1
+            result[key] = {
+                "orders": len(records),
+                "fill_rate": round(sum(1 for r in records if r.filled) / len(records), 3),
+                "statuses": statuses,
+                "avg_decision_to_submit_ms": _mean([r.decision_to_submit_ms for r in records]),
+                "avg_submit_to_ack_ms": _mean([r.submit_to_ack_ms for r in records]),
+                "avg_ack_to_fill_ms": _mean([r.ack_to_fill_ms for r in records]),
+                "avg_slippage_bps": _mean([r.slippage_bps for r in records]),
+            }
+        return result
+
+    def export(self, path: str):
+        """Write summaries and the raw records (as rows) to a JSON file."""
+        data = {
+            "generated": time.time(),
+            "by_strategy": self.summary("strategy"),
+            "by_symbol": self.summary("symbol"),
+            "columns": [f.name for f in fields(OrderMetrics)],
+            "records": [astuple(r) for r in self.records],
+        }
+        Path(path).write_text(json.dumps(data))
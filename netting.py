@@ -0,0 +1,198 @@
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from strategies.base import Action
+from broker import OrderRequest
+
+
+NET_STRATEGY_NAME = "NET"  # orderRef tag for orders combining several strategies
+
+
+@dataclass
+class NetOrder:
+    """All of one cycle's orders for a symbol, reduced to a single net quantity."""
+    symbol: str
+    action: Action  # HOLD when buys and sells cancel out exactly
+    quantity: int  # Net shares that still have to go to the broker
+    crossed: int  # Shares matched internally between opposing strategies
+    reference_price: float  # Midpoint used when no broker fill price is available
+    legs: list[OrderRequest] = field(default_factory=list)
+
+    def to_request(self) -> OrderRequest:
+        """Broker order for the net quantity (the original order if there is only one leg)."""
+        if len(self.legs) == 1:
+            return self.legs[0]
+        return OrderRequest(
+            symbol=self.symbol,
+            action=self.action,
+            quantity=self.quantity,
+            strategy_name=NET_STRATEGY_NAME,
+            reference_price=self.reference_price,
+            decided_at=min(o.decided_at for o in self.legs),
+            allocate=self.leg_shares
+        )
+
+    def leg_shares(self, broker_filled: int) -> list[tuple[OrderRequest, int]]:
+        """Shares each leg gets when the broker fills `broker_filled` of the net order.
+
+        The minority side is always fully crossed internally. The majority
+        side receives the crossed shares plus the broker's fill, pro rata.
+        """
+        # With an exact offset either side can play "majority"; both are fully crossed
+        side = Action.BUY if self.action == Action.HOLD else self.action
+        majority = [o for o in self.legs if o.action == side]
+        minority = [o for o in self.legs if o.action != side]
+        return ([(o, o.quantity) for o in minority]
+                + list(zip(majority, _pro_rata(self.crossed + broker_filled, majority))))
+
+
+def net_orders(orders: list[OrderRequest]) -> list[NetOrder]:
+    """Group orders by symbol and offset buys against sells."""
+    by_symbol: dict[str, list[OrderRequest]] = {}
+    for order in orders:
+        if order.action == Action.HOLD or order.quantity <= 0:
+            continue
+        by_symbol.setdefault(order.symbol, []).append(order)
+
+    result = []
+    for symbol, legs in by_symbol.items():
+        bought = sum(o.quantity for o in legs if o.action == Action.BUY)
+        sold = sum(o.quantity for o in legs if o.action == Action.SELL)
+
+        if bought > sold:
+            action = Action.BUY
+        elif sold > bought:
+            action = Action.SELL
+        else:
+            action = Action.HOLD
+
+        prices = [o.reference_price for o in legs if o.reference_price]
+        result.append(NetOrder(
+            symbol=symbol,
+            action=action,
+            quantity=abs(bought - sold),
+            crossed=min(bought, sold),
+            reference_price=sum(prices) / len(prices) if prices else 0.0,
+            legs=legs
+        ))
+
+    return result
+
+
+def _pro_rata(total: int, legs: list[OrderRequest]) -> list[int]:
+    """Split `total` shares across legs in proportion to size (largest remainder)."""
+    requested = sum(o.quantity for o in legs)
+    if requested == 0 or total <= 0:
+        return [0] * len(legs)
+
+    total = min(total, requested)
+    exact = [o.quantity * total / requested for o in legs]
+    shares = [int(x) for x in exact]
+    remainders = sorted(range(len(legs)), key=lambda i: exact[i] - shares[i], reverse=True)
+    for i in remainders[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+def allocate_fill(net: NetOrder, fill: Optional[dict]) -> list[dict]:
+    """Split a net broker fill (or no fill) back into per-strategy fills.
+
+    Shares are split by `NetOrder.leg_shares`. Every allocation uses the
+    broker's fill price when there is one and the reference midpoint
+    otherwise, so crossed shares pay no spread.
+    """
+    price = fill["price"] if fill else net.reference_price
+
+    fills = []
+    for order, quantity in net.leg_shares(fill["quantity"] if fill else 0):
+        if quantity <= 0:
+            continue
+        allocated = {
+            "symbol": net.symbol,
+            "action": order.action.value,
+            "quantity": quantity,
+            "price": price,
+            "strategy": order.strategy_name
+        }
+        if fill and "order_id" in fill:
+            allocated["order_id"] = fill["order_id"]
+        fills.append(allocated)
+
+    return fills
+
+
+class NettingSession:
+    """Nets one cycle's orders, then routes broker fills back to the originating strategies."""
+
+    def __init__(
+        self,
+        orders: list[OrderRequest],
+        on_fill: Optional[Callable[[dict], None]] = None,
+        verbose: bool = True
+    ):
+        self.net_orders = {n.symbol: n for n in net_orders(orders)}
+        self.on_fill = on_fill
+        self.verbose = verbose
+        self.fills: list[dict] = []
+        self._allocated: set[str] = set()
+
+        order_count = sum(len(n.legs) for n in self.net_orders.values())
+        if verbose and order_count > len(self.broker_orders()):
+            print(f"    🔀 Netted {order_count} orders into {len(self.broker_orders())} broker orders")
+
+    def broker_orders(self) -> list[OrderRequest]:
+        """Orders that still need to be sent to the broker after netting."""
+        return [n.to_request() for n in self.net_orders.values() if n.quantity > 0]
+
+    def cross_internal(self):
+        """Allocate symbols whose orders offset exactly; they never reach the broker."""
+        for net in self.net_orders.values():
+            if net.quantity == 0:
+                self._allocate(net, None)
+
+    def handle_fill(self, fill: dict):
+        """Broker fill callback: split the net fill and pass each part on."""
+        net = self.net_orders.get(fill["symbol"])
+        if net and net.symbol not in self._allocated:
+            self._allocate(net, fill)
+
+    def finish(self):
+        """Allocate the internally crossed shares of orders the broker did not fill."""
+        for net in self.net_orders.values():
+            if net.symbol not in self._allocated:
+                self._allocate(net, None)
+
+    def _allocate(self, net: NetOrder, fill: Optional[dict]):
+        self._allocated.add(net.symbol)
+        for allocated in allocate_fill(net, fill):
+            if self.verbose and net.crossed:
+                print(f"    🔀 [{allocated['strategy']}] {allocated['action']} {allocated['quantity']} "
+                      f"{net.symbol} @ ${allocated['price']:.2f} (netted)")
+            self.fills.append(allocated)
+            if self.on_fill:
+                self.on_fill(allocated)
+
+
+def execute_netted(
+    broker,
+    orders: list[OrderRequest],
+    on_fill: Optional[Callable[[dict], None]] = None,
+    verbose: bool = True
+) -> list[dict]:
+    """Net a cycle's orders, execute the remainder and deliver per-strategy fills."""
+    session = NettingSession(orders, on_fill, verbose)
+    session.cross_internal()
+    if session.broker_orders():
+        broker.execute_trades(session.broker_orders(), on_fill=session.handle_fill)
+    session.finish()
+    return session.fills
+
+
+async def execute_netted_async(broker, orders: list[OrderRequest], on_fill: Optional[Callable[[dict], None]] = None) -> list[dict]:
+    """Async variant of `execute_netted` for use inside a running event loop."""
+    session = NettingSession(orders, on_fill)
+    session.cross_internal()
+    if session.broker_orders():
+        await broker.execute_trades_async(session.broker_orders(), on_fill=session.handle_fill)
+    session.finish()
+    return session.fills
@@ -0,0 +1,49 @@
+from strategies.base import BaseStrategy
+from tracker import Tracker
+
+
+def net_positions(tracker: Tracker) -> dict[str, int]:
+    """Shares per symbol summed over every strategy, as the account should hold them."""
+    totals: dict[str, int] = {}
+    for positions in tracker.positions.values():
+        for symbol, shares in positions.items():
+            totals[symbol] = totals.get(symbol, 0) + shares
+    return totals
+
+
+def reconcile(broker, tracker: Tracker, strategies: list[BaseStrategy], fix: bool = True) -> list[str]:
+    """Compare broker, tracker and strategy positions and report any drift.
+
+    Tracker is the persisted record of every fill, so strategy positions
+    that disagree with it are reset to the tracker's view when `fix` is set.
+    Broker drift is only reported: the account may hold shares the arena
+    did not trade.
+    """
+    drift = []
+
+    # Strategy state vs Tracker
+    for strategy in strategies:
+        tracked = {s: q for s, q in tracker.positions.get(strategy.name, {}).items() if q}
+        held = {s: q for s, q in strategy.positions.items() if q}
+        for symbol in sorted(set(tracked) | set(held)):
+            if tracked.get(symbol, 0) != held.get(symbol, 0):
+                drift.append(
+                    f"[{strategy.name}] {symbol}: strategy={held.get(symbol, 0)} "
+                    f"tracker={tracked.get(symbol, 0)}"
+                )
+        if fix and tracked != held:
+            strategy.positions = dict(tracked)
+
+    # Broker account vs the sum of all strategies in Tracker
+    if broker.connected:
+        for symbol, expected in sorted(net_positions(tracker).items()):
+            actual = broker.get_position(symbol)
+            if expected != actual:
+                drift.append(f"[Broker] {symbol}: account={actual} tracker={expected}")
+
+    if drift:
+        print(f"⚠️ Position drift detected ({len(drift)}):")
+        for line in drift:
+            print(f"    {line}")
+
+    return drift
@@ -0,0 +1,154 @@
+"""Re-run cycles recorded in the decision log through the current code.
+
+    python replay.py                              # every cycle in DECISION_LOG_FILE
+    python replay.py decision_log.bin --last 20 --strategy "Mean Reversion"
+    python replay.py --show-diffs 50
+
+Each strategy gets the state it had at the start of the recorded cycle and
+the exact MarketData it saw; Llama gets the recorded responses instead of
+calling the LLM. Decisions are diffed against the recorded ones, and decide
+times are compared per strategy, so a performance change can be checked
+for speed and unchanged behaviour on production cycles. Exits non-zero
+when any decision differs.
+"""
+import argparse
+import contextlib
+import io
+import time
+from collections import deque
+
+from decision_log import market_data_from_frame, prompt_hash, read_frames
+from strategies import STRATEGY_TYPES, build_strategies
+import config
+
+
+class RecordedLLMClient:
+    """Drop-in for `OpenAI` that answers with a call's recorded responses, in order."""
+
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+        self.pending: deque[tuple[str, str]] = deque()  # (prompt hash, response)
+        self.prompt_changes = 0
+
+    def create(self, messages: list[dict], **kwargs):
+        if not self.pending:
+            raise RuntimeError("no recorded LLM response for this request")
+        recorded_hash, response = self.pending.popleft()
+        if prompt_hash(messages) != recorded_hash:
+            self.prompt_changes += 1
+        message = type("Message", (), {"content": response})
+        choice = type("Choice", (), {"message": message})
+        return type("Completion", (), {"choices": [choice], "usage": None})
+
+
+def replay_frame(frame: dict, strategies: dict, only: str = None) -> tuple[list[tuple], dict]:
+    """Replay one recorded cycle. Returns (diffs, {strategy: (recorded s, replayed s)})."""
+    for name, state in frame["state"].items():
+        if name in strategies:
+            strategies[name].set_state(state)
+    market = market_data_from_frame(frame)
+
+    calls, decisions, llm = frame["calls"], frame["decisions"], frame["llm"]
+    recorded: dict[tuple[int, str], tuple] = {
+        (call, symbol): (action, quantity)
+        for call, symbol, action, quantity in zip(decisions["call"], decisions["symbol"],
+                                                  decisions["action"], decisions["quantity"])
+    }
+    responses: dict[tuple[str, str], deque] = {}
+    for name, symbol, digest, response in zip(llm["strategy"], llm["symbol"], llm["prompt_hash"], llm["response"]):
+        responses.setdefault((name, symbol), deque()).append((digest, response))
+
+    diffs, timings = [], {}
+    for call, (name, symbols, seconds) in enumerate(zip(calls["strategy"], calls["symbols"], calls["seconds"])):
+        strategy = strategies.get(name)
+        if strategy is None or (only and name != only):
+            continue
+        client = getattr(strategy, "client", None)
+        if isinstance(client, RecordedLLMClient):
+            client.pending = deque(r for s in symbols for r in responses.get((name, s), ()))
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            replayed = strategy.decide_batch({s: market[s] for s in symbols})
+        elapsed = time.perf_counter() - start
+
+        before, after = timings.get(name, (0.0, 0.0))
+        timings[name] = (before + seconds, after + elapsed)
+        for symbol in symbols:
+            decision = replayed.get(symbol)
+            now = (decision.action.value, decision.quantity) if decision else (None, None)
+            was = recorded.get((call, symbol), (None, None))
+            if now != was:
+                diffs.append((frame["cycle"], name, symbol, was, now))
+    return diffs, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded cycles and diff decisions and timings")
+    parser.add_argument("log", nargs="?", default=config.DECISION_LOG_FILE)
+    parser.add_argument("--last", type=int, help="only the last N recorded cycles")
+    parser.add_argument("--strategy", help="only replay this strategy")
+    parser.add_argument("--show-diffs", type=int, default=20, help="print at most this many differing decisions")
+    args = parser.parse_args()
+
+    frames = list(read_frames(args.log))
+    if args.last:
+        frames = frames[-args.last:]
+    if not frames:
+        print(f"No recorded cycles in {args.log}")
+        return
+
+    config.LLM_DECISION_LOG = ""  # Replayed responses are already logged
+    strategies, specs, diffs, timings = {}, None, [], {}
+    prompt_changes = 0
+    for frame in frames:
+        # Built from the recorded specs, and rebuilt only if they change
+        if frame["specs"] != specs:
+            prompt_changes += _prompt_changes(strategies)
+            specs = frame["specs"]
+            strategies = {s.name: s for s in build_strategies(specs, STRATEGY_TYPES)}
+            for strategy in strategies.values():
+                if hasattr(strategy, "client"):
+                    strategy.client = RecordedLLMClient()
+        frame_diffs, frame_timings = replay_frame(frame, strategies, args.strategy)
+        diffs.extend(frame_diffs)
+        for name, (recorded, replayed) in frame_timings.items():
+            before, after = timings.get(name, (0.0, 0.0))
+            timings[name] = (before + recorded, after + replayed)
+
+    print(f"📼 Replayed {len(frames)} cycles ({frames[0]['cycle']}-{frames[-1]['cycle']}) from {args.log}")
+    print(f"\n{'Strategy':<24}{'Recorded':>12}{'Replayed':>12}{'Change':>10}")
+    print("-" * 58)
+    for name, (recorded, replayed) in timings.items():
+        change = f"{replayed / recorded - 1:+.0%}" if recorded else "-"
+        print(f"{name:<24}{recorded * 1e3:>10.1f}ms{replayed * 1e3:>10.1f}ms{change:>10}")
+    print("(recorded times include LLM latency; replayed Llama answers from the log)")
+
+    stages: dict[str, float] = {}
+    for frame in frames:
+        for stage, t in ((frame["timings"] or {}).get("stages") or {}).items():
+            stages[stage] = stages.get(stage, 0.0) + t["busy"]
+    if stages:
+        print("Recorded stage time: " + ", ".join(f"{stage} {busy:.2f}s" for stage, busy in stages.items()))
+
+    prompt_changes += _prompt_changes(strategies)
+    if prompt_changes:
+        print(f"\n✏️ {prompt_changes} LLM prompts differ from the recorded ones (responses were replayed anyway)")
+
+    if not diffs:
+        print("\n✅ All decisions match")
+        return
+    print(f"\n⚠️ {len(diffs)} decisions differ:")
+    for cycle, name, symbol, was, now in diffs[:args.show_diffs]:
+        print(f"  cycle {cycle} [{name}] {symbol}: {was[0]} {was[1] or ''} -> {now[0]} {now[1] or ''}")
+    raise SystemExit(1)
+
+
+def _prompt_changes(strategies: dict) -> int:
+    return sum(s.client.prompt_changes for s in strategies.values()
+               if isinstance(getattr(s, "client", None), RecordedLLMClient))
+
+
+if __name__ == "__main__":
+    main()
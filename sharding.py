@@ -0,0 +1,383 @@
+import asyncio
+import multiprocessing
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from multiprocessing.connection import Connection
+from typing import Optional
+
+from broker import OrderRequest
+from data import fetch_market_data, build_market_data
+from engine import CycleEngine, StageTimer
+from indicators import IndicatorEngine
+from netting import execute_netted_async
+from strategies import build_strategies, subscriptions
+from strategies.base import Action, BaseStrategy, MarketData
+from tracing import CycleTrace, span
+import config
+
+
+# Messages are plain tuples to keep the pipe traffic small:
+#   coordinator -> worker: ("positions", {strategy: {symbol: shares}}), ("cycle",),
+#                          ("warmup",), ("fills", [(strategy, symbol, action, shares)]),
+#                          ("state",), ("restore", state), ("stop",)
+#   worker -> coordinator: ("ready",), ("result", orders, marks), ("state", state),
+#                          ("error", message)
+# where each order is (symbol, action, shares, strategy, reference_price, decided_at).
+
+
+def shard_of(symbol: str, shards: int) -> int:
+    """Stable shard assignment, the same in every process and run."""
+    return zlib.crc32(symbol.encode()) % shards
+
+
+# --- Worker side -------------------------------------------------------
+
+class ShardWorker:
+    """Fetching, indicators and decisions for one shard's symbols."""
+
+    def __init__(self, symbols: list[str], strategy_specs: list):
+        owned = set(symbols)
+        self.strategies: list[BaseStrategy] = []
+        for strategy in build_strategies(strategy_specs):
+            strategy.symbols = [s for s in strategy.symbols if s in owned]
+            if strategy.symbols:
+                self.strategies.append(strategy)
+        self.strategies_by_name = {s.name: s for s in self.strategies}
+        self.symbols = list(subscriptions(self.strategies))
+        self.indicators = IndicatorEngine()
+        self.pool = ThreadPoolExecutor(config.FETCH_CONCURRENCY)
+
+    def fetch(self) -> dict[str, MarketData]:
+        def fetch_one(symbol: str) -> Optional[MarketData]:
+            try:
+                since = self.indicators.resume_time(symbol)
+                return build_market_data(fetch_market_data(symbol, since), self.indicators)
+            except Exception as e:
+                print(f"Error fetching {symbol}: {e}")
+                return None
+
+        return {md.symbol: md for md in self.pool.map(fetch_one, self.symbols) if md}
+
+    def run_cycle(self) -> tuple[list[tuple], dict[str, float]]:
+        market = self.fetch()
+
+        calls = []
+        for strategy in self.strategies:
+            mine = {s: market[s] for s in strategy.symbols if s in market}
+            if strategy.blocking_decide:
+                calls.extend((strategy, {symbol: md}) for symbol, md in mine.items())
+            elif mine:
+                calls.append((strategy, mine))
+
+        orders = []
+        for batch in self.pool.map(lambda call: self.decide(*call), calls):
+            orders.extend(batch)
+        return orders, {symbol: md.current_price for symbol, md in market.items()}
+
+    def decide(self, strategy: BaseStrategy, market: dict[str, MarketData]) -> list[tuple]:
+        try:
+            decisions = strategy.decide_batch(market)
+        except Exception as e:
+            print(f"  [{strategy.name}] Error: {e}")
+            return []
+        return [
+            (symbol, d.action.value, d.quantity, strategy.name, market[symbol].current_price, time.time())
+            for symbol, d in decisions.items()
+            if d.action != Action.HOLD and d.quantity
+        ]
+
+    def apply_fills(self, fills: list[tuple]):
+        for strategy_name, symbol, action, shares in fills:
+            strategy = self.strategies_by_name.get(strategy_name)
+            if strategy:
+                strategy.on_fill(symbol, Action(action), shares)
+
+    def get_state(self) -> dict:
+        return {
+            "strategies": {s.name: s.get_state() for s in self.strategies},
+            "indicators": self.indicators.get_state(),
+        }
+
+    def set_state(self, state: dict):
+        for strategy in self.strategies:
+            if strategy.name in state["strategies"]:
+                strategy.set_state(state["strategies"][strategy.name])
+        self.indicators.set_state(state["indicators"])
+
+    def set_positions(self, positions: dict[str, dict[str, int]]):
+        for strategy in self.strategies:
+            held = positions.get(strategy.name, {})
+            strategy.positions = {s: q for s, q in held.items() if q and s in strategy.symbols}
+
+
+def _worker_main(symbols: list[str], strategy_specs: list, conn: Connection):
+    """Worker process entry point: serve coordinator requests until told to stop."""
+    worker = ShardWorker(symbols, strategy_specs)
+    conn.send(("ready",))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        kind = message[0]
+        if kind == "stop":
+            break
+        try:
+            if kind == "cycle":
+                orders, marks = worker.run_cycle()
+                conn.send(("result", orders, marks))
+            elif kind == "warmup":
+                worker.fetch()
+                conn.send(("ready",))
+            elif kind == "fills":
+                worker.apply_fills(message[1])
+            elif kind == "positions":
+                worker.set_positions(message[1])
+            elif kind == "state":
+                conn.send(("state", worker.get_state()))
+            elif kind == "restore":
+                worker.set_state(message[1])
+        except Exception as e:
+            if kind in ("cycle", "warmup", "state"):
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+            else:
+                print(f"Shard worker error handling {kind}: {e}")
+
+
+# --- Coordinator side --------------------------------------------------
+
+class Shard:
+    """Coordinator's handle on one worker process."""
+
+    def __init__(self, index: int, symbols: list[str]):
+        self.index = index
+        self.symbols = symbols
+        self.process: Optional[multiprocessing.Process] = None
+        self.conn: Optional[Connection] = None
+        self.restarts = 0
+
+
+class ShardedEngine(CycleEngine):
+    """Runs cycles across worker processes that each own a slice of the universe.
+
+    Workers fetch, compute indicators and decide for their symbols. This
+    process is the only writer: it merges the decisions, nets and executes
+    them on the one `Broker`, records fills in the one `Tracker` and sends
+    each fill back to the worker owning that symbol. A worker that dies or
+    stops responding is restarted and resynced from the tracker. Its symbols
+    are skipped for that cycle.
+    """
+
+    def __init__(
+        self,
+        arena,
+        workers: int = config.SHARD_WORKERS,
+        reply_timeout: float = config.SHARD_REPLY_TIMEOUT_SECONDS,
+        **kwargs
+    ):
+        super().__init__(arena, **kwargs)
+        self.reply_timeout = reply_timeout
+        self._context = multiprocessing.get_context("spawn")  # No forking of the IB event loop
+
+        buckets: list[list[str]] = [[] for _ in range(max(1, workers))]
+        for symbol in arena.subscriptions:
+            buckets[shard_of(symbol, len(buckets))].append(symbol)
+        self.shards = [Shard(i, symbols) for i, symbols in enumerate(buckets) if symbols]
+        self._shard_by_symbol = {s: shard for shard in self.shards for s in shard.symbols}
+        self._restored: dict[int, dict] = {}  # Checkpointed worker state, sent when each worker starts
+
+    # --- Worker lifecycle -----------------------------------------------
+
+    def _start_worker(self, shard: Shard):
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(shard.symbols, config.STRATEGIES, child),
+            name=f"arena-shard-{shard.index}",
+            daemon=True
+        )
+        process.start()
+        child.close()
+        shard.process, shard.conn = process, parent
+
+    def _stop_worker(self, shard: Shard):
+        if shard.conn is not None:
+            try:
+                shard.conn.send(("stop",))
+            except (OSError, ValueError):
+                pass
+            shard.conn.close()
+        if shard.process is not None:
+            shard.process.join(timeout=5)
+            if shard.process.is_alive():
+                shard.process.terminate()
+        shard.process, shard.conn = None, None
+
+    async def _ensure_workers(self):
+        """Start any worker that is not running and sync its positions from the tracker."""
+        starting = [s for s in self.shards if s.process is None or not s.process.is_alive()]
+        for shard in starting:
+            if shard.process is not None:
+                shard.restarts += 1
+                print(f"♻️ Restarting shard {shard.index} (restart #{shard.restarts})")
+                self._stop_worker(shard)
+            self._start_worker(shard)
+
+        async def sync(shard: Shard):
+            reply = await self._receive(shard, timeout=max(self.reply_timeout, 60))
+            if reply is None or reply[0] != "ready":
+                return
+            if shard.index in self._restored:
+                shard.conn.send(("restore", self._restored.pop(shard.index)))
+            owned = set(shard.symbols)
+            positions = {
+                strategy: {s: q for s, q in held.items() if s in owned}
+                for strategy, held in self.arena.tracker.positions.items()
+            }
+            shard.conn.send(("positions", positions))
+
+        await asyncio.gather(*(sync(shard) for shard in starting))
+
+    def _poll(self, shard: Shard, timeout: float) -> Optional[tuple]:
+        try:
+            if shard.conn.poll(timeout):
+                return shard.conn.recv()
+        except (EOFError, OSError):
+            pass
+        return None
+
+    async def _receive(self, shard: Shard, timeout: Optional[float] = None) -> Optional[tuple]:
+        """Next message from a worker, or None if it died or timed out (it will be restarted)."""
+        reply = await asyncio.to_thread(self._poll, shard, timeout or self.reply_timeout)
+        if reply is None:
+            print(f"❌ Shard {shard.index} ({len(shard.symbols)} symbols) is not responding")
+            if shard.process is not None and shard.process.is_alive():
+                shard.process.terminate()
+        return reply
+
+    async def _request(self, shard: Shard, message: tuple) -> Optional[tuple]:
+        try:
+            shard.conn.send(message)
+        except (OSError, ValueError):
+            print(f"❌ Shard {shard.index} pipe is closed")
+            return None
+        return await self._receive(shard)
+
+    def close(self):
+        for shard in self.shards:
+            self._stop_worker(shard)
+
+    def snapshot(self) -> dict:
+        """Each live worker's state, keyed by shard and tagged with its symbols.
+
+        Called between cycles (from `end_cycle`), when no other request is in flight.
+        """
+        shards = {}
+        for shard in self.shards:
+            if shard.conn is None:
+                continue
+            try:
+                shard.conn.send(("state",))
+                reply = self._poll(shard, 30)
+            except (OSError, ValueError):
+                reply = None
+            if reply and reply[0] == "state":
+                shards[shard.index] = {"symbols": shard.symbols, "state": reply[1]}
+        return {**super().snapshot(), "shards": shards}
+
+    def restore(self, state: dict):
+        super().restore(state)
+        # Only valid if the worker count (and so the symbol split) is unchanged
+        for shard in self.shards:
+            saved = state.get("shards", {}).get(shard.index)
+            if saved and saved["symbols"] == shard.symbols:
+                self._restored[shard.index] = saved["state"]
+
+    # --- Cycles ---------------------------------------------------------
+
+    async def warm_up(self):
+        print(f"\n🌅 Pre-open warmup for {len(self.arena.subscriptions)} symbols across {len(self.shards)} shards")
+        await self._ensure_workers()
+        await self.arena.broker.qualify_contracts_async(list(self.arena.subscriptions))
+        await asyncio.gather(*(self._request(shard, ("warmup",)) for shard in self.shards))
+
+    async def run_cycle(self) -> dict:
+        print(f"\n{'='*60}")
+        print(f"Trading Cycle: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ({len(self.shards)} shards)")
+        print(f"{'='*60}")
+
+        with CycleTrace():
+            timer = StageTimer()
+            await self._ensure_workers()
+
+            # Fan out: every worker fetches and decides for its own symbols
+            start = time.perf_counter()
+            with span("shards", count=len(self.shards)):
+                replies = await asyncio.gather(*(self._request(shard, ("cycle",)) for shard in self.shards))
+            timer.add("decide", start)
+
+            orders: list[OrderRequest] = []
+            marks: dict[str, float] = {}
+            for shard, reply in zip(self.shards, replies):
+                if reply is None:
+                    continue
+                if reply[0] == "error":
+                    print(f"❌ Shard {shard.index} cycle failed: {reply[1]}")
+                    continue
+                _, shard_orders, shard_marks = reply
+                marks.update(shard_marks)
+                orders.extend(
+                    OrderRequest(symbol, Action(action), shares, strategy, price, decided_at)
+                    for symbol, action, shares, strategy, price, decided_at in shard_orders
+                )
+            print(f"🧩 {len(marks)} symbols priced, {len(orders)} orders from {len(self.shards)} shards")
+
+            # Workers only send back orders, so those are the decisions the API sees
+            by_strategy: dict[str, dict[str, tuple]] = {}
+            for order in orders:
+                by_strategy.setdefault(order.strategy_name, {})[order.symbol] = (
+                    order.action.value, order.quantity, None, ""
+                )
+            for strategy_name, decisions in by_strategy.items():
+                self.arena.note_decisions(strategy_name, decisions)
+
+            # The simulated broker fills against the workers' prices rather than each order's own
+            if hasattr(self.arena.broker, "update_price"):
+                for symbol, price in marks.items():
+                    self.arena.broker.update_price(symbol, price)
+
+            # Single writer: net and execute everything, then record each fill
+            fills: list[dict] = []
+            if orders:
+                start = time.perf_counter()
+                with span("execute", orders=len(orders)):
+                    await execute_netted_async(self.arena.broker, orders, on_fill=fills.append)
+                timer.add("execute", start)
+
+            if fills:
+                start = time.perf_counter()
+                with span("record", fills=len(fills)):
+                    await asyncio.to_thread(lambda: [self.arena.record_fill(fill) for fill in fills])
+                timer.add("record", start)
+
+            # Workers keep their strategies' positions in step with the fills
+            by_shard: dict[Shard, list[tuple]] = {}
+            for fill in fills:
+                shard = self._shard_by_symbol.get(fill["symbol"])
+                if shard is not None:
+                    by_shard.setdefault(shard, []).append(
+                        (fill["strategy"], fill["symbol"], fill["action"], fill["quantity"])
+                    )
+            for shard, shard_fills in by_shard.items():
+                try:
+                    shard.conn.send(("fills", shard_fills))
+                except (OSError, ValueError):
+                    pass  # Resynced from the tracker when it restarts
+
+            self.last_timings = timer.summary()
+            self._print_timings(self.last_timings)
+            with span("end_cycle"):
+                await asyncio.to_thread(self.arena.end_cycle, marks)
+        return self.last_timings
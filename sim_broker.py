@@ -0,0 +1,219 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from strategies.base import Action, MarketData
+from broker import OrderRequest, FillCallback
+from metrics import ExecutionMetrics, FILLED, PARTIAL, TIMEOUT, REJECTED
+from tracing import traced
+import config
+
+
+@dataclass
+class FillModel:
+    """Knobs for the simulated matching model."""
+    latency_ms: float = config.SIM_LATENCY_MS  # Submit-to-fill delay reported on each fill
+    spread_bps: float = config.SIM_SPREAD_BPS  # Full bid/ask spread around the last price
+    slippage_bps: float = config.SIM_SLIPPAGE_BPS  # Max extra adverse move, drawn uniformly
+    partial_fill_prob: float = config.SIM_PARTIAL_FILL_PROB  # Chance an order only partly fills
+    reject_prob: float = config.SIM_REJECT_PROB  # Chance an order is rejected outright
+    realtime: bool = False  # Actually wait `latency_ms` (off for backtests and load tests)
+
+
+class SimulatedBroker:
+    """In-process broker with the same interface as `Broker`, for running without TWS.
+
+    Orders fill against the latest quote for the symbol (set with `update_price`
+    or `update_market_data`, falling back to the order's reference price),
+    crossing half the spread plus random slippage.
+    """
+
+    def __init__(
+        self,
+        fill_model: Optional[FillModel] = None,
+        starting_cash: float = config.SIM_STARTING_CASH,
+        seed: Optional[int] = None,
+        verbose: bool = True,
+        metrics: Optional[ExecutionMetrics] = None
+    ):
+        self.fill_model = fill_model or FillModel()
+        self.metrics = metrics
+        self.connected = False
+        self.cash = starting_cash
+        self.positions: dict[str, int] = {}  # symbol -> shares
+        self.last_prices: dict[str, float] = {}  # symbol -> last/mid price
+        self.verbose = verbose
+        self._rng = random.Random(seed)
+        self._next_order_id = 1
+
+    def connect(self) -> bool:
+        """Start the simulator (always succeeds)."""
+        self.connected = True
+        print("✅ Using simulated broker")
+        return True
+
+    def disconnect(self):
+        """Stop the simulator."""
+        self.connected = False
+
+    def seed_positions(self, positions: dict[str, int]):
+        """Start the simulated account holding `positions` (e.g. the tracker's, on restart)."""
+        self.positions = {symbol: shares for symbol, shares in positions.items() if shares}
+
+    def qualify_contracts(self, symbols: list[str]) -> int:
+        """Nothing to qualify locally; present for interface parity with `Broker`."""
+        return len(set(symbols))
+
+    async def qualify_contracts_async(self, symbols: list[str]) -> int:
+        return self.qualify_contracts(symbols)
+
+    def update_price(self, symbol: str, price: float):
+        """Set the latest price orders for `symbol` will be matched against."""
+        if price:
+            self.last_prices[symbol] = price
+
+    def update_market_data(self, market_data: MarketData):
+        """Set the latest price from a market data snapshot."""
+        self.update_price(market_data.symbol, market_data.current_price)
+
+    def execute_trade(
+        self,
+        symbol: str,
+        action: Action,
+        quantity: int,
+        strategy_name: str
+    ) -> Optional[dict]:
+        """Execute a single simulated trade."""
+        if action == Action.HOLD:
+            return None
+        return self.execute_trades([OrderRequest(symbol, action, quantity, strategy_name)])[0]
+
+    def execute_trades(
+        self,
+        orders: list[OrderRequest],
+        on_fill: Optional[FillCallback] = None,
+        timeout: float = config.ORDER_TIMEOUT_SECONDS
+    ) -> list[Optional[dict]]:
+        """Fill a batch of orders immediately (simulated latency is only reported).
+        
+        With `realtime` the latency is waited out on a fresh event loop; called
+        from inside a running loop (which cannot be re-entered) that loop runs
+        on a helper thread. Inside a loop prefer awaiting `execute_trades_async`.
+        """
+        if self.fill_model.realtime:
+            def batch() -> list[Optional[dict]]:
+                return asyncio.run(self.execute_trades_async(orders, on_fill, timeout))
+
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return batch()
+            with ThreadPoolExecutor(1) as pool:
+                return pool.submit(batch).result()
+
+        fills = []
+        for order in orders:
+            fill = self._match(order)
+            if fill and on_fill:
+                on_fill(fill)
+            fills.append(fill)
+        return fills
+
+    async def execute_trades_async(
+        self,
+        orders: list[OrderRequest],
+        on_fill: Optional[FillCallback] = None,
+        timeout: float = config.ORDER_TIMEOUT_SECONDS
+    ) -> list[Optional[dict]]:
+        """Fill a batch of orders concurrently, waiting out latency when `realtime` is set."""
+        async def run(order: OrderRequest) -> Optional[dict]:
+            latency = self.fill_model.latency_ms / 1000
+            if self.fill_model.realtime and latency > 0:
+                if latency > timeout:
+                    await asyncio.sleep(timeout)
+                    if self.verbose:
+                        print(f"    ⏱️ [SIM] {order.action.value} {order.quantity} {order.symbol} timed out - cancelled")
+                    if self.metrics:
+                        self.metrics.record(order, TIMEOUT, submitted_at=time.time() - timeout)
+                    return None
+                await asyncio.sleep(latency)
+            fill = self._match(order)
+            if fill and on_fill:
+                on_fill(fill)
+            return fill
+
+        return list(await asyncio.gather(*(run(order) for order in orders)))
+
+    @traced("SimulatedBroker.match")
+    def _match(self, order: OrderRequest) -> Optional[dict]:
+        """Match one order against the latest price using the fill model."""
+        if order.action == Action.HOLD or order.quantity <= 0:
+            return None
+
+        model = self.fill_model
+        rng = self._rng
+        submitted = time.time()
+
+        price = self.last_prices.get(order.symbol) or order.reference_price
+        if not price:
+            if self.verbose:
+                print(f"    ⚠️ [SIM] No price for {order.symbol} - rejected")
+            if self.metrics:
+                self.metrics.record(order, REJECTED, submitted_at=submitted)
+            return None
+
+        if model.reject_prob and rng.random() < model.reject_prob:
+            if self.verbose:
+                print(f"    ⚠️ [SIM] {order.action.value} {order.quantity} {order.symbol} rejected")
+            if self.metrics:
+                self.metrics.record(order, REJECTED, submitted_at=submitted)
+            return None
+
+        quantity = order.quantity
+        if model.partial_fill_prob and quantity > 1 and rng.random() < model.partial_fill_prob:
+            quantity = rng.randint(1, quantity - 1)
+
+        # Cross half the spread, then slip further against the order
+        side = 1 if order.action == Action.BUY else -1
+        adverse_bps = model.spread_bps / 2 + rng.uniform(0, model.slippage_bps)
+        fill_price = round(price * (1 + side * adverse_bps / 10_000), 2)
+
+        self.cash -= side * quantity * fill_price
+        self.positions[order.symbol] = self.positions.get(order.symbol, 0) + side * quantity
+
+        order_id = self._next_order_id
+        self._next_order_id += 1
+        filled_at = submitted + model.latency_ms / 1000
+
+        if self.metrics:
+            status = FILLED if quantity == order.quantity else PARTIAL
+            self.metrics.record(order, status, quantity, fill_price, submitted, submitted, filled_at)
+
+        if self.verbose:
+            partial = f" (partial, {order.quantity} requested)" if quantity < order.quantity else ""
+            print(f"    ✅ [SIM] [{order.strategy_name}] {order.action.value} {quantity} {order.symbol} "
+                  f"@ ${fill_price:.2f}{partial}")
+
+        return {
+            "symbol": order.symbol,
+            "action": order.action.value,
+            "quantity": quantity,
+            "price": fill_price,
+            "strategy": order.strategy_name,
+            "order_id": order_id,
+            "timestamp": filled_at
+        }
+
+    def get_position(self, symbol: str) -> int:
+        """Get current simulated position for a symbol."""
+        return self.positions.get(symbol, 0)
+
+    def get_account_value(self) -> float:
+        """Cash plus positions marked at the latest prices."""
+        return self.cash + sum(
+            shares * self.last_prices.get(symbol, 0.0)
+            for symbol, shares in self.positions.items()
+        )
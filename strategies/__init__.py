@@ -1,6 +1,8 @@
-from strategies.llm import LlamaStrategy
+from strategies.llm import LlamaStrategy, ReplayLlamaStrategy
 from strategies.buy_hold import BuyHoldStrategy
 from strategies.mean_reversion import MeanReversionStrategy
 from strategies.trend_following import TrendFollowingStrategy
+from strategies.registry import STRATEGY_TYPES, build_strategies, subscriptions
 
-__all__ = ["LlamaStrategy", "BuyHoldStrategy", "MeanReversionStrategy", "TrendFollowingStrategy"]
+__all__ = ["LlamaStrategy", "ReplayLlamaStrategy", "BuyHoldStrategy", "MeanReversionStrategy", "TrendFollowingStrategy",
+           "STRATEGY_TYPES", "build_strategies", "subscriptions"]
@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
+from collections import deque
 from dataclasses import dataclass
 from enum import Enum
 from typing import Optional
 
+import config
+
 
 class Action(Enum):
     BUY = "BUY"
@@ -23,6 +26,7 @@ class MarketData:
     rsi_14: Optional[float] = None
     sma_10: Optional[float] = None
     sma_50: Optional[float] = None
+    smas: Optional[dict[int, float]] = None  # Other precomputed SMAs by period (backtests)
 
 
 @dataclass
@@ -38,17 +42,48 @@ class Decision:
 class BaseStrategy(ABC):
     """Base class for all trading strategies."""
     
-    def __init__(self, name: str):
+    blocking_decide = False  # True if decide() does network I/O and should run off the event loop
+    streams_bars = False  # True if decide() only needs bar closes, so it can run on streamed bars
+    
+    def __init__(self, name: str, symbols: Optional[list[str]] = None):
         self.name = name
+        self.symbols = list(symbols) if symbols else self.default_symbols()  # Symbols this strategy trades
         self.positions: dict[str, int] = {}  # symbol -> shares (+ long, - short)
         self.cash: float = 100000.0  # Starting cash for tracking
-        self.trades: list[dict] = []
+        self.trades: deque[dict] = deque(maxlen=config.STRATEGY_TRADE_HISTORY)
     
     @abstractmethod
     def decide(self, market_data: MarketData) -> Decision:
         """Make a trading decision based on market data."""
         pass
     
+    def decide_batch(self, market_data: dict[str, MarketData]) -> dict[str, Decision]:
+        """Decide on several symbols at once. Override to share work across symbols."""
+        return {symbol: self.decide(md) for symbol, md in market_data.items()}
+    
+    def default_symbols(self) -> list[str]:
+        """Subscriptions used when none are configured."""
+        return [config.BENCHMARK_SYMBOL]
+    
+    def get_state(self) -> dict:
+        """Picklable snapshot of the strategy's state, for checkpoints."""
+        return {"positions": dict(self.positions), "cash": self.cash}
+    
+    def set_state(self, state: dict):
+        """Restore a snapshot taken by `get_state`."""
+        self.positions = dict(state.get("positions", {}))
+        self.cash = state.get("cash", self.cash)
+    
     def get_position(self, symbol: str) -> int:
         """Get current position for a symbol."""
         return self.positions.get(symbol, 0)
+    
+    def on_fill(self, symbol: str, action: Action, quantity: int):
+        """Update internal position tracking after one of our orders fills."""
+        current = self.positions.get(symbol, 0)
+        if action == Action.BUY:
+            self.positions[symbol] = current + quantity
+        else:
+            self.positions[symbol] = current - quantity
+        if not self.positions[symbol]:
+            del self.positions[symbol]  # Flat symbols would otherwise pile up over months
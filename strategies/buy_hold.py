@@ -1,3 +1,5 @@
+from typing import Optional
+
 from strategies.base import BaseStrategy, MarketData, Decision, Action
 import config
 
@@ -5,24 +7,25 @@ import config
 class BuyHoldStrategy(BaseStrategy):
     """Buy and hold SPY - the Boglehead benchmark."""
     
-    def __init__(self):
-        super().__init__("Buy & Hold SPY")
-        self.has_bought = False
+    def __init__(self, name: str = "Buy & Hold SPY", symbols: Optional[list[str]] = None):
+        super().__init__(name, symbols)
+        self.bought: set[str] = set()  # Symbols already bought
+    
+    def get_state(self) -> dict:
+        return {**super().get_state(), "bought": sorted(self.bought)}
+    
+    def set_state(self, state: dict):
+        super().set_state(state)
+        self.bought = set(state.get("bought", []))
     
     def decide(self, market_data: MarketData) -> Decision:
-        # Only trade SPY
-        if market_data.symbol != config.BENCHMARK_SYMBOL:
-            return Decision(
-                action=Action.HOLD,
-                symbol=market_data.symbol,
-                confidence=1.0,
-                reasoning="Buy & Hold only trades SPY",
-                strategy_name=self.name
-            )
+        # A position restored from the tracker counts as already bought
+        if self.get_position(market_data.symbol) > 0:
+            self.bought.add(market_data.symbol)
         
         # If we haven't bought yet, buy. Otherwise hold.
-        if not self.has_bought:
-            self.has_bought = True
+        if market_data.symbol not in self.bought:
+            self.bought.add(market_data.symbol)
             # Calculate shares based on position size
             shares = int(config.POSITION_SIZE_USD / market_data.current_price)
             return Decision(
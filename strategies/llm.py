@@ -1,37 +1,119 @@
 from openai import OpenAI
+from bisect import bisect_right
+from datetime import datetime
+from typing import Optional
 import json
 import re
+import threading
+import time
 
 from strategies.base import BaseStrategy, MarketData, Decision, Action
+from tracing import span, traced
+import decision_log
 import config
 
 
+# Everything that is the same for every request lives here, ahead of the
+# per-symbol data, so servers with prefix caching only prefill it once.
+SYSTEM_PROMPT = """You are an AI stock trader managing a portfolio. You analyze price data and news to make trading decisions on individual stocks.
+
+Each request describes one stock in this fixed layout ("-" means not available, prices in USD):
+SYMBOL  ticker
+PRICE   current price
+CHG     % change over the last 10 bars (15 min each) / over 5 days
+RANGE5D 5-day low-high
+RSI14   14-bar RSI
+SMA     10-bar / 50-bar simple moving averages, then bullish or bearish
+POS     shares you hold (their market value)
+NEWS    recent headlines, one per line
+
+Consider:
+- Recent price momentum and trends
+- News sentiment and catalysts
+- Technical levels (RSI, moving averages)
+- Risk management - don't chase, cut losers
+- Your current position in this stock
+
+Decide whether to BUY, SELL, or HOLD. You must respond with valid JSON in this exact format:
+{
+    "action": "BUY" | "SELL" | "HOLD",
+    "confidence": 0.0 to 1.0,
+    "reasoning": "Brief explanation of your decision (1-2 sentences)"
+}
+
+Be decisive but prudent. Respond ONLY with the JSON object."""
+
+HEADLINE_CHARS = 120  # Longer headlines are cut before any budget trimming
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for Llama-family tokenizers)."""
+    return (len(text) + 3) // 4
+
+
+def _round_sig(value: Optional[float], digits: int) -> str:
+    """`value` to `digits` significant figures, never in exponent notation ("-" if missing)."""
+    if not value:
+        return "-"
+    size = value if value > 0 else -value
+    if size < 10:
+        decimals = digits - 1 if size >= 1 else digits
+    elif size < 100:
+        decimals = digits - 2
+    elif size < 1000:
+        decimals = digits - 3
+    else:
+        decimals = digits - len(str(int(size)))
+    return "%.*f" % (decimals if decimals > 0 else 0, value)
+
+
 class LlamaStrategy(BaseStrategy):
     """Trading strategy powered by Llama 70B - picks stocks from S&P 500 universe."""
     
-    def __init__(self):
-        super().__init__("Llama-70B")
+    blocking_decide = True
+    
+    def __init__(self, name: str = "Llama-70B", symbols: Optional[list[str]] = None):
+        super().__init__(name, symbols)
         self.client = OpenAI(
             base_url=config.LLM_BASE_URL,
             api_key="not-needed"
         )
         self.portfolio_value = config.POSITION_SIZE_USD * 5  # Can hold up to 5 positions
+        self.prompt_usage = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0}
+        self._usage_lock = threading.Lock()  # decide() runs on several threads at once
+    
+    def default_symbols(self) -> list[str]:
+        return config.LLM_UNIVERSE[:5]  # Analyze top 5 stocks per cycle
     
+    @traced("LlamaStrategy.decide")
     def decide(self, market_data: MarketData) -> Decision:
         prompt = self._build_prompt(market_data)
+        estimated = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt)
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
         
         try:
-            response = self.client.chat.completions.create(
-                model=config.LLM_MODEL,
-                messages=[
-                    {"role": "system", "content": self._system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.3
-            )
+            with span("llm.request", symbol=market_data.symbol, estimated_tokens=estimated) as request_span:
+                response = self.client.chat.completions.create(
+                    model=config.LLM_MODEL,
+                    messages=messages,
+                    max_tokens=500,
+                    temperature=0.3
+                )
+                usage = self._record_usage(response, estimated)
+                if request_span is not None:
+                    request_span.attrs.update(usage)
             
-            return self._parse_response(response.choices[0].message.content, market_data)
+            print(f"  [{self.name}] {market_data.symbol} prompt: {usage['prompt_tokens']} tokens"
+                  + (f" ({usage['cached_tokens']} cached)" if usage["cached_tokens"] is not None else "")
+                  + ("" if usage["reported"] else " (estimated)"))
+            content = response.choices[0].message.content
+            decision_log.record_llm_exchange(self.name, market_data.symbol, messages, content)
+            if config.LLM_DECISION_LOG:
+                self._log_response(market_data, content)
+            return self._parse_response(content, market_data)
         
         except Exception as e:
             print(f"LLM error: {e}")
@@ -43,27 +125,41 @@ class LlamaStrategy(BaseStrategy):
                 strategy_name=self.name
             )
     
-    def _system_prompt(self) -> str:
-        return """You are an AI stock trader managing a portfolio. You analyze price data and news to make trading decisions on individual stocks.
-
-You must respond with valid JSON in this exact format:
-{
-    "action": "BUY" | "SELL" | "HOLD",
-    "confidence": 0.0 to 1.0,
-    "reasoning": "Brief explanation of your decision (1-2 sentences)"
-}
-
-Consider:
-- Recent price momentum and trends
-- News sentiment and catalysts
-- Technical levels (RSI, moving averages)
-- Risk management - don't chase, cut losers
-- Your current position in this stock
-
-Be decisive but prudent. Respond ONLY with the JSON object."""
-
-    def _build_prompt(self, data: MarketData) -> str:
-        # Calculate stats
+    def _record_usage(self, response, estimated: int) -> dict:
+        """Prompt tokens for one request (the server's count when it reports one), added to the running totals."""
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None)
+        with self._usage_lock:
+            self.prompt_usage["requests"] += 1
+            self.prompt_usage["prompt_tokens"] += prompt_tokens or estimated
+            self.prompt_usage["cached_tokens"] += cached_tokens or 0
+        return {
+            "prompt_tokens": prompt_tokens or estimated,
+            "cached_tokens": cached_tokens,
+            "reported": prompt_tokens is not None,
+        }
+    
+    def _log_response(self, market_data: MarketData, content: str):
+        """Append the raw response to the decision log so backtests can replay it."""
+        try:
+            with open(config.LLM_DECISION_LOG, "a") as f:
+                f.write(json.dumps({
+                    "time": time.time(),
+                    "symbol": market_data.symbol,
+                    "response": content
+                }) + "\n")
+        except OSError as e:
+            print(f"Failed to log LLM response: {e}")
+    
+    def _build_prompt(self, data: MarketData, budget: int = config.LLM_PROMPT_TOKEN_BUDGET) -> str:
+        """One symbol in the fixed layout described by the system prompt, within `budget` tokens.
+        
+        Over budget, numbers are first rounded to fewer significant digits,
+        then headlines are dropped from the end until it fits. A prompt that
+        fits is formatted only once.
+        """
         prices = data.prices_5d if data.prices_5d else data.prices_1d
         
         if len(prices) >= 2:
@@ -73,44 +169,44 @@ Be decisive but prudent. Respond ONLY with the JSON object."""
             change_recent = 0
             change_5d = 0
         
-        high_5d = max(prices) if prices else data.current_price
-        low_5d = min(prices) if prices else data.current_price
+        fields = {
+            "price": data.current_price,
+            "change_recent": change_recent,
+            "change_5d": change_5d,
+            "high_5d": max(prices) if prices else data.current_price,
+            "low_5d": min(prices) if prices else data.current_price,
+            "position": self.get_position(data.symbol),
+        }
+        headlines = [h[:HEADLINE_CHARS] for h in data.news_headlines[:5]]
         
-        # News section
-        news_section = ""
-        if data.news_headlines:
-            news_section = "\n\nRecent News:\n" + "\n".join(f"• {h}" for h in data.news_headlines[:5])
+        prompt = self._format_prompt(data, fields, 4, headlines)
+        if estimate_tokens(prompt) <= budget:
+            return prompt
         
-        # Current position
-        current_pos = self.get_position(data.symbol)
-        position_str = f"{current_pos} shares (${current_pos * data.current_price:,.0f})" if current_pos else "None"
-        
-        # Technical indicators
-        tech_section = ""
-        if data.rsi_14:
-            tech_section += f"\nRSI(14): {data.rsi_14:.1f}"
+        prompt = self._format_prompt(data, fields, 3, headlines)
+        while estimate_tokens(prompt) > budget and headlines:
+            headlines.pop()
+            prompt = self._format_prompt(data, fields, 3, headlines)
+        return prompt
+    
+    def _format_prompt(self, data: MarketData, fields: dict, digits: int, headlines: list[str]) -> str:
+        trend = "-"
         if data.sma_10 and data.sma_50:
-            tech_section += f"\nSMA(10): ${data.sma_10:.2f}, SMA(50): ${data.sma_50:.2f}"
-            if data.sma_10 > data.sma_50:
-                tech_section += " (bullish)"
-            else:
-                tech_section += " (bearish)"
+            trend = "bullish" if data.sma_10 > data.sma_50 else "bearish"
+        position = fields["position"]
         
-        return f"""Analyze {data.symbol} and decide whether to BUY, SELL, or HOLD.
-
-=== PRICE DATA ===
-Current Price: ${data.current_price:.2f}
-Recent Change (10 periods): {change_recent:+.2f}%
-5-Day Change: {change_5d:+.2f}%
-5-Day High: ${high_5d:.2f}
-5-Day Low: ${low_5d:.2f}
-{tech_section}
-
-=== YOUR POSITION ===
-Current holding: {position_str}
-{news_section}
-
-Make your trading decision as JSON."""
+        lines = [
+            f"SYMBOL {data.symbol}",
+            f"PRICE {_round_sig(fields['price'], digits)}",
+            f"CHG {fields['change_recent']:+.1f}% / {fields['change_5d']:+.1f}%",
+            f"RANGE5D {_round_sig(fields['low_5d'], digits)}-{_round_sig(fields['high_5d'], digits)}",
+            f"RSI14 {data.rsi_14:.0f}" if data.rsi_14 else "RSI14 -",
+            f"SMA {_round_sig(data.sma_10, digits)} / {_round_sig(data.sma_50, digits)} {trend}",
+            f"POS {position} ({position * data.current_price:.0f})" if position else "POS 0",
+            "NEWS",
+        ]
+        lines += [f"- {h}" for h in headlines] or ["-"]
+        return "\n".join(lines)
 
     def _parse_response(self, response: str, market_data: MarketData) -> Decision:
         try:
@@ -150,3 +246,50 @@ Make your trading decision as JSON."""
                 reasoning=f"Failed to parse response: {e}",
                 strategy_name=self.name
             )
+
+
+class ReplayLlamaStrategy(LlamaStrategy):
+    """Llama strategy that replays recorded responses instead of calling the LLM.
+    
+    Reads the JSON-lines log written when `config.LLM_DECISION_LOG` is set.
+    For each bar it uses the latest recorded response for that symbol made
+    at or before the bar time, each response at most once; bars without
+    one HOLD.
+    """
+    
+    blocking_decide = False
+    
+    def __init__(self, log_file: str, name: str = "Llama-70B", symbols: Optional[list[str]] = None):
+        super().__init__(name, symbols)
+        self.responses: dict[str, tuple[list[float], list[str]]] = {}  # symbol -> (times, responses)
+        with open(log_file) as f:
+            records = sorted((json.loads(line) for line in f if line.strip()), key=lambda r: r["time"])
+        for record in records:
+            times, responses = self.responses.setdefault(record["symbol"], ([], []))
+            times.append(record["time"])
+            responses.append(record["response"])
+        self._last_used: dict[str, int] = {}  # symbol -> index of the last replayed response
+    
+    def get_state(self) -> dict:
+        return {**super().get_state(), "last_used": dict(self._last_used)}
+    
+    def set_state(self, state: dict):
+        super().set_state(state)
+        self._last_used = dict(state.get("last_used", {}))
+    
+    def decide(self, market_data: MarketData) -> Decision:
+        times, responses = self.responses.get(market_data.symbol, ([], []))
+        bar_time = datetime.fromisoformat(market_data.timestamp).timestamp()
+        index = bisect_right(times, bar_time) - 1
+        
+        if index < 0 or index == self._last_used.get(market_data.symbol):
+            return Decision(
+                action=Action.HOLD,
+                symbol=market_data.symbol,
+                confidence=0.0,
+                reasoning="No recorded LLM decision for this bar",
+                strategy_name=self.name
+            )
+        
+        self._last_used[market_data.symbol] = index
+        return self._parse_response(responses[index], market_data)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from strategies.base import BaseStrategy, MarketData, Decision, Action
 import config
 
@@ -5,22 +7,20 @@ import config
 class MeanReversionStrategy(BaseStrategy):
     """Mean reversion strategy using RSI on SPY."""
     
-    def __init__(self, oversold: float = 30.0, overbought: float = 70.0):
-        super().__init__("Mean Reversion")
+    streams_bars = True
+    
+    def __init__(
+        self,
+        oversold: float = 30.0,
+        overbought: float = 70.0,
+        name: str = "Mean Reversion",
+        symbols: Optional[list[str]] = None
+    ):
+        super().__init__(name, symbols)
         self.oversold = oversold
         self.overbought = overbought
     
     def decide(self, market_data: MarketData) -> Decision:
-        # Only trade SPY
-        if market_data.symbol != config.BENCHMARK_SYMBOL:
-            return Decision(
-                action=Action.HOLD,
-                symbol=market_data.symbol,
-                confidence=0.0,
-                reasoning="Mean Reversion only trades SPY",
-                strategy_name=self.name
-            )
-        
         rsi = market_data.rsi_14
         
         if rsi is None:
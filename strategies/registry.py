@@ -0,0 +1,52 @@
+from typing import Callable, Union
+
+from strategies.base import BaseStrategy
+from strategies.llm import LlamaStrategy
+from strategies.buy_hold import BuyHoldStrategy
+from strategies.mean_reversion import MeanReversionStrategy
+from strategies.trend_following import TrendFollowingStrategy
+
+
+StrategySpec = Union[str, dict]
+
+# Registry type -> constructor taking name/symbols plus strategy parameters
+STRATEGY_TYPES: dict[str, Callable[..., BaseStrategy]] = {
+    "llama": LlamaStrategy,
+    "buy_hold": BuyHoldStrategy,
+    "mean_reversion": MeanReversionStrategy,
+    "trend_following": TrendFollowingStrategy,
+}
+
+
+def build_strategy(spec: StrategySpec, types: dict[str, Callable[..., BaseStrategy]] = STRATEGY_TYPES) -> BaseStrategy:
+    """Instantiate one strategy from a registry type name or a {"type": ..., **kwargs} dict."""
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    kwargs = dict(spec)
+    kind = kwargs.pop("type")
+    if kind not in types:
+        raise ValueError(f"Unknown strategy type '{kind}' (known: {', '.join(sorted(types))})")
+    return types[kind](**kwargs)
+
+
+def build_strategies(
+    specs: list[StrategySpec],
+    types: dict[str, Callable[..., BaseStrategy]] = STRATEGY_TYPES
+) -> list[BaseStrategy]:
+    """Instantiate every configured strategy. Names must be unique, since P&L is tracked by name."""
+    strategies = [build_strategy(spec, types) for spec in specs]
+    seen = set()
+    for strategy in strategies:
+        if strategy.name in seen:
+            raise ValueError(f"Duplicate strategy name '{strategy.name}' - give each variant a \"name\"")
+        seen.add(strategy.name)
+    return strategies
+
+
+def subscriptions(strategies: list[BaseStrategy]) -> dict[str, list[BaseStrategy]]:
+    """Symbol -> strategies subscribed to it, in configuration order."""
+    by_symbol: dict[str, list[BaseStrategy]] = {}
+    for strategy in strategies:
+        for symbol in strategy.symbols:
+            by_symbol.setdefault(symbol, []).append(strategy)
+    return by_symbol
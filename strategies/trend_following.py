@@ -1,29 +1,56 @@
+from typing import Optional
+
 from strategies.base import BaseStrategy, MarketData, Decision, Action
+import data
 import config
 
 
 class TrendFollowingStrategy(BaseStrategy):
     """Trend following strategy using SMA crossover on SPY."""
     
-    def __init__(self):
-        super().__init__("Trend Following")
-        self.was_bullish = None  # Track previous state to avoid constant trading
+    streams_bars = True
+    
+    def __init__(
+        self,
+        fast_period: int = 10,
+        slow_period: int = 50,
+        name: str = "Trend Following",
+        symbols: Optional[list[str]] = None
+    ):
+        if slow_period > config.MAX_SMA_PERIOD:
+            raise ValueError(f"slow_period {slow_period} needs more history than live data has "
+                             f"(MAX_SMA_PERIOD is {config.MAX_SMA_PERIOD})")
+        super().__init__(name, symbols)
+        self.fast_period = fast_period
+        self.slow_period = slow_period
+        self.was_bullish: dict[str, bool] = {}  # Previous state per symbol to avoid constant trading
+    
+    def get_state(self) -> dict:
+        return {**super().get_state(), "was_bullish": dict(self.was_bullish)}
+    
+    def set_state(self, state: dict):
+        super().set_state(state)
+        self.was_bullish = dict(state.get("was_bullish", {}))
+    
+    @property
+    def sma_periods(self) -> tuple[int, int]:
+        return self.fast_period, self.slow_period
+    
+    def _moving_averages(self, market_data: MarketData):
+        """Fast/slow SMAs, using precomputed values when the snapshot has them."""
+        if (self.fast_period, self.slow_period) == (10, 50):
+            return market_data.sma_10, market_data.sma_50
+        smas = market_data.smas
+        if smas and self.fast_period in smas and self.slow_period in smas:
+            return smas[self.fast_period], smas[self.slow_period]
+        prices = market_data.prices_5d if market_data.prices_5d else market_data.prices_1d
+        return data.calculate_sma(prices, self.fast_period), data.calculate_sma(prices, self.slow_period)
     
     def decide(self, market_data: MarketData) -> Decision:
-        # Only trade SPY
-        if market_data.symbol != config.BENCHMARK_SYMBOL:
-            return Decision(
-                action=Action.HOLD,
-                symbol=market_data.symbol,
-                confidence=0.0,
-                reasoning="Trend Following only trades SPY",
-                strategy_name=self.name
-            )
-        
-        sma_10 = market_data.sma_10
-        sma_50 = market_data.sma_50
+        fast, slow = self.fast_period, self.slow_period
+        sma_fast, sma_slow = self._moving_averages(market_data)
         
-        if sma_10 is None or sma_50 is None:
+        if sma_fast is None or sma_slow is None:
             return Decision(
                 action=Action.HOLD,
                 symbol=market_data.symbol,
@@ -35,45 +62,46 @@ class TrendFollowingStrategy(BaseStrategy):
         current_position = self.get_position(market_data.symbol)
         shares = int(config.POSITION_SIZE_USD / market_data.current_price)
         
-        is_bullish = sma_10 > sma_50
+        is_bullish = sma_fast > sma_slow
+        was_bullish = self.was_bullish.get(market_data.symbol)
         
         # Only trade on crossover (state change)
-        if is_bullish and self.was_bullish == False:
+        if is_bullish and was_bullish == False:
             # Bullish crossover - go long
-            self.was_bullish = True
+            self.was_bullish[market_data.symbol] = True
             if current_position <= 0:
                 return Decision(
                     action=Action.BUY,
                     symbol=market_data.symbol,
                     confidence=0.8,
-                    reasoning=f"Bullish crossover: SMA(10)={sma_10:.2f} crossed above SMA(50)={sma_50:.2f}",
+                    reasoning=f"Bullish crossover: SMA({fast})={sma_fast:.2f} crossed above SMA({slow})={sma_slow:.2f}",
                     strategy_name=self.name,
                     quantity=shares
                 )
         
-        elif not is_bullish and self.was_bullish == True:
+        elif not is_bullish and was_bullish == True:
             # Bearish crossover - exit long
-            self.was_bullish = False
+            self.was_bullish[market_data.symbol] = False
             if current_position > 0:
                 return Decision(
                     action=Action.SELL,
                     symbol=market_data.symbol,
                     confidence=0.8,
-                    reasoning=f"Bearish crossover: SMA(10)={sma_10:.2f} crossed below SMA(50)={sma_50:.2f}",
+                    reasoning=f"Bearish crossover: SMA({fast})={sma_fast:.2f} crossed below SMA({slow})={sma_slow:.2f}",
                     strategy_name=self.name,
                     quantity=current_position
                 )
         
         # Initialize state on first run
-        if self.was_bullish is None:
-            self.was_bullish = is_bullish
+        if was_bullish is None:
+            self.was_bullish[market_data.symbol] = is_bullish
             # Enter position if already bullish
             if is_bullish and current_position <= 0:
                 return Decision(
                     action=Action.BUY,
                     symbol=market_data.symbol,
                     confidence=0.6,
-                    reasoning=f"Initial entry: SMA(10)={sma_10:.2f} > SMA(50)={sma_50:.2f}, trend is bullish",
+                    reasoning=f"Initial entry: SMA({fast})={sma_fast:.2f} > SMA({slow})={sma_slow:.2f}, trend is bullish",
                     strategy_name=self.name,
                     quantity=shares
                 )
@@ -83,6 +111,6 @@ class TrendFollowingStrategy(BaseStrategy):
             action=Action.HOLD,
             symbol=market_data.symbol,
             confidence=0.5,
-            reasoning=f"No crossover - maintaining {trend} stance. SMA(10)={sma_10:.2f}, SMA(50)={sma_50:.2f}",
+            reasoning=f"No crossover - maintaining {trend} stance. SMA({fast})={sma_fast:.2f}, SMA({slow})={sma_slow:.2f}",
             strategy_name=self.name
         )
@@ -0,0 +1,232 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from indicators import IndicatorEngine
+from strategies import subscriptions
+from strategies.base import Action, MarketData
+from netting import execute_netted_async
+from sim_broker import SimulatedBroker
+from tracker import Tracker
+import config
+
+
+BarCallback = Callable[[str, float, float], None]  # (symbol, bar start in epoch seconds, close)
+
+
+class BarAggregator:
+    """Rolls fixed-length source bars (IB's 5-second real-time bars) up into decision bars.
+
+    A decision bar is complete as soon as its last source bar arrives, or
+    failing that, when the first source bar of the next one does.
+    """
+
+    def __init__(self, bar_seconds: int, source_seconds: int = 5):
+        self.bar_seconds = bar_seconds
+        self.source_seconds = source_seconds
+        self._open: dict[str, tuple[float, float]] = {}  # symbol -> (bar start, latest close)
+
+    def add(self, symbol: str, bar_time: float, close: float) -> list[tuple[float, float]]:
+        """Ingest a source bar; returns the (bar start, close) of any decision bars it completed."""
+        start = bar_time - bar_time % self.bar_seconds
+        completed = []
+        current = self._open.get(symbol)
+        if current is not None:
+            if start < current[0]:
+                return []  # Late source bar for a bar already closed
+            if start > current[0]:
+                completed.append(current)  # Missed the closing source bar
+        if bar_time + self.source_seconds >= start + self.bar_seconds:
+            completed.append((start, close))
+            self._open.pop(symbol, None)
+        else:
+            self._open[symbol] = (start, close)
+        return completed
+
+
+class IBBarFeed:
+    """5-second real-time bars over the broker's ib_insync connection.
+
+    Regular trading hours only by default, so strategies never decide on
+    pre-market or after-hours bars.
+    """
+
+    source_seconds = 5  # The only size reqRealTimeBars supports
+    synthetic = False
+
+    def __init__(self, broker, what_to_show: str = "TRADES", use_rth: bool = True):
+        self.broker = broker
+        self.what_to_show = what_to_show
+        self.use_rth = use_rth
+        self._subscriptions = []
+
+    async def start(self, symbols: list[str], on_bar: BarCallback):
+        for symbol in symbols:
+            contract = await self.broker._get_contract(symbol)
+            if contract is None:
+                print(f"⚠️ No contract for {symbol}; not streaming it")
+                continue
+            bars = self.broker.ib.reqRealTimeBars(contract, self.source_seconds, self.what_to_show, self.use_rth)
+
+            def on_update(bars, has_new_bar, symbol=symbol):
+                if has_new_bar:
+                    on_bar(symbol, bars[-1].time.timestamp(), bars[-1].close)
+
+            bars.updateEvent += on_update
+            self._subscriptions.append(bars)
+
+    def stop(self):
+        for bars in self._subscriptions:
+            try:
+                self.broker.ib.cancelRealTimeBars(bars)
+            except Exception:
+                pass
+        self._subscriptions = []
+
+
+class FakeBarFeed:
+    """Local stand-in for `IBBarFeed`: random-walk 5-second bars on a simulated clock.
+
+    Emits one bar per symbol every `interval` real seconds (the default is
+    real time; 0 runs as fast as the event loop allows), stopping after
+    `max_bars` rounds if given. Its prices are made up, so `BarStream` keeps
+    them out of the arena's marks, broker prices and indicators.
+    """
+
+    source_seconds = 5
+    synthetic = True
+
+    def __init__(
+        self,
+        start_prices: Optional[dict[str, float]] = None,
+        start_time: Optional[float] = None,
+        interval: float = 5.0,
+        max_bars: Optional[int] = None,
+        seed: int = 0,
+        price_source: Optional[Callable[[str], float]] = None
+    ):
+        self.prices = dict(start_prices or {})
+        self.price_source = price_source
+        self.clock = start_time if start_time is not None else time.time() // self.source_seconds * self.source_seconds
+        self.interval = interval
+        self.max_bars = max_bars
+        self.rng = random.Random(seed)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, symbols: list[str], on_bar: BarCallback):
+        missing = [s for s in symbols if not self.prices.get(s)]
+        if self.price_source and missing:
+            quotes = await asyncio.gather(*(asyncio.to_thread(self.price_source, s) for s in missing),
+                                          return_exceptions=True)
+            for symbol, quote in zip(missing, quotes):
+                if isinstance(quote, (int, float)) and quote > 0:
+                    self.prices[symbol] = quote
+        self._task = asyncio.ensure_future(self._run(symbols, on_bar))
+
+    async def _run(self, symbols: list[str], on_bar: BarCallback):
+        rounds = 0
+        while self.max_bars is None or rounds < self.max_bars:
+            for symbol in symbols:
+                price = self.prices.get(symbol, 100.0) * (1 + self.rng.gauss(0, 0.0005))
+                self.prices[symbol] = price
+                on_bar(symbol, self.clock, price)
+            self.clock += self.source_seconds
+            rounds += 1
+            await asyncio.sleep(self.interval)
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+class BarStream:
+    """Runs bar-driven strategies the moment each decision bar closes.
+
+    Real streamed bars feed the cycle engine's `IndicatorEngine`, so the
+    rolling windows seeded by cycle fetches stay current between cycles,
+    and update the arena's marks and broker prices. Synthetic bars trade
+    on their own simulated broker and tracker instead of the arena's. Strategies
+    with `streams_bars` decide here instead of in the cycle, while the LLM
+    keeps its slower cycle schedule.
+    """
+
+    def __init__(self, arena, feed, bar_seconds: int = config.DECISION_INTERVAL_MINUTES * 60):
+        self.arena = arena
+        self.feed = feed
+        # Synthetic bars get their own indicator windows, never the engine's
+        self.indicators = IndicatorEngine() if feed.synthetic else arena.engine.indicators
+        self.broker = arena.broker
+        self.tracker: Optional[Tracker] = None  # Fills of synthetic bars; real ones go to the arena
+        if feed.synthetic:
+            self.broker = SimulatedBroker(verbose=False)
+            self.broker.connect()
+            self.tracker = Tracker(persist=False)
+        self.bar_seconds = bar_seconds
+        self.aggregator = BarAggregator(bar_seconds, feed.source_seconds)
+        self.routes = subscriptions([s for s in arena.strategies if s.streams_bars])
+        self.last_closed: dict[str, float] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self):
+        await self.feed.start(list(self.routes), self.on_bar)
+        print(f"📡 Streaming {self.bar_seconds // 60}-min bars for {len(self.routes)} symbols "
+              f"({type(self.feed).__name__})")
+
+    def stop(self):
+        self.feed.stop()
+        for task in self._tasks:
+            task.cancel()
+
+    def on_bar(self, symbol: str, bar_time: float, close: float):
+        for start, bar_close in self.aggregator.add(symbol, bar_time, close):
+            if start <= self.last_closed.get(symbol, float("-inf")):
+                continue
+            self.last_closed[symbol] = start
+            task = asyncio.ensure_future(self.on_bar_close(symbol, start, bar_close))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def on_bar_close(self, symbol: str, start: float, close: float):
+        """Update indicators, run the symbol's streaming subscribers, then net, execute and record."""
+        indicators = self.indicators
+        indicators.add_bar(symbol, start, close)
+        closes = list(indicators.bars[symbol].closes)
+        rsi_14, sma_10, sma_50 = indicators.get(symbol)
+        market_data = MarketData(
+            symbol=symbol,
+            current_price=close,
+            prices_1d=closes[-26:],
+            prices_5d=closes[-130:],
+            news_headlines=[],
+            timestamp=datetime.fromtimestamp(start + self.bar_seconds).isoformat(),
+            rsi_14=rsi_14,
+            sma_10=sma_10,
+            sma_50=sma_50
+        )
+
+        if not self.feed.synthetic:
+            with self.arena.state_lock:
+                self.arena.marks[symbol] = close
+                self.arena.state_version += 1
+        if hasattr(self.broker, "update_market_data"):
+            self.broker.update_market_data(market_data)
+
+        orders = []
+        for strategy in self.routes.get(symbol, []):
+            orders.extend(self.arena.run_strategy(strategy, {symbol: market_data}))
+        if not orders:
+            return
+        fills: list[dict] = []
+        try:
+            await execute_netted_async(self.broker, orders, on_fill=fills.append)
+        except Exception as e:
+            print(f"Error executing streamed orders for {symbol}: {e}")
+        for fill in fills:
+            if self.tracker is not None:
+                self.tracker.record_trade(fill["strategy"], fill["symbol"], Action(fill["action"]),
+                                          fill["quantity"], fill["price"])
+            else:
+                await asyncio.to_thread(self.arena.record_fill, fill)
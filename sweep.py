@@ -0,0 +1,216 @@
+"""Grid or random parameter sweeps for the rule-based strategies.
+
+    python sweep.py mean_reversion                      # full grid on SPY
+    python sweep.py trend_following --random 2000 --rank sharpe
+"""
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+from backtest import bars_path
+from data import load_bars, rolling_rsi, rolling_sma
+import config
+
+
+BARS_PER_YEAR = 252 * 26  # 15-minute bars in a regular session
+
+PARAM_SPACES = {
+    "mean_reversion": {
+        "oversold": list(range(10, 50, 2)),
+        "overbought": list(range(50, 92, 2)),
+    },
+    "trend_following": {
+        "fast_period": list(range(2, 60, 2)),
+        "slow_period": list(range(10, config.MAX_SMA_PERIOD + 1, 5)),  # Only what live data can compute
+    },
+}
+
+
+def _valid(kind: str, params: dict) -> bool:
+    if kind == "mean_reversion":
+        return params["oversold"] < params["overbought"]
+    return params["fast_period"] < params["slow_period"]
+
+
+def grid(kind: str) -> list[dict]:
+    """Every valid combination in the strategy's parameter space."""
+    space = PARAM_SPACES[kind]
+    combos = (dict(zip(space, values)) for values in itertools.product(*space.values()))
+    return [p for p in combos if _valid(kind, p)]
+
+
+def random_search(kind: str, n: int, seed: Optional[int] = None) -> list[dict]:
+    """`n` distinct random combinations (fewer if the space is smaller)."""
+    candidates = grid(kind)
+    return random.Random(seed).sample(candidates, min(n, len(candidates)))
+
+
+# --- Worker side -------------------------------------------------------
+
+_shm: Optional[shared_memory.SharedMemory] = None
+_prices: Optional[np.ndarray] = None
+_cache: dict = {}  # Indicator arrays reused across tasks in one worker
+
+
+def _attach(name: str, length: int):
+    """Process pool initializer: map the shared price array read-only, without copying."""
+    global _shm, _prices
+    _shm = shared_memory.SharedMemory(name=name)
+    _prices = np.ndarray((length,), dtype=np.float64, buffer=_shm.buf)
+    _prices.flags.writeable = False
+    _cache.clear()
+
+
+def _indicator(key: tuple, compute) -> np.ndarray:
+    if key not in _cache:
+        _cache[key] = compute()
+    return _cache[key]
+
+
+def _forward_fill(events: np.ndarray) -> np.ndarray:
+    """Carry the last non-zero event forward (0 before the first one)."""
+    index = np.where(events != 0, np.arange(len(events)), -1)
+    np.maximum.accumulate(index, out=index)
+    return np.where(index >= 0, events[np.maximum(index, 0)], 0)
+
+
+def mean_reversion_long(prices: np.ndarray, oversold: float, overbought: float) -> np.ndarray:
+    """Bars on which MeanReversionStrategy is long: bought below oversold, not yet sold above overbought."""
+    rsi = _indicator(("rsi", 14), lambda: rolling_rsi(prices, 14))
+    events = np.where(rsi < oversold, 1, np.where(rsi > overbought, -1, 0))
+    return _forward_fill(events) == 1
+
+
+def trend_following_long(prices: np.ndarray, fast_period: int, slow_period: int) -> np.ndarray:
+    """Bars on which TrendFollowingStrategy is long: whenever the fast SMA is above the slow one."""
+    fast = _indicator(("sma", fast_period), lambda: rolling_sma(prices, fast_period))
+    slow = _indicator(("sma", slow_period), lambda: rolling_sma(prices, slow_period))
+    return fast > slow  # NaN compares False, matching HOLD without enough history
+
+
+SIGNALS = {
+    "mean_reversion": mean_reversion_long,
+    "trend_following": trend_following_long,
+}
+
+
+def score(prices: np.ndarray, long: np.ndarray, cost_bps: float) -> dict:
+    """Return, max drawdown and annualized Sharpe of a fixed-dollar long/flat position."""
+    size = config.POSITION_SIZE_USD
+    idx = np.arange(len(prices))
+
+    # Shares are sized at entry, as the strategies do, and held until exit
+    entered = long & ~np.concatenate(([False], long[:-1]))
+    entry_index = np.where(entered, idx, -1)
+    np.maximum.accumulate(entry_index, out=entry_index)
+    shares = np.where(long, np.floor(size / prices[np.maximum(entry_index, 0)]), 0.0)
+
+    pnl = np.zeros(len(prices))
+    pnl[1:] = shares[:-1] * np.diff(prices)
+    traded = np.abs(np.diff(shares, prepend=0.0))
+    pnl -= traded * prices * cost_bps / 10_000
+
+    equity = size + np.cumsum(pnl)
+    peak = np.maximum.accumulate(equity)
+    returns = pnl / size
+    std = returns.std()
+
+    return {
+        "return": float(equity[-1] / size - 1),
+        "max_drawdown": float(((peak - equity) / peak).max()),
+        "sharpe": float(returns.mean() / std * np.sqrt(BARS_PER_YEAR)) if std > 0 else 0.0,
+        "trades": int(np.count_nonzero(traded)),
+    }
+
+
+def evaluate(kind: str, params: dict, cost_bps: float) -> dict:
+    """Score one parameter combination against the shared prices."""
+    long = SIGNALS[kind](_prices, **params)
+    return {**params, **score(_prices, long, cost_bps)}
+
+
+def _evaluate_chunk(kind: str, chunk: list[dict], cost_bps: float) -> list[dict]:
+    return [evaluate(kind, params, cost_bps) for params in chunk]
+
+
+# --- Driver ------------------------------------------------------------
+
+RANK_KEYS = {
+    "return": (lambda r: r["return"], True),
+    "drawdown": (lambda r: r["max_drawdown"], False),
+    "sharpe": (lambda r: r["sharpe"], True),
+}
+
+
+def run_sweep(
+    kind: str,
+    prices: np.ndarray,
+    combos: list[dict],
+    workers: Optional[int] = None,
+    cost_bps: float = config.SIM_SPREAD_BPS / 2 + config.SIM_SLIPPAGE_BPS / 2
+) -> list[dict]:
+    """Evaluate every combination across a process pool sharing one copy of the prices."""
+    workers = workers or os.cpu_count() or 1
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(prices.nbytes, 1))
+    try:
+        np.ndarray(prices.shape, dtype=np.float64, buffer=shm.buf)[:] = prices
+
+        # Chunks sized so every worker gets several, each reusing its cached indicators
+        chunk_size = max(1, len(combos) // (workers * 4))
+        chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+
+        with ProcessPoolExecutor(workers, initializer=_attach, initargs=(shm.name, len(prices))) as pool:
+            futures = [pool.submit(_evaluate_chunk, kind, chunk, cost_bps) for chunk in chunks]
+            return [r for f in futures for r in f.result()]
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def rank(results: list[dict], by: str = "sharpe") -> list[dict]:
+    key, descending = RANK_KEYS[by]
+    return sorted(results, key=key, reverse=descending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter sweep for rule-based strategies")
+    parser.add_argument("strategy", choices=sorted(PARAM_SPACES))
+    parser.add_argument("--symbol", default=config.BENCHMARK_SYMBOL)
+    parser.add_argument("--random", type=int, metavar="N", help="sample N combinations instead of the full grid")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--rank", choices=sorted(RANK_KEYS), default="sharpe")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    path = bars_path(args.symbol)
+    if not path.exists():
+        print(f"⚠️ No stored bars for {args.symbol} at {path} (see backtest.py --download)")
+        return
+    _, prices = load_bars(str(path))
+
+    combos = random_search(args.strategy, args.random, args.seed) if args.random else grid(args.strategy)
+    started = time.perf_counter()
+    results = run_sweep(args.strategy, prices, combos, args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n🔬 {len(results):,} {args.strategy} combinations over {len(prices):,} bars "
+          f"in {elapsed:.1f}s (ranked by {args.rank})")
+    param_names = list(PARAM_SPACES[args.strategy])
+    header = "".join(f"{name:>14}" for name in param_names)
+    print(f"{header}{'Return':>10}{'Max DD':>10}{'Sharpe':>9}{'Trades':>8}")
+    for r in rank(results, args.rank)[:args.top]:
+        values = "".join(f"{r[name]:>14}" for name in param_names)
+        print(f"{values}{r['return']:>10.2%}{r['max_drawdown']:>10.2%}{r['sharpe']:>9.2f}{r['trades']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from api import StateAPI
+from strategies.base import Action
+from tracker import Tracker
+
+
+@pytest.fixture
+def arena(tmp_path):
+    tracker = Tracker(str(tmp_path / "arena_data.json"), persist=False)
+    tracker.record_trade("Mean Reversion", "SPY", Action.BUY, 10, 100.0)
+    return SimpleNamespace(
+        tracker=tracker,
+        marks={"SPY": 101.0},
+        cycle_count=1,
+        state_version=1,
+        state_lock=threading.RLock(),
+        decisions=deque(),
+        cycle_timings=deque(),
+        memory_report=None,
+    )
+
+
+@pytest.fixture
+def api(arena):
+    api = StateAPI(arena, host="127.0.0.1", port=0)
+    api.start()
+    yield api
+    api.stop()
+
+
+def _get(api, path, etag=None):
+    request = urllib.request.Request(f"http://127.0.0.1:{api.port}{path}")
+    if etag:
+        request.add_header("If-None-Match", etag)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers["ETag"], json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers["ETag"], None
+
+
+def test_unchanged_state_revalidates_with_304(api):
+    status, etag, body = _get(api, "/marks")
+    assert status == 200 and body == {"cycle": 1, "marks": {"SPY": 101.0}}
+    assert _get(api, "/marks", etag)[:2] == (304, etag)
+
+
+def test_new_state_version_changes_body_and_etag(api, arena):
+    _, etag, _ = _get(api, "/leaderboard")
+    with arena.state_lock:
+        arena.marks["SPY"] = 111.0
+        arena.state_version += 1
+    status, new_etag, body = _get(api, "/leaderboard", etag)
+    assert status == 200 and new_etag != etag
+    assert body[0]["unrealized_pnl"] == pytest.approx(110.0)
+
+
+def test_body_is_cached_per_version(api, arena):
+    body, etag = api.response("marks")
+    arena.marks["SPY"] = 999.0  # Not a real update: the version did not move
+    assert api.response("marks") == (body, etag)
+
+
+def test_unknown_endpoint_is_404(api):
+    assert _get(api, "/nope")[0] == 404
@@ -0,0 +1,83 @@
+import json
+import tracemalloc
+
+import pytest
+
+import config
+from benchmarks.stubs import StubMarketData
+from checkpoint import load_checkpoint
+from memory import MemoryReporter
+from trade_store import TradeStore
+
+
+@pytest.fixture
+def arena(tmp_path, monkeypatch):
+    """A sim-broker arena writing its data files (journal, trade index) under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    for name, value in {
+        "BROKER_MODE": "sim",
+        "STRATEGIES": ["buy_hold"],
+        "TRACKER_HOT_TRADES": 2,
+        "API_PORT": 0,
+        "DECISION_LOG_FILE": "",
+        "CHECKPOINT_FILE": "",
+        "MEMORY_REPORT_EVERY_CYCLES": 0,
+    }.items():
+        monkeypatch.setattr(config, name, value)
+    from main import TradingArena
+    arena = TradingArena()
+    yield arena
+    arena.trade_store.close()
+
+
+def test_closing_fills_are_published_indexed_and_applied_with_trimming_on(arena, tmp_path):
+    strategy = arena.strategies[0]
+    for symbol, quantity in (("SPY", 10), ("QQQ", 5), ("SPY", 1)):
+        for action in ("BUY", "SELL"):
+            arena.record_fill({"strategy": strategy.name, "symbol": symbol, "action": action,
+                               "quantity": quantity, "price": 100.0})
+    arena.end_cycle({})
+
+    events = [json.loads(line) for line in (tmp_path / config.EVENTS_JOURNAL).read_text().splitlines()]
+    trades = [e for e in events if e["kind"] == "trade"]
+    assert [e["index"] for e in trades] == list(range(6))
+    assert [e["position"] for e in trades] == [10, 0, 5, 0, 1, 0]
+
+    store = TradeStore(config.TRADE_INDEX_DB, readonly=True)
+    assert store.count() == 6
+    store.close()
+    assert strategy.positions == {}
+
+    # Trimmed between cycles instead, flat positions included
+    assert (len(arena.tracker.trades), arena.tracker.trade_offset) == (2, 4)
+    assert arena.tracker.positions[strategy.name] == {}
+
+
+def test_end_cycle_saves_the_caches_snapshotted_on_the_loop(arena, monkeypatch):
+    monkeypatch.setattr(config, "CHECKPOINT_FILE", "arena_checkpoint.pkl")
+    monkeypatch.setattr(config, "MEMORY_REPORT_EVERY_CYCLES", 1)
+    arena.memory = MemoryReporter(path="")
+    arena.memory.start()
+    indicators = arena.engine.indicators
+    indicators.update_bars("SPY", [(0.0, 100.0), (900.0, 101.0)])
+
+    assert arena.snapshot_due(arena.cycle_count + 1)
+    caches = arena.snapshot_caches()
+    indicators.update_bars("SPY", [(1800.0, 102.0)])  # The loop moves on while end_cycle runs
+    indicators.update_bars("QQQ", [(0.0, 400.0)])
+    try:
+        arena.end_cycle({}, caches)
+    finally:
+        tracemalloc.stop()
+
+    assert load_checkpoint()["engine"]["indicators"] == {"SPY": (900.0, [100.0, 101.0])}
+    assert arena.memory_report["counts"]["indicators"] == {"symbols": 1, "bars": 2}
+
+
+def test_cycle_quotes_the_simulated_broker(arena, monkeypatch):
+    import engine
+    monkeypatch.setattr(engine, "fetch_market_data", StubMarketData())
+    arena.broker.connect()
+    arena.run_cycle()
+
+    assert arena.broker.last_prices == arena.marks and arena.marks
@@ -0,0 +1,74 @@
+import pytest
+
+from decision_log import CycleRecord, DecisionLog, market_data_from_frame, prompt_hash, read_frames
+from replay import RecordedLLMClient, replay_frame
+from strategies.base import MarketData
+from strategies.trend_following import TrendFollowingStrategy
+
+
+def _market_data(symbol: str, sma_10: float, sma_50: float) -> MarketData:
+    return MarketData(
+        symbol=symbol, current_price=100.0, prices_1d=[99.0, 100.0], prices_5d=[98.0, 99.5, 100.0],
+        news_headlines=[f"{symbol} news"], timestamp="2024-01-02T10:00:00",
+        rsi_14=55.0, sma_10=sma_10, sma_50=sma_50, smas={20: 99.0}
+    )
+
+
+def _record_cycle(strategy: TrendFollowingStrategy, market: dict[str, MarketData], cycle: int = 1) -> CycleRecord:
+    """Record a live decide_batch call the way the arena does."""
+    record = CycleRecord(cycle, ["trend_following"], {strategy.name: strategy.get_state()})
+    record.add_call(strategy.name, market, strategy.decide_batch(market), 0.001)
+    return record
+
+
+@pytest.fixture
+def market():
+    return {"SPY": _market_data("SPY", 101.0, 99.0), "QQQ": _market_data("QQQ", 99.0, 101.0)}
+
+
+def test_market_data_round_trips_through_the_log(tmp_path, market):
+    log = DecisionLog(str(tmp_path / "decisions.bin"))
+    log.append(_record_cycle(TrendFollowingStrategy(), market))
+    frame, = read_frames(log.path)
+    assert frame["cycle"] == 1
+    assert market_data_from_frame(frame) == market
+
+
+def test_truncated_last_frame_is_ignored(tmp_path, market):
+    log = DecisionLog(str(tmp_path / "decisions.bin"))
+    for cycle in (1, 2):
+        log.append(_record_cycle(TrendFollowingStrategy(), market, cycle))
+    data = log.path.read_bytes()
+    log.path.write_bytes(data[:-10])
+    assert [f["cycle"] for f in read_frames(log.path)] == [1]
+
+
+def test_replay_restores_state_and_matches_recorded_decisions(market):
+    strategy = TrendFollowingStrategy()
+    frame = _record_cycle(strategy, market).to_frame()
+    assert frame["decisions"]["action"] == ["BUY", "HOLD"]
+
+    # The live call already moved the strategy on; replay must start from the recorded state
+    diffs, timings = replay_frame(frame, {strategy.name: strategy})
+    assert diffs == []
+    assert set(timings) == {strategy.name}
+
+
+def test_replay_reports_changed_decisions(market):
+    strategy = TrendFollowingStrategy()
+    frame = _record_cycle(strategy, market).to_frame()
+    frame["decisions"]["action"][0] = "SELL"
+    diffs, _ = replay_frame(frame, {strategy.name: strategy})
+    assert [(name, symbol, was[0], now[0]) for _, name, symbol, was, now in diffs] == \
+        [(strategy.name, "SPY", "SELL", "BUY")]
+
+
+def test_recorded_llm_client_replays_in_order_and_counts_prompt_changes():
+    client = RecordedLLMClient()
+    messages = [{"role": "user", "content": "prompt"}]
+    client.pending.extend([(prompt_hash(messages), "first"), ("stale", "second")])
+    assert client.chat.completions.create(messages=messages).choices[0].message.content == "first"
+    assert client.create(messages=messages).choices[0].message.content == "second"
+    assert client.prompt_changes == 1
+    with pytest.raises(RuntimeError):
+        client.create(messages=messages)
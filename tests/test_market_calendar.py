@@ -0,0 +1,73 @@
+from datetime import date, datetime
+
+import pytest
+
+from market_calendar import (
+    MARKET_TZ, CycleScheduler, early_closes, holidays, is_open, next_session, seconds_until, session
+)
+
+
+def _et(*args) -> datetime:
+    return datetime(*args, tzinfo=MARKET_TZ)
+
+
+def test_2024_holidays():
+    assert holidays(2024) == {
+        date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19), date(2024, 3, 29), date(2024, 5, 27),
+        date(2024, 6, 19), date(2024, 7, 4), date(2024, 9, 2), date(2024, 11, 28), date(2024, 12, 25),
+    }
+
+
+def test_observed_holidays():
+    assert date(2022, 6, 20) in holidays(2022)  # Juneteenth on a Sunday
+    assert date(2021, 12, 31) not in holidays(2021) | holidays(2022)  # New Year's on a Saturday
+    assert date(2021, 6, 18) not in holidays(2021)  # Juneteenth was not a market holiday yet
+
+
+def test_early_closes_skip_non_trading_days():
+    assert early_closes(2024) == {date(2024, 7, 3), date(2024, 11, 29), date(2024, 12, 24)}
+    assert date(2022, 7, 3) not in early_closes(2022)  # A Sunday
+    assert session(date(2024, 12, 24))[1] == _et(2024, 12, 24, 13, 0)
+
+
+def test_next_session_skips_weekends_and_holidays():
+    # Thursday after close -> Good Friday -> weekend -> Monday
+    assert next_session(_et(2024, 3, 28, 16, 0)) == (_et(2024, 4, 1, 9, 30), _et(2024, 4, 1, 16, 0))
+    assert not is_open(_et(2024, 3, 29, 12, 0))
+    assert is_open(_et(2024, 4, 1, 9, 30))
+
+
+@pytest.fixture
+def scheduler():
+    return CycleScheduler(interval_minutes=15, settle_seconds=20, warmup_minutes=10)
+
+
+def test_cycles_follow_bar_closes_and_skip_the_closing_bar(scheduler):
+    times = scheduler.cycle_times(*session(date(2024, 4, 1)))
+    assert times[0] == _et(2024, 4, 1, 9, 45, 20)
+    assert times[-1] == _et(2024, 4, 1, 15, 45, 20)
+    assert len(times) == 25
+
+
+def test_next_cycle_rolls_over_to_the_next_session(scheduler):
+    assert scheduler.next_cycle(_et(2024, 4, 1, 10, 0)) == _et(2024, 4, 1, 10, 0, 20)
+    assert scheduler.next_cycle(_et(2024, 4, 1, 15, 46)) == _et(2024, 4, 2, 9, 45, 20)
+    assert scheduler.next_cycle(_et(2024, 12, 24, 12, 50)) == _et(2024, 12, 26, 9, 45, 20)
+
+
+def test_warmup_only_before_the_open(scheduler):
+    assert scheduler.next_warmup(_et(2024, 4, 1, 8, 0)) == _et(2024, 4, 1, 9, 20)
+    assert scheduler.next_warmup(_et(2024, 4, 1, 9, 25)) is None
+
+
+def test_waits_across_dst_changes_use_real_time(scheduler):
+    # Friday's close to Monday's first cycle: spring forward loses an hour, fall back gains one
+    spring = _et(2024, 3, 8, 16, 0)
+    fire_at = scheduler.next_cycle(spring)
+    assert fire_at == _et(2024, 3, 11, 9, 45, 20)
+    assert seconds_until(fire_at, spring) == ((2 * 24 + 17 - 1) * 60 + 45) * 60 + 20
+
+    fall = _et(2024, 11, 1, 16, 0)
+    warmup_at = scheduler.next_warmup(fall)
+    assert warmup_at == _et(2024, 11, 4, 9, 20)
+    assert seconds_until(warmup_at, fall) == ((2 * 24 + 17 + 1) * 60 + 20) * 60
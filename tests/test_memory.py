@@ -0,0 +1,42 @@
+import pickle
+
+from memory import BoundedDict
+
+
+def test_evicts_least_recently_set():
+    d = BoundedDict(2)
+    d["a"], d["b"], d["c"] = 1, 2, 3
+    assert list(d) == ["b", "c"]
+
+
+def test_get_and_assignment_count_as_use():
+    d = BoundedDict(2, [("a", 1), ("b", 2)])
+    assert d.get("a") == 1
+    d["c"] = 3
+    assert list(d) == ["a", "c"]
+    d["a"] = 10
+    d["d"] = 4
+    assert dict(d) == {"a": 10, "d": 4}
+
+
+def test_indexing_and_copying_do_not_reorder():
+    d = BoundedDict(2, [("a", 1), ("b", 2)])
+    assert d["a"] == 1 and dict(d) == {"a": 1, "b": 2}
+    assert d.get("missing", 0) == 0
+    d["c"] = 3
+    assert list(d) == ["b", "c"]
+
+
+def test_zero_size_is_unbounded():
+    d = BoundedDict(0)
+    for i in range(1000):
+        d[i] = i
+    assert len(d) == 1000
+
+
+def test_pickle_keeps_bound_and_order():
+    d = BoundedDict(3, [("a", 1), ("b", 2), ("c", 3)])
+    restored = pickle.loads(pickle.dumps(d))
+    assert restored.max_size == 3 and list(restored.items()) == [("a", 1), ("b", 2), ("c", 3)]
+    restored["d"] = 4
+    assert list(restored) == ["b", "c", "d"]
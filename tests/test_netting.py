@@ -0,0 +1,75 @@
+from broker import OrderRequest
+from metrics import ExecutionMetrics
+from netting import allocate_fill, execute_netted, net_orders
+from sim_broker import FillModel, SimulatedBroker
+from strategies.base import Action
+
+
+def _order(strategy: str, action: Action, quantity: int) -> OrderRequest:
+    return OrderRequest("SPY", action, quantity, strategy, reference_price=100.0)
+
+
+def _broker(metrics: ExecutionMetrics = None, **model) -> SimulatedBroker:
+    broker = SimulatedBroker(FillModel(spread_bps=0, slippage_bps=0, **model), seed=0, verbose=False, metrics=metrics)
+    broker.connect()
+    broker.update_price("SPY", 100.0)
+    return broker
+
+
+def _shares(fills: list[dict]) -> dict[str, int]:
+    return {f["strategy"]: f["quantity"] for f in fills}
+
+
+def test_net_orders_offsets_buys_against_sells():
+    net, = net_orders([_order("A", Action.BUY, 10), _order("B", Action.SELL, 4), _order("C", Action.HOLD, 7)])
+    assert (net.action, net.quantity, net.crossed) == (Action.BUY, 6, 4)
+    assert [o.strategy_name for o in net.legs] == ["A", "B"]
+
+
+def test_single_leg_goes_to_broker_unchanged():
+    order = _order("A", Action.SELL, 5)
+    net, = net_orders([order])
+    assert net.to_request() is order
+
+
+def test_full_fill_gives_every_leg_its_request():
+    net, = net_orders([_order("A", Action.BUY, 10), _order("B", Action.BUY, 5), _order("C", Action.SELL, 3)])
+    fills = allocate_fill(net, {"symbol": "SPY", "quantity": 12, "price": 100.5, "order_id": 7})
+    assert _shares(fills) == {"A": 10, "B": 5, "C": 3}
+    assert {(f["price"], f["order_id"]) for f in fills} == {(100.5, 7)}
+
+
+def test_partial_fill_is_split_pro_rata_with_largest_remainder():
+    net, = net_orders([_order("A", Action.BUY, 10), _order("B", Action.BUY, 5), _order("C", Action.SELL, 3)])
+    # 3 crossed + 5 from the broker = 8 of 15 bought: 5.33 / 2.67 rounds to 5 / 3
+    fills = allocate_fill(net, {"symbol": "SPY", "quantity": 5, "price": 100.5})
+    assert _shares(fills) == {"A": 5, "B": 3, "C": 3}
+
+
+def test_exact_offset_is_crossed_at_the_reference_price():
+    net, = net_orders([OrderRequest("SPY", Action.BUY, 5, "A", reference_price=100.0),
+                       OrderRequest("SPY", Action.SELL, 5, "B", reference_price=101.0)])
+    assert (net.action, net.quantity) == (Action.HOLD, 0)
+    fills = allocate_fill(net, None)
+    assert _shares(fills) == {"A": 5, "B": 5}
+    assert {f["price"] for f in fills} == {100.5}
+
+
+def test_netted_order_metrics_are_filed_per_strategy():
+    metrics = ExecutionMetrics()
+    orders = [_order("A", Action.BUY, 10), _order("B", Action.BUY, 5), _order("C", Action.SELL, 3)]
+    execute_netted(_broker(metrics), orders, verbose=False)
+
+    summary = metrics.summary("strategy")
+    assert set(summary) == {"A", "B", "C"}
+    assert all(s["statuses"] == {"filled": 1} for s in summary.values())
+    assert sorted((r.strategy, r.quantity, r.filled) for r in metrics.records) == [("A", 10, 10), ("B", 5, 5), ("C", 3, 3)]
+
+
+def test_rejected_netted_order_still_credits_crossed_shares():
+    metrics = ExecutionMetrics()
+    orders = [_order("A", Action.BUY, 10), _order("C", Action.SELL, 4)]
+    execute_netted(_broker(metrics, reject_prob=1.0), orders, verbose=False)
+
+    statuses = {r.strategy: (r.status, r.filled) for r in metrics.records}
+    assert statuses == {"A": ("partial", 4), "C": ("filled", 4)}
@@ -0,0 +1,30 @@
+import asyncio
+
+from broker import OrderRequest
+from sim_broker import FillModel, SimulatedBroker
+from strategies.base import Action
+
+
+def _realtime_broker() -> SimulatedBroker:
+    broker = SimulatedBroker(FillModel(latency_ms=1, realtime=True), seed=0, verbose=False)
+    broker.connect()
+    broker.update_price("SPY", 100.0)
+    return broker
+
+
+def test_realtime_execute_trades_without_a_loop():
+    fills = _realtime_broker().execute_trades([OrderRequest("SPY", Action.BUY, 10, "A")])
+    assert fills[0]["quantity"] == 10
+
+
+def test_realtime_execute_trades_inside_a_running_loop():
+    async def main():
+        return _realtime_broker().execute_trades([OrderRequest("SPY", Action.BUY, 10, "A")])
+
+    assert asyncio.run(main())[0]["quantity"] == 10
+
+
+def test_seed_positions_drops_flat_symbols():
+    broker = _realtime_broker()
+    broker.seed_positions({"SPY": 5, "QQQ": 0})
+    assert broker.positions == {"SPY": 5}
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from broker import OrderRequest
+from indicators import IndicatorEngine
+from sim_broker import FillModel, SimulatedBroker
+from strategies import MeanReversionStrategy
+from strategies.base import Action
+from streaming import BarAggregator, BarStream, FakeBarFeed, IBBarFeed
+from tracker import Tracker
+
+
+def test_aggregator_completes_bar_on_its_last_source_bar():
+    agg = BarAggregator(bar_seconds=60, source_seconds=5)
+    for t in range(0, 55, 5):
+        assert agg.add("SPY", t, 100 + t) == []
+    assert agg.add("SPY", 55, 155.0) == [(0, 155.0)]
+
+
+def test_aggregator_closes_bar_when_next_one_starts_and_drops_late_bars():
+    agg = BarAggregator(bar_seconds=60, source_seconds=5)
+    agg.add("SPY", 50, 1.0)
+    assert agg.add("SPY", 60, 2.0) == [(0, 1.0)]  # Missed the 55s bar
+    assert agg.add("SPY", 45, 3.0) == []
+
+
+def test_ib_feed_defaults_to_regular_trading_hours():
+    assert IBBarFeed(broker=None).use_rth
+
+
+def _arena(strategy, broker, trade: bool = False):
+    ran = []
+
+    def run_strategy(strategy, market_data):
+        ran.append(market_data)
+        if not trade:
+            return []
+        md = market_data["SPY"]
+        return [OrderRequest("SPY", Action.BUY, 10, strategy.name, reference_price=md.current_price)]
+
+    def record_fill(fill):
+        raise AssertionError(f"synthetic fill reached the arena: {fill}")
+
+    return SimpleNamespace(
+        strategies=[strategy],
+        engine=SimpleNamespace(indicators=IndicatorEngine()),
+        broker=broker,
+        marks={"SPY": 400.0},
+        state_lock=threading.RLock(),
+        state_version=0,
+        run_strategy=run_strategy,
+        record_fill=record_fill,
+        tracker=Tracker(persist=False),
+    ), ran
+
+
+def _run_stream(stream: BarStream):
+    async def run():
+        await stream.start()
+        await stream.feed._task
+        await asyncio.gather(*stream._tasks)
+
+    asyncio.run(run())
+
+
+def test_fake_bars_run_strategies_without_touching_real_state():
+    broker = SimulatedBroker(fill_model=FillModel(), verbose=False)
+    broker.last_prices["SPY"] = 400.0
+    arena, ran = _arena(MeanReversionStrategy(symbols=["SPY"]), broker)
+    stream = BarStream(arena, FakeBarFeed(start_prices={"SPY": 100.0}, start_time=0, interval=0, max_bars=24),
+                       bar_seconds=60)
+
+    _run_stream(stream)
+
+    assert len(ran) == 2
+    assert ran[0]["SPY"].current_price < 200  # Decided on the random walk...
+    assert arena.marks == {"SPY": 400.0}  # ...without it leaking into marks, quotes or indicators
+    assert broker.last_prices == {"SPY": 400.0}
+    assert "SPY" not in arena.engine.indicators.bars
+    assert arena.state_version == 0
+
+
+def test_fake_bar_trades_fill_on_their_own_broker_and_tracker():
+    broker = SimulatedBroker(fill_model=FillModel(), verbose=False)
+    broker.connect()
+    arena, _ = _arena(MeanReversionStrategy(symbols=["SPY"]), broker, trade=True)
+    feed = FakeBarFeed(start_time=0, interval=0, max_bars=24, price_source=lambda symbol: 400.0)
+    stream = BarStream(arena, feed, bar_seconds=60)
+    _run_stream(stream)
+
+    assert stream.tracker.total_trades == 2
+    assert 390 < stream.tracker.trades[0].price < 410  # Walk started from the quote, not 100
+    assert arena.tracker.total_trades == 0 and arena.tracker.positions == {}
+    assert broker.positions == {} and broker.last_prices == {}
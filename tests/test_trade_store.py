@@ -0,0 +1,63 @@
+import pytest
+
+from trade_store import TradeStore
+from tracker import Trade
+
+
+def _trade(i: int, strategy: str = "A", symbol: str = "SPY", timestamp: str = None) -> Trade:
+    return Trade(timestamp or f"2024-01-02T10:{i:02d}:00", strategy, symbol, "BUY", 1, 100.0 + i)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TradeStore(str(tmp_path / "trades.db"))
+    yield store
+    store.close()
+
+
+def _all_pages(store: TradeStore, **filters) -> list[list[float]]:
+    pages, cursor = [], None
+    while True:
+        page = store.page(cursor=cursor, **filters)
+        pages.append([t.price for t in page.trades])
+        if page.next_cursor is None:
+            return pages
+        cursor = page.next_cursor
+
+
+def test_pages_walk_newest_first_without_gaps_or_repeats(store):
+    store.sync([_trade(i) for i in range(7)])
+    assert _all_pages(store, limit=3) == [[106, 105, 104], [103, 102, 101], [100]]
+
+
+def test_equal_timestamps_are_ordered_by_id(store):
+    store.sync([_trade(i, timestamp="2024-01-02T10:00:00") for i in range(5)])
+    assert _all_pages(store, limit=2) == [[104, 103], [102, 101], [100]]
+
+
+def test_last_full_page_has_no_cursor(store):
+    store.sync([_trade(i) for i in range(4)])
+    assert store.page(limit=4).next_cursor is None
+
+
+def test_filters_and_time_range(store):
+    store.sync([_trade(i, strategy="AB"[i % 2], symbol="SPY" if i < 4 else "QQQ") for i in range(8)])
+    assert _all_pages(store, strategy="A", limit=2) == [[106, 104], [102, 100]]
+    assert _all_pages(store, strategy="B", symbol="SPY") == [[103, 101]]
+    assert _all_pages(store, since="2024-01-02T10:02", until="2024-01-02T10:05") == [[104, 103, 102]]
+
+
+def test_sync_only_adds_missing_trades(store):
+    trades = [_trade(i) for i in range(5)]
+    store.append(0, trades[0])
+    store.append(1, trades[1])
+    assert store.sync(trades) == 3
+    assert store.sync(trades) == 0
+    assert store.count() == 5
+
+
+def test_sync_with_offset_numbers_trades_from_the_full_history(store):
+    store.sync([_trade(i) for i in range(3)])
+    assert store.sync([_trade(i) for i in range(2, 6)], offset=2) == 3
+    assert store.count() == 6
+    assert _all_pages(store, limit=10) == [[105, 104, 103, 102, 101, 100]]
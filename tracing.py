@@ -0,0 +1,148 @@
+import contextvars
+import functools
+import inspect
+import json
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+import config
+
+
+class Span:
+    """One timed operation, with the operations it started nested inside."""
+
+    __slots__ = ("name", "attrs", "start", "wall", "cpu", "children")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.wall = 0.0
+        self.cpu = 0.0  # CPU time of the thread the span ran on
+        self.children: list[Span] = []
+
+    def to_dict(self, origin: float) -> dict:
+        record = {
+            "name": self.name,
+            "start": round(self.start - origin, 6),  # Seconds since the cycle started
+            "wall": round(self.wall, 6),
+            "cpu": round(self.cpu, 6),
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        if self.children:
+            record["children"] = [child.to_dict(origin) for child in self.children]
+        return record
+
+
+# Innermost open span in this task/thread; None outside a sampled cycle.
+# asyncio tasks and asyncio.to_thread copy it, so spans nest across both.
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block as a child of the current span. A no-op outside a sampled cycle."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, attrs)
+    parent.children.append(child)
+    token = _current.set(child)
+    cpu_start = time.thread_time()
+    try:
+        yield child
+    finally:
+        child.cpu = time.thread_time() - cpu_start
+        child.wall = time.perf_counter() - child.start
+        _current.reset(token)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator recording each call (sync or async) as a span."""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current.get() is None:
+                    return await func(*args, **kwargs)
+                with span(label):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class CycleTrace:
+    """Root span of one cycle.
+
+    Every cycle is timed against the budget (the decision interval) and
+    warns when it overruns. Only a `sample_rate` fraction record nested
+    spans and append them to `export_path` as one JSON line per cycle.
+    """
+
+    def __init__(
+        self,
+        name: str = "cycle",
+        budget_seconds: float = config.DECISION_INTERVAL_MINUTES * 60,
+        sample_rate: float = config.TRACE_SAMPLE_RATE,
+        export_path: str = config.TRACE_FILE
+    ):
+        self.name = name
+        self.budget_seconds = budget_seconds
+        self.sample_rate = sample_rate
+        self.export_path = export_path
+        self.root = Span(name, {})
+        self.sampled = False
+        self.overrun = False
+
+    def __enter__(self) -> "CycleTrace":
+        self.started_at = datetime.now()
+        self.sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        self.root = Span(self.name, {})
+        self._cpu_start = time.thread_time()
+        self._token = _current.set(self.root) if self.sampled else None
+        return self
+
+    def __exit__(self, *exc):
+        self.root.cpu = time.thread_time() - self._cpu_start
+        self.root.wall = time.perf_counter() - self.root.start
+        if self._token is not None:
+            _current.reset(self._token)
+
+        self.overrun = self.root.wall > self.budget_seconds
+        if self.overrun:
+            print(f"⚠️ Cycle overran its budget: {self.root.wall:.1f}s > {self.budget_seconds:.0f}s")
+            for child in sorted(self.root.children, key=lambda s: s.wall, reverse=True)[:3]:
+                print(f"    {child.name}: {child.wall:.1f}s wall, {child.cpu:.1f}s CPU")
+
+        if self.sampled and self.export_path:
+            self.export()
+        return False
+
+    def export(self):
+        """Append this cycle's span tree to the trace file."""
+        record = {
+            "cycle_start": self.started_at.isoformat(),
+            "budget": self.budget_seconds,
+            "overrun": self.overrun,
+            **self.root.to_dict(self.root.start),
+        }
+        try:
+            with open(self.export_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Failed to export cycle trace: {e}")
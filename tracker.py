@@ -1,10 +1,13 @@
 import json
+import os
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
 from dataclasses import dataclass, asdict
 from typing import Optional
 
 from strategies.base import Action
+from tracing import traced
 
 
 @dataclass
@@ -21,13 +24,18 @@ class Trade:
 class Tracker:
     """Track trades and P&L for all strategies."""
     
-    def __init__(self, data_file: str = "arena_data.json"):
+    def __init__(self, data_file: str = "arena_data.json", persist: bool = True, hot_trades: int = 0):
         self.data_file = Path(data_file)
-        self.trades: list[Trade] = []
+        self.persist = persist  # False: start empty and only save() when asked (backtests)
+        self.hot_trades = hot_trades  # Keep only this many recent trades in memory (0 = all)
+        self.trades: list[Trade] = []  # The newest trades; trade_offset older ones were trimmed
+        self.trade_offset = 0
+        self.trade_counts: dict[str, int] = {}  # strategy -> trades ever recorded
         self.positions: dict[str, dict[str, int]] = {}  # strategy -> symbol -> shares
         self.entry_prices: dict[str, dict[str, float]] = {}  # strategy -> symbol -> avg price
         self.realized_pnl: dict[str, float] = {}  # strategy -> total realized P&L
-        self.load()
+        if self.persist:
+            self.load()
     
     def load(self):
         """Load existing data from file."""
@@ -39,10 +47,13 @@ class Tracker:
                     self.positions = data.get("positions", {})
                     self.entry_prices = data.get("entry_prices", {})
                     self.realized_pnl = data.get("realized_pnl", {})
+                    self.trade_offset = data.get("trade_offset", 0)
+                    self.trade_counts = data.get("trade_counts") or dict(Counter(t.strategy for t in self.trades))
                     print(f"📂 Loaded {len(self.trades)} trades from {self.data_file}")
             except Exception as e:
                 print(f"Error loading data: {e}")
     
+    @traced("Tracker.save")
     def save(self):
         """Save data to file."""
         data = {
@@ -50,18 +61,25 @@ class Tracker:
             "positions": self.positions,
             "entry_prices": self.entry_prices,
             "realized_pnl": self.realized_pnl,
+            "trade_offset": self.trade_offset,
+            "trade_counts": self.trade_counts,
             "last_updated": datetime.now().isoformat()
         }
-        with open(self.data_file, "w") as f:
+        # Write aside and swap in, so readers never see a half-written file
+        tmp = self.data_file.with_name(self.data_file.name + ".tmp")
+        with open(tmp, "w") as f:
             json.dump(data, f, indent=2)
+        os.replace(tmp, self.data_file)
     
+    @traced("Tracker.record_trade")
     def record_trade(
         self,
         strategy: str,
         symbol: str,
         action: Action,
         quantity: int,
-        price: float
+        price: float,
+        timestamp: Optional[str] = None
     ):
         """Record a trade and update positions."""
         
@@ -111,7 +129,7 @@ class Tracker:
         
         # Record trade
         trade = Trade(
-            timestamp=datetime.now().isoformat(),
+            timestamp=timestamp or datetime.now().isoformat(),
             strategy=strategy,
             symbol=symbol,
             action=action.value,
@@ -120,10 +138,34 @@ class Tracker:
             pnl=pnl
         )
         self.trades.append(trade)
-        self.save()
+        self.trade_counts[strategy] = self.trade_counts.get(strategy, 0) + 1
+        if self.persist:
+            self.save()
         
         return trade
     
+    @property
+    def total_trades(self) -> int:
+        """Trades ever recorded, including any trimmed from memory."""
+        return self.trade_offset + len(self.trades)
+    
+    def trim(self, slack: float = 0.25) -> int:
+        """Drop all but the newest `hot_trades` trades, and flat positions, from memory.
+        
+        Only trims once the window has overgrown by `slack`, so the cost is
+        spread over many trades. Returns how many trades were dropped.
+        """
+        if not self.hot_trades or len(self.trades) <= self.hot_trades * (1 + slack):
+            return 0
+        excess = len(self.trades) - self.hot_trades
+        del self.trades[:excess]
+        self.trade_offset += excess
+        for strategy, positions in self.positions.items():
+            for symbol in [s for s, q in positions.items() if not q]:
+                del positions[symbol]
+                self.entry_prices[strategy].pop(symbol, None)
+        return excess
+    
     def get_unrealized_pnl(self, strategy: str, current_prices: dict[str, float]) -> float:
         """Calculate unrealized P&L for a strategy."""
         if strategy not in self.positions:
@@ -156,8 +198,7 @@ class Tracker:
             realized = self.realized_pnl.get(strategy, 0.0)
             unrealized = self.get_unrealized_pnl(strategy, current_prices)
             
-            # Count trades
-            trade_count = len([t for t in self.trades if t.strategy == strategy])
+            trade_count = self.trade_counts.get(strategy, 0)
             
             leaderboard.append({
                 "strategy": strategy,
@@ -0,0 +1,140 @@
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from tracker import Trade
+import config
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,  -- The trade's number in the tracker's full history (from 1)
+    timestamp TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    action TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    price REAL NOT NULL,
+    pnl REAL
+);
+CREATE INDEX IF NOT EXISTS trades_time ON trades (timestamp, id);
+CREATE INDEX IF NOT EXISTS trades_strategy ON trades (strategy, timestamp, id);
+CREATE INDEX IF NOT EXISTS trades_symbol ON trades (symbol, timestamp, id);
+CREATE INDEX IF NOT EXISTS trades_strategy_symbol ON trades (strategy, symbol, timestamp, id);
+"""
+
+COLUMNS = "timestamp, strategy, symbol, action, quantity, price, pnl"
+
+
+@dataclass
+class TradePage:
+    """One page of trades, newest first, and the cursor for the next (older) page."""
+    trades: list[Trade]
+    next_cursor: Optional[str]
+
+
+class TradeStore:
+    """SQLite index over the full trade history.
+
+    Pages are keyset-paginated on (timestamp, id) and every filter
+    combination is served from an index, so browsing costs the same with
+    a hundred trades or ten million. The arena appends fills as it records
+    them; `sync` backfills whatever arena_data.json has that the index
+    does not. With TRACKER_HOT_TRADES set it is also the only copy of
+    trades trimmed from the tracker.
+    """
+
+    def __init__(self, path: str = config.TRADE_INDEX_DB, readonly: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")  # Readers (the dashboard) never block the arena
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM trades").fetchone()[0]
+
+    def append(self, index: int, trade: Trade):
+        """Index the trade at position `index` of the tracker's full history."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO trades (id, {COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (index + 1, *_row(trade))
+            )
+
+    def sync(self, trades: list[Trade], offset: int = 0) -> int:
+        """Index trades the store is missing; returns how many were added.
+        
+        `trades` are the tracker's in-memory trades, the first of which is
+        trade number `offset` in its full history.
+        """
+        start = self.count()
+        if start < offset:
+            print(f"⚠️ {self.path} is missing trades {start + 1}-{offset}, which are no longer in memory")
+            start = offset
+        end = offset + len(trades)
+        if start >= end:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO trades (id, {COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((i + 1, *_row(trades[i - offset])) for i in range(start, end))
+            )
+        return end - start
+
+    def page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        strategy: Optional[str] = None,
+        symbol: Optional[str] = None,
+        action: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> TradePage:
+        """Newest-first trades matching the filters, starting after `cursor`.
+
+        `since` is inclusive and `until` exclusive; both compare against the
+        ISO timestamps, so a date like "2024-01-02" works too.
+        """
+        where, params = [], []
+        for column, value in (("strategy", strategy), ("symbol", symbol), ("action", action)):
+            if value:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            where.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            where.append("timestamp < ?")
+            params.append(until)
+        if cursor:
+            timestamp, trade_id = cursor.rsplit("|", 1)
+            where.append("(timestamp, id) < (?, ?)")
+            params += [timestamp, int(trade_id)]
+
+        sql = f"SELECT id, {COLUMNS} FROM trades"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit + 1)).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1][1]}|{rows[-1][0]}"
+        return TradePage(trades=[Trade(*row[1:]) for row in rows], next_cursor=next_cursor)
+
+    def close(self):
+        self._conn.close()
+
+
+def _row(trade: Trade) -> tuple:
+    return (trade.timestamp, trade.strategy, trade.symbol, trade.action, trade.quantity, trade.price, trade.pnl)
@@ -1,39 +1,202 @@
+import asyncio
 import gradio as gr
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
-import json
+from pathlib import Path
+from typing import Optional
 
-from tracker import Tracker
-from data import get_market_data
+from tracker import Trade, Tracker
+from events import JournalTailer
+from trade_store import TradeStore
+from data import fetch_market_data
 import config
 
 
-def get_current_prices() -> dict[str, float]:
-    """Fetch current prices for all pairs."""
+@dataclass
+class Snapshot:
+    """Dashboard state shared by every panel and every client."""
+    version: int
+    built_at: datetime
+    tracker: Tracker
+    prices: dict[str, float]
+    leaderboard: list[dict]
+
+
+class SnapshotService:
+    """Process-wide cache of the arena's state for the dashboard.
+
+    Tracker history is re-read only when the data file changes, and prices
+    for held symbols are fetched at most once per `price_ttl` seconds, no
+    matter how many browser tabs are refreshing. Once `follow()` is called,
+    trades and marks are applied from the arena's events journal instead,
+    and waiters in `wait_for_change()` wake as soon as one arrives. Waiting
+    is async, so an idle tab holds no thread.
+    """
+
+    def __init__(self, data_file: str = "arena_data.json", price_ttl: float = config.UI_PRICE_REFRESH_SECONDS):
+        self.data_file = Path(data_file)
+        self.price_ttl = price_ttl
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # The server's loop, once a tab waits
+        self._changed: Optional[asyncio.Event] = None  # Set and replaced on every change
+        self._tracker = Tracker(data_file, persist=False, hot_trades=config.TRACKER_HOT_TRADES)
+        self._file_key: Optional[tuple[int, int]] = None
+        self._prices: dict[str, float] = {}
+        self._prices_at = 0.0
+        self._dirty = False
+        self._following = False
+        self._snapshot: Optional[Snapshot] = None
+        self._rendered: Optional[tuple[int, tuple[str, str, str]]] = None
+
+    def get(self) -> Snapshot:
+        with self._lock:
+            changed, self._dirty = self._dirty, False
+            if not self._following or self._snapshot is None:
+                changed = self._reload_tracker() or changed
+            changed = self._refresh_prices() or changed
+            if changed or self._snapshot is None:
+                version = self._snapshot.version + 1 if self._snapshot else 1
+                self._snapshot = Snapshot(
+                    version=version,
+                    built_at=datetime.now(),
+                    tracker=self._tracker,
+                    prices=dict(self._prices),
+                    leaderboard=self._tracker.get_leaderboard(self._prices)
+                )
+            return self._snapshot
+
+    def render(self) -> tuple[str, str, str]:
+        """All panels, re-rendered only when the snapshot changed."""
+        snapshot = self.get()
+        with self._lock:
+            if self._rendered is None or self._rendered[0] != snapshot.version:
+                self._rendered = (snapshot.version, (
+                    get_leaderboard_data(snapshot), get_recent_trades(snapshot), get_positions(snapshot)
+                ))
+            return self._rendered[1]
+
+    async def wait_for_change(self, version: int, timeout: float) -> Snapshot:
+        """Wait until the snapshot is newer than `version` or `timeout` passes."""
+        if self._changed is None:
+            self._loop, self._changed = asyncio.get_running_loop(), asyncio.Event()
+        changed = self._changed  # Taken before the check; replaced only on this loop
+        if not (self._dirty or (self._snapshot is not None and self._snapshot.version > version)):
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return await asyncio.to_thread(self.get)  # May reload the data file or fetch prices
+
+    def _wake(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def follow(self, journal: str = config.EVENTS_JOURNAL, poll_seconds: float = config.UI_JOURNAL_POLL_SECONDS):
+        """Apply the arena's events journal from a background thread."""
+        if self._following:
+            return
+        self.get()  # Load the tracker once; the journal takes it from here
+        self._following = True
+        tailer = JournalTailer(journal)
+
+        def run():
+            while True:
+                events = tailer.read()
+                if events:
+                    self.apply(events)
+                else:
+                    time.sleep(poll_seconds)
+
+        threading.Thread(target=run, name="journal-follower", daemon=True).start()
+
+    def apply(self, events: list[dict]):
+        """Fold journal events into the tracker and prices, then wake waiters."""
+        with self._lock:
+            for event in events:
+                if event["kind"] == "trade":
+                    self._apply_trade(event)
+                elif event["kind"] == "marks":
+                    self._prices.update(event["marks"])
+                    self._prices_at = time.monotonic()  # Fresher than a yfinance refetch
+            self._dirty = True
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake)
+
+    def _apply_trade(self, event: dict):
+        tracker = self._tracker
+        index = event["index"]
+        if index < tracker.total_trades:
+            return  # Already in the data file we loaded
+        if index > tracker.total_trades:
+            # Missed events (e.g. the arena restarted): the file has them all
+            self._file_key = None
+            self._reload_tracker()
+            return
+        trade = Trade(**event["trade"])
+        tracker.trades.append(trade)
+        tracker.positions.setdefault(trade.strategy, {})[trade.symbol] = event["position"]
+        tracker.entry_prices.setdefault(trade.strategy, {})[trade.symbol] = event["entry_price"]
+        tracker.realized_pnl[trade.strategy] = event["realized_pnl"]
+        tracker.trade_counts[trade.strategy] = tracker.trade_counts.get(trade.strategy, 0) + 1
+        tracker.trim()
+
+    def _reload_tracker(self) -> bool:
+        try:
+            stat = self.data_file.stat()
+        except FileNotFoundError:
+            return False
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key == self._file_key:
+            return False
+        tracker = Tracker(str(self.data_file), persist=False, hot_trades=config.TRACKER_HOT_TRADES)
+        tracker.load()
+        self._tracker, self._file_key = tracker, key
+        return True
+
+    def _refresh_prices(self) -> bool:
+        held = {s for positions in self._tracker.positions.values() for s, q in positions.items() if q}
+        stale = time.monotonic() - self._prices_at >= self.price_ttl
+        if stale and held:
+            self._prices = get_current_prices(sorted(held))
+            self._prices_at = time.monotonic()
+            return True
+        missing = held - self._prices.keys()  # Newly opened positions
+        if missing:
+            self._prices.update(get_current_prices(sorted(missing)))
+            return True
+        return False
+
+
+def get_current_prices(symbols: list[str]) -> dict[str, float]:
+    """Fetch current prices for the given symbols."""
     prices = {}
-    for pair in config.TRADING_PAIRS:
+    for symbol in symbols:
         try:
-            data = get_market_data(pair)
-            prices[pair] = data.current_price
-        except:
-            prices[pair] = 0.0
+            prices[symbol] = fetch_market_data(symbol).current_price
+        except Exception:
+            prices[symbol] = 0.0
     return prices
 
 
-def get_leaderboard_data():
+snapshots = SnapshotService()
+
+
+def get_leaderboard_data(snapshot: Optional[Snapshot] = None):
     """Get formatted leaderboard data for display."""
-    tracker = Tracker()
-    prices = get_current_prices()
-    leaderboard = tracker.get_leaderboard(prices)
+    snapshot = snapshot or snapshots.get()
+    symbols = sorted({s for p in snapshot.tracker.positions.values() for s in p})
     
     # Format as markdown table
     md = f"# 🏆 LLM Trading Arena Leaderboard\n\n"
-    md += f"*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n"
-    md += f"Trading pairs: {', '.join(config.TRADING_PAIRS)}\n\n"
+    md += f"*Last updated: {snapshot.built_at.strftime('%Y-%m-%d %H:%M:%S')}*\n\n"
+    md += f"Symbols traded: {', '.join(symbols) or '-'}\n\n"
     
     md += "| Rank | Strategy | Total P&L | Realized | Unrealized | Trades |\n"
     md += "|------|----------|-----------|----------|------------|--------|\n"
     
-    for i, entry in enumerate(leaderboard, 1):
+    for i, entry in enumerate(snapshot.leaderboard, 1):
         medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
         total = f"${entry['total_pnl']:+,.2f}"
         realized = f"${entry['realized_pnl']:+,.2f}"
@@ -44,35 +207,84 @@ def get_leaderboard_data():
     return md
 
 
-def get_recent_trades():
+def get_recent_trades(snapshot: Optional[Snapshot] = None):
     """Get recent trades formatted for display."""
-    tracker = Tracker()
+    snapshot = snapshot or snapshots.get()
     
     md = "# 📊 Recent Trades\n\n"
     
     # Get last 20 trades
-    recent = tracker.trades[-20:][::-1]  # Reverse for newest first
+    recent = snapshot.tracker.trades[-20:][::-1]  # Reverse for newest first
     
     if not recent:
         return md + "*No trades yet*"
     
-    md += "| Time | Strategy | Pair | Action | Size | Price | P&L |\n"
-    md += "|------|----------|------|--------|------|-------|-----|\n"
+    return md + _trade_table(recent)
+
+
+def _trade_table(trades: list[Trade], show_date: bool = False) -> str:
+    md = "| Time | Strategy | Symbol | Action | Shares | Price | P&L |\n"
+    md += "|------|----------|--------|--------|--------|-------|-----|\n"
     
-    for trade in recent:
-        time_str = trade.timestamp.split("T")[1][:8] if "T" in trade.timestamp else trade.timestamp
+    for trade in trades:
+        if show_date:
+            time_str = trade.timestamp.replace("T", " ")[:19]
+        else:
+            time_str = trade.timestamp.split("T")[1][:8] if "T" in trade.timestamp else trade.timestamp
         pnl = f"${trade.pnl:+,.2f}" if trade.pnl else "-"
         action_emoji = "🟢" if trade.action == "BUY" else "🔴"
         
-        md += f"| {time_str} | {trade.strategy} | {trade.pair} | {action_emoji} {trade.action} | {trade.size:,.0f} | {trade.price:.5f} | {pnl} |\n"
+        md += f"| {time_str} | {trade.strategy} | {trade.symbol} | {action_emoji} {trade.action} | {trade.quantity:,} | ${trade.price:,.2f} | {pnl} |\n"
     
     return md
 
 
-def get_positions():
+_history_store: Optional[TradeStore] = None
+
+
+def browse_history(strategy: str, symbol: str, action: str, since: str, until: str, state: dict, move: str):
+    """One page of the filtered trade history from the SQLite index.
+
+    `state` holds the cursors of the pages above the current one plus the
+    next page's cursor; `move` is "first", "older" or "newer".
+    """
+    global _history_store
+    if _history_store is None:
+        if not config.TRADE_INDEX_DB or not Path(config.TRADE_INDEX_DB).exists():
+            return "*No trade index yet*", {"cursors": [None], "next": None}
+        _history_store = TradeStore(config.TRADE_INDEX_DB, readonly=True)
+    
+    cursors = list(state["cursors"]) if state else [None]
+    if move == "first":
+        cursors = [None]
+    elif move == "older" and state and state["next"]:
+        cursors.append(state["next"])
+    elif move == "newer" and len(cursors) > 1:
+        cursors.pop()
+    
+    try:
+        page = _history_store.page(
+            cursor=cursors[-1],
+            limit=config.UI_HISTORY_PAGE_SIZE,
+            strategy=None if strategy == "All" else strategy,
+            symbol=symbol.strip().upper() or None,
+            action=None if action == "All" else action,
+            since=since.strip() or None,
+            until=until.strip() or None
+        )
+    except Exception as e:
+        return f"*Error loading history: {e}*", {"cursors": cursors, "next": None}
+    
+    md = f"Page {len(cursors)}\n\n"
+    md += _trade_table(page.trades, show_date=True) if page.trades else "*No matching trades*"
+    return md, {"cursors": cursors, "next": page.next_cursor}
+
+
+def get_positions(snapshot: Optional[Snapshot] = None):
     """Get current positions for all strategies."""
-    tracker = Tracker()
-    prices = get_current_prices()
+    snapshot = snapshot or snapshots.get()
+    tracker = snapshot.tracker
+    prices = snapshot.prices
     
     md = "# 📈 Current Positions\n\n"
     
@@ -80,41 +292,61 @@ def get_positions():
         positions = tracker.positions[strategy]
         if any(p != 0 for p in positions.values()):
             md += f"### {strategy}\n"
-            for pair, size in positions.items():
+            for symbol, size in positions.items():
                 if size != 0:
                     direction = "LONG" if size > 0 else "SHORT"
-                    current = prices.get(pair, 0)
-                    entry = tracker.entry_prices.get(strategy, {}).get(pair, 0)
+                    current = prices.get(symbol, 0)
+                    entry = tracker.entry_prices.get(strategy, {}).get(symbol, 0)
                     if size > 0:
                         pnl = size * (current - entry)
                     else:
                         pnl = abs(size) * (entry - current)
-                    md += f"- {pair}: {direction} {abs(size):,.0f} @ {entry:.5f} (P&L: ${pnl:+,.2f})\n"
+                    md += f"- {symbol}: {direction} {abs(size):,} @ ${entry:,.2f} (P&L: ${pnl:+,.2f})\n"
             md += "\n"
     
-    if not any(tracker.positions.values()):
+    if not any(any(q for q in p.values()) for p in tracker.positions.values()):
         md += "*No open positions*"
     
     return md
 
 
 def refresh_all():
-    """Refresh all displays."""
-    return get_leaderboard_data(), get_recent_trades(), get_positions()
+    """Refresh all displays from the shared snapshot."""
+    return snapshots.render()
+
+
+async def stream_updates():
+    """Push panels to one browser tab whenever the arena's state changes.
+
+    Awaits changes on the server's event loop, so an idle tab holds no
+    worker thread; only the panels whose text changed are sent. Wakes every
+    `price_ttl` seconds so prices for held symbols still refresh between
+    cycles.
+    """
+    version, panels = 0, (None, None, None)
+    while True:
+        snapshot = await snapshots.wait_for_change(version, timeout=snapshots.price_ttl)
+        if snapshot.version == version:
+            continue
+        version = snapshot.version
+        rendered = await asyncio.to_thread(snapshots.render)
+        yield tuple(new if new != old else gr.update() for new, old in zip(rendered, panels))
+        panels = rendered
 
 
 # Create Gradio interface
 with gr.Blocks(title="LLM Trading Arena") as demo:
     gr.Markdown("# 🤖 LLM Trading Arena")
-    gr.Markdown("**Llama 70B vs Classic Strategies** - Live FX Paper Trading Competition")
+    gr.Markdown("**Llama 70B vs Classic Strategies** - Live Equities Paper Trading Competition")
     
+    initial_leaderboard, initial_trades, initial_positions = refresh_all()
     with gr.Row():
         with gr.Column(scale=2):
-            leaderboard = gr.Markdown(get_leaderboard_data())
+            leaderboard = gr.Markdown(initial_leaderboard)
         with gr.Column(scale=1):
-            positions = gr.Markdown(get_positions())
+            positions = gr.Markdown(initial_positions)
     
-    trades = gr.Markdown(get_recent_trades())
+    trades = gr.Markdown(initial_trades)
     
     refresh_btn = gr.Button("🔄 Refresh", variant="primary")
     refresh_btn.click(
@@ -122,12 +354,45 @@ with gr.Blocks(title="LLM Trading Arena") as demo:
         outputs=[leaderboard, trades, positions]
     )
     
-    # Auto-refresh every 30 seconds
-    demo.load(
-        fn=refresh_all,
-        outputs=[leaderboard, trades, positions],
-        every=30
-    )
+    with gr.Accordion("📜 Trade History", open=False):
+        with gr.Row():
+            history_strategy = gr.Dropdown(
+                ["All"] + sorted(snapshots.get().tracker.positions), value="All", label="Strategy"
+            )
+            history_symbol = gr.Textbox(label="Symbol", placeholder="e.g. AAPL")
+            history_action = gr.Dropdown(["All", "BUY", "SELL"], value="All", label="Action")
+            history_since = gr.Textbox(label="From", placeholder="2024-01-02")
+            history_until = gr.Textbox(label="Until (exclusive)", placeholder="2024-02-01")
+        history = gr.Markdown()
+        history_state = gr.State({"cursors": [None], "next": None})
+        with gr.Row():
+            search_btn = gr.Button("🔍 Search")
+            newer_btn = gr.Button("◀ Newer")
+            older_btn = gr.Button("Older ▶")
+        
+        filters = [history_strategy, history_symbol, history_action, history_since, history_until, history_state]
+        for button, move in ((search_btn, "first"), (newer_btn, "newer"), (older_btn, "older")):
+            button.click(
+                fn=lambda *args, move=move: browse_history(*args, move),
+                inputs=filters,
+                outputs=[history, history_state]
+            )
+    
+    if config.EVENTS_JOURNAL:
+        # Push changes from the arena's journal as they happen
+        snapshots.follow()
+        demo.load(
+            fn=stream_updates,
+            outputs=[leaderboard, trades, positions],
+            concurrency_limit=None
+        )
+    else:
+        # Auto-refresh every 30 seconds
+        demo.load(
+            fn=refresh_all,
+            outputs=[leaderboard, trades, positions],
+            every=30
+        )
 
 
 if __name__ == "__main__":